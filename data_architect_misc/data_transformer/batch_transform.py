@@ -0,0 +1,361 @@
+"""
+Read 'DESC' in the code below to see what this script is for.
+"""
+
+import argparse
+import collections
+import datetime
+import fnmatch
+import glob
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import traceback
+
+from constants.transform_constants import KEY_INPUT_FOLDER_PATH, \
+    KEY_INPUT_FILE_NAME_OR_PATTERN, KEY_DATA_WRITER_MODULE_FILE, \
+    DEFAULT_DATA_WRITER_MODULE_FILE, FileDataWriter
+import transform
+import transform_errors
+import transform_utils
+
+DESC = """This program runs many config files (e.g., all the step configs
+of several countries) in one long-lived process (or a pool of them), so
+that pandas, transform functions modules and the constants they load are
+imported only once per process instead of once per config file.
+\nConfig files are run in an order that respects their dependencies: if a
+config file reads the output files of another config file (i.e. its input
+folder and file name/pattern, '-i' file or a path in its function arguments
+points to where the other config file writes its output), it runs only
+after the other one finished successfully. Independent config files run in
+parallel if more than one worker is used.
+\nUsage example #1 - Run config files matching the patterns:
+    >> python batch_transform.py -c ./configs/FX_Rates/*.json ./configs/Budget_Rollup/step*.json -w 4
+
+\nUsage example #2 - Run config files listed in a batch file:
+    >> python batch_transform.py -b ./configs/batch.json -w 4
+where batch.json looks like:
+    {"configs": [
+        "./configs/FX_Rates/*.json",
+        {"config": "./configs/NA_United_States/step1_transform_raw_nontv_investment_data.json",
+         "args": ["-i", "./input/NA_United_States/NonTV_20200801.xlsx"]},
+        {"config": "./configs/NA_United_States/step4_combine_tranformed_data.json",
+         "args": ["-i", "./output/NA_United_States/base.csv"],
+         "depends_on": ["./configs/NA_United_States/step[1-3]*.json"]}
+    ]}
+'args' are passed to transform.py for that config file and 'depends_on'
+lists the config files (or patterns) that must run before it, on top of
+the dependencies found automatically.
+\nAny other arguments (e.g., '-f' or '-r') are passed to transform.py
+for every config file:
+    >> python batch_transform.py -b ./configs/batch.json -w 4 -f"""
+
+B_FLAG_HELP_TEXT = """[Optional] Batch file (JSON) that lists the config files
+to run, with transform.py arguments and dependencies of each, if any.
+E.g., python batch_transform.py -b ./configs/batch.json"""
+
+C_FLAG_HELP_TEXT = """[Optional] Config file(s) or pattern(s) of config files to run.
+E.g., python batch_transform.py -c ./configs/NA_United_States/step*.json"""
+
+W_FLAG_HELP_TEXT = """[Optional] Number of worker processes to run the config files
+in parallel (default: 1). Each worker process runs one config file at a time,
+so the input files of a config file are transformed one after another.
+E.g., python batch_transform.py -b ./configs/batch.json -w 4"""
+
+L_FLAG_HELP_TEXT = """[Optional] List the config files in the order they will run,
+along with the config files each depends on, and exit without running them.
+E.g., python batch_transform.py -b ./configs/batch.json -l"""
+
+KEY_BATCH_CONFIGS = 'configs'
+KEY_BATCH_CONFIG_FILE = 'config'
+KEY_BATCH_TRANSFORM_ARGS = 'args'
+KEY_BATCH_DEPENDS_ON = 'depends_on'
+
+# A config file to run with its transform.py arguments and the
+# config file patterns it explicitly depends on (if any).
+BatchJob = collections.namedtuple('BatchJob', ['config_file',
+                                               'transform_args',
+                                               'depends_on'])
+
+logger = logging.getLogger(__name__)  # ('batch_transform.py')
+
+
+def _get_job_name(job):
+    return ' '.join([job.config_file] + job.transform_args)
+
+
+def _get_config_files(config_file_or_pattern):
+    config_files = sorted(glob.glob(config_file_or_pattern))
+    if not config_files:
+        raise transform_errors.FileNotFound(config_file_or_pattern)
+    return config_files
+
+
+def load_batch_jobs(batch_file, config_files_or_patterns, common_transform_args):
+    """
+    Returns the list of jobs from the batch file and the config
+    file patterns given in the commandline. common_transform_args
+    are added to the transform.py arguments of every job.
+    """
+    entries = []
+    if batch_file:
+        entries.extend(transform_utils.load_config(batch_file)[KEY_BATCH_CONFIGS])
+    entries.extend(config_files_or_patterns or [])
+
+    jobs = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {KEY_BATCH_CONFIG_FILE: entry}
+        for config_file in _get_config_files(entry[KEY_BATCH_CONFIG_FILE]):
+            jobs.append(BatchJob(config_file,
+                                 entry.get(KEY_BATCH_TRANSFORM_ARGS, []) + common_transform_args,
+                                 entry.get(KEY_BATCH_DEPENDS_ON, [])))
+    return jobs
+
+
+def _parse_transform_args(job):
+    return transform.get_argument_parser().parse_args(['-c', job.config_file]
+                                                      + job.transform_args)
+
+
+def _normalize_path(path):
+    return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+
+def _get_output_locations(job):
+    """
+    Returns the list of (output folder, output file name prefix,
+    output file extension) where the configs in the job's config
+    file write their output files to.
+    """
+    args = _parse_transform_args(job)
+    output_locations = []
+    for config in transform_utils.load_config(job.config_file):
+        if not transform_utils.get_write_data_decision(config):
+            continue
+
+        data_writer_kls = transform_utils.instantiate_class_in_module_file(
+            config.get(KEY_DATA_WRITER_MODULE_FILE, DEFAULT_DATA_WRITER_MODULE_FILE))
+        if not hasattr(data_writer_kls, 'OUTPUT_FILE_EXTENSION'):
+            # e.g., MSSQLDataWriter doesn't write files
+            continue
+
+        if args.o:
+            output_locations.append((_normalize_path(os.path.dirname(args.o)),
+                                     os.path.basename(args.o), ''))
+        else:
+            output_locations.append((
+                _normalize_path(config.get(FileDataWriter.KEY_OUTPUT_FOLDER_PATH,
+                                           FileDataWriter.DEFAULT_OUTPUT_FOLDER_PATH)),
+                config.get(FileDataWriter.KEY_OUTPUT_FILE_PREFIX, ''),
+                data_writer_kls.OUTPUT_FILE_EXTENSION))
+    return output_locations
+
+
+def _get_input_references(job):
+    """
+    Returns the paths (or path patterns) of the input files the
+    configs in the job's config file read: input folder + file name
+    or pattern, '-i' file and path-like strings in function arguments
+    (e.g., folder of the files to combine).
+    """
+    args = _parse_transform_args(job)
+    input_references = [args.i] if args.i else []
+    for config in transform_utils.load_config(job.config_file):
+        if (not args.i) and (KEY_INPUT_FOLDER_PATH in config) \
+                and (KEY_INPUT_FILE_NAME_OR_PATTERN in config):
+            input_references.append(os.path.join(config[KEY_INPUT_FOLDER_PATH],
+                                                 config[KEY_INPUT_FILE_NAME_OR_PATTERN]))
+        input_references.extend([s for s in transform_utils.get_str_values_in_functions_to_apply(config)
+                                 if ('/' in s) or (os.sep in s)])
+    return [_normalize_path(r) for r in input_references]
+
+
+def _is_output_of(input_reference, output_location):
+    """
+    Checks if the input file (pattern) or folder could be one
+    of the output files (or the output folder) of a config.
+    """
+    output_folder, output_file_name_prefix, output_file_extension = output_location
+    if input_reference == output_folder:
+        return True
+    if os.path.dirname(input_reference) != output_folder:
+        return False
+
+    input_file_name_or_pattern = os.path.basename(input_reference)
+    # Output file names look like: prefix_rows_0_100_20200101_000000.csv
+    sample_output_file_name = '_'.join([a for a in [output_file_name_prefix,
+                                                    'rows_0_1', '20200101_000000'] if a]) \
+                              + output_file_extension
+    return ((output_file_name_prefix
+             and input_file_name_or_pattern.startswith(output_file_name_prefix))
+            or fnmatch.fnmatch(sample_output_file_name, input_file_name_or_pattern))
+
+
+def get_job_dependencies(jobs):
+    """
+    Returns {job index => set of indexes of jobs that must finish before it}
+    based on which job reads the output files of which other job and
+    the 'depends_on' patterns in the batch file.
+    """
+    output_locations = [_get_output_locations(job) for job in jobs]
+    input_references = [_get_input_references(job) for job in jobs]
+
+    dependencies = {}
+    for i, job in enumerate(jobs):
+        dependencies[i] = set()
+        for j, other_job in enumerate(jobs):
+            if i == j:
+                continue
+            if any(fnmatch.fnmatch(_normalize_path(other_job.config_file), _normalize_path(p))
+                   for p in job.depends_on):
+                dependencies[i].add(j)
+            elif any(_is_output_of(r, loc) for r in input_references[i]
+                     for loc in output_locations[j]):
+                dependencies[i].add(j)
+    return dependencies
+
+
+def sort_jobs_by_dependencies(jobs, dependencies):
+    """
+    Returns the job indexes in the order they can run one after
+    another (keeping the order in the batch where possible).
+    REF: https://en.wikipedia.org/wiki/Topological_sorting#Kahn's_algorithm
+    """
+    sorted_job_indexes = []
+    remaining = list(range(len(jobs)))
+    while remaining:
+        ready = [i for i in remaining if dependencies[i].issubset(sorted_job_indexes)]
+        if not ready:
+            raise transform_errors.ConfigDependencyCycleError(
+                [_get_job_name(jobs[i]) for i in remaining])
+        sorted_job_indexes.append(ready[0])
+        remaining.remove(ready[0])
+    return sorted_job_indexes
+
+
+def run_batch_job(job):
+    """
+    Runs the config file of the job with transform.py (in the
+    current process, so modules imported by earlier jobs are reused).
+    Errors are caught and returned so that the other jobs can go on.
+    """
+    start_dt = datetime.datetime.now()
+    try:
+        args = _parse_transform_args(job)
+        if args.workers > 1:
+            # Worker processes of a pool can't start their own pool
+            logger.warning(f"'-w' flag is ignored when config files are "
+                           f"run by this script: {_get_job_name(job)}")
+            args.workers = 1
+        failed_file_count = transform.transform_config_file(job.config_file, args)
+        error_msg = (f"{failed_file_count} input file(s) failed to transform."
+                     if failed_file_count else None)
+    except Exception:
+        error_msg = traceback.format_exc()
+        logger.error(f"Failed to run this config file: {_get_job_name(job)}\n{error_msg}")
+
+    return {'job_name': _get_job_name(job),
+            'secs': (datetime.datetime.now() - start_dt).total_seconds(),
+            'error': error_msg}
+
+
+def run_batch_jobs(jobs, dependencies, workers):
+    """
+    Runs each job as soon as all the jobs it depends on have finished
+    successfully. Jobs that depend on a failed job are not run.
+    Returns the results of the jobs in the order they finished.
+    """
+    results = []
+    finished_queue = queue.Queue()
+    pending = sort_jobs_by_dependencies(jobs, dependencies)
+    succeeded, failed = set(), set()
+    running_count = 0
+
+    pool = multiprocessing.Pool(processes=workers,
+                                initializer=transform.set_logging_config) \
+        if workers > 1 else None
+    try:
+        while pending or running_count:
+            for i in list(pending):
+                if dependencies[i] & failed:
+                    pending.remove(i)
+                    failed.add(i)
+                    results.append({'job_name': _get_job_name(jobs[i]), 'secs': 0,
+                                    'error': 'Skipped because a config file it '
+                                             'depends on failed.'})
+                elif dependencies[i].issubset(succeeded):
+                    pending.remove(i)
+                    running_count += 1
+                    if pool:
+                        pool.apply_async(run_batch_job, (jobs[i],),
+                                         callback=lambda r, i=i: finished_queue.put((i, r)),
+                                         error_callback=lambda e, i=i: finished_queue.put(
+                                             (i, {'job_name': _get_job_name(jobs[i]),
+                                                  'secs': 0, 'error': repr(e)})))
+                    else:
+                        finished_queue.put((i, run_batch_job(jobs[i])))
+
+            if running_count:
+                i, result = finished_queue.get()
+                running_count -= 1
+                results.append(result)
+                (failed if result['error'] else succeeded).add(i)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    return results
+
+
+def log_batch_summary(results):
+    """Logs how each config file went and returns the number that failed."""
+    failed_results = [r for r in results if r['error'] is not None]
+    summary = '\n'.join([f"{'FAILED' if r['error'] else 'OK'}: {r['job_name']} "
+                         f"({r['secs']:.1f} secs)"
+                         + (f"\n    {r['error'].strip().splitlines()[-1]}" if r['error'] else '')
+                         for r in results])
+    logger.info(f"Ran {len(results) - len(failed_results)} out of "
+                f"{len(results)} config file(s) successfully:\n{summary}")
+    return len(failed_results)
+
+
+if __name__ == '__main__':
+    transform.set_logging_config()
+
+    parser = argparse.ArgumentParser(
+        description=DESC,
+        formatter_class=argparse.RawTextHelpFormatter,
+        usage=argparse.SUPPRESS)
+    parser.add_argument('-b', required=False, type=str,
+                        help=B_FLAG_HELP_TEXT)
+    parser.add_argument('-c', required=False, type=str, nargs='+',
+                        help=C_FLAG_HELP_TEXT)
+    parser.add_argument('-w', '--workers', required=False, type=int,
+                        default=1, help=W_FLAG_HELP_TEXT)
+    parser.add_argument('-l', '--list', required=False, action='store_true',
+                        help=L_FLAG_HELP_TEXT)
+    # Other arguments are passed to transform.py for every config file
+    args, common_transform_args = parser.parse_known_args()
+    if not (args.b or args.c):
+        parser.error("Either '-b' or '-c' flag must be provided.")
+
+    batch_jobs = load_batch_jobs(args.b, args.c, common_transform_args)
+    job_dependencies = get_job_dependencies(batch_jobs)
+
+    if args.list:
+        logger.info('Config files will run in this order:\n' + '\n'.join(
+            [f"{n+1}. {_get_job_name(batch_jobs[i])}"
+             + ''.join([f"\n    depends on: {_get_job_name(batch_jobs[j])}"
+                        for j in sorted(job_dependencies[i])])
+             for n, i in enumerate(sort_jobs_by_dependencies(batch_jobs, job_dependencies))]))
+        sys.exit()
+
+    batch_results = run_batch_jobs(batch_jobs, job_dependencies, args.workers)
+    failed_job_count = log_batch_summary(batch_results)
+    if failed_job_count:
+        sys.exit(f"{failed_job_count} config file(s) failed. "
+                 f"See the batch summary above for details.")
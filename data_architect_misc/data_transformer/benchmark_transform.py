@@ -0,0 +1,700 @@
+"""
+Read 'DESC' in the code below to see what this script is for.
+"""
+
+import argparse
+import calendar
+import collections
+import copy
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from constants import comp_harm_constants
+from constants.transform_constants import KEY_INPUT_FOLDER_PATH, \
+    KEY_INPUT_FILE_NAME_OR_PATTERN, KEY_FUNCTIONS_TO_APPLY, KEY_DELIMITER, \
+    KEY_HEADER, PandasFileDataReader, FileDataWriter
+import transform
+from transform_functions.common_comp_harm_transform_functions import CommonCompHarmTransformFunctions
+from transform_profiler import TransformProfiler, _get_peak_rss_in_mb
+import transform_utils
+
+DESC = """This program measures how fast (and how much memory) transform.py
+runs on synthesized input files that look like the real ones, so that we
+can tell whether a change to transform.py, the data readers/writers or
+the transform functions makes things faster or slower.
+\nThree kinds of benchmarks are run:
+1. Startup: how long it takes to start transform.py (i.e. to import
+   everything it needs) in a new Python process, which must be within
+   STARTUP_BUDGET_SECS below. Optional packages (e.g., SQLAlchemy and
+   Polars) must not be imported until a config needs them.
+2. End-to-end: each scenario synthesizes an input file (a wide Excel file,
+   a 10M-row pipe-delimited CSV file, a CSV file with ragged footer rows,
+   etc.) and runs one of the shipped configs (Demo, AED_GCC, FX_Rates and
+   Budget_Rollup) on it from reading to writing, in a fresh process so
+   that its peak memory usage is measured on its own. Time spent in each
+   function of the config is recorded, too.
+3. Micro: each of the common transform functions is applied (several
+   times) to the same synthesized dataframe, and the median time and
+   peak memory allocated are recorded.
+\nThe results are written as a JSON file to the work folder and compared
+with the baseline results (if any) to flag regressions, i.e. benchmarks
+that are slower or use more memory than the baseline by more than the
+tolerance. Save the results of the code before the change as the baseline
+first (on the same machine, with the same scale):
+    >> python benchmark_transform.py -sb
+and then, after the change, compare with it:
+    >> python benchmark_transform.py
+\nSynthesized input files are kept in the work folder and reused in the
+next runs (with the same scale). Use smaller scale for a quick check:
+    >> python benchmark_transform.py -x 0.01 -s AED_GCC Budget_Rollup -n 3"""
+
+S_FLAG_HELP_TEXT = """[Optional] Names of end-to-end scenarios to run (default: all).
+Use 'none' to skip end-to-end benchmarks.
+E.g., python benchmark_transform.py -s AED_GCC FX_Rates"""
+
+MB_FLAG_HELP_TEXT = """[Optional] Names of transform functions to micro-benchmark
+(default: all). Use 'none' to skip micro-benchmarks.
+E.g., python benchmark_transform.py -mb rename_columns drop_empty_rows"""
+
+X_FLAG_HELP_TEXT = """[Optional] Scale of the synthesized data (default: 1.0, e.g.,
+10M rows for the pipe-delimited CSV file). Results are only compared with
+the baseline recorded with the same scale.
+E.g., python benchmark_transform.py -x 0.1"""
+
+N_FLAG_HELP_TEXT = """[Optional] Number of times each micro-benchmark is repeated
+(default: 5). The median time is recorded.
+E.g., python benchmark_transform.py -n 10"""
+
+D_FLAG_HELP_TEXT = """[Optional] Folder to keep the synthesized input files, output
+files and benchmark results in (default: ./output/benchmarks).
+E.g., python benchmark_transform.py -d ./output/benchmarks"""
+
+B_FLAG_HELP_TEXT = """[Optional] Baseline results file to compare with (default:
+baseline.json in the work folder).
+E.g., python benchmark_transform.py -b ./output/benchmarks/baseline.json"""
+
+SB_FLAG_HELP_TEXT = """[Optional] Save the results as the baseline (instead of
+comparing with it).
+E.g., python benchmark_transform.py -sb"""
+
+SS_FLAG_HELP_TEXT = """[Optional] Skip the startup benchmark.
+E.g., python benchmark_transform.py -ss"""
+
+T_FLAG_HELP_TEXT = """[Optional] How much slower (or more memory) than the baseline,
+as a fraction of the baseline, counts as a regression (default: 0.2, i.e. 20%%).
+E.g., python benchmark_transform.py -t 0.1"""
+
+DEFAULT_WORK_FOLDER = os.path.join(os.getcwd(), 'output', 'benchmarks')
+BASELINE_FILE_NAME = 'baseline.json'
+RESULTS_FILE_NAME_PREFIX = 'benchmark_results'
+
+DEFAULT_SCALE = 1.0
+DEFAULT_MICRO_BENCHMARK_REPEATS = 5
+DEFAULT_REGRESSION_TOLERANCE = 0.2
+# Differences smaller than these are noise, even if
+# they are larger than the tolerance (e.g., 1ms vs 2ms).
+MIN_TIME_DIFF_SECS = 0.05
+MIN_MEMORY_DIFF_MB = 10
+
+# Maximum (median) time it may take to start transform.py
+STARTUP_BUDGET_SECS = 1.0
+# Packages that transform.py must not import until a config needs them
+OPTIONAL_PACKAGES = ['polars', 'sqlalchemy', 'openpyxl', 'pyxlsb', 'xlrd', 'zstandard']
+STARTUP_COMMAND = [sys.executable, 'transform.py', '-h']
+OPTIONAL_PACKAGES_IMPORTED_COMMAND = [
+    sys.executable, '-c',
+    f"import sys; import transform; "
+    f"print(','.join(p for p in {OPTIONAL_PACKAGES!r} if p in sys.modules))"]
+
+NO_BENCHMARKS = 'none'
+RANDOM_SEED = 2020
+
+# Number of rows of the synthesized files (or dataframe) at scale 1.0
+WIDE_EXCEL_ROWS = 10000
+WIDE_EXCEL_COLUMNS = 100
+PIPE_CSV_ROWS = 10000000
+RAGGED_FOOTER_CSV_ROWS = 100000
+RAGGED_FOOTER_ROWS = ['Source: Budget Roll-Up (synthesized for benchmarking)',
+                      'Copyright (c) All rights reserved.',
+                      'Confidential']
+FX_RATES_EXCEL_ROWS = 2000
+MICRO_BENCHMARK_ROWS = 1000000
+# Rows written per batch when synthesizing large CSV files
+CSV_WRITE_BATCH_ROWS = 1000000
+
+logger = logging.getLogger(__name__)
+
+# End-to-end benchmark: the config (config_index-th one in the config
+# file) that runs on the input file synthesized by make_input_file
+# (which is given the path of the file and the number of rows to write)
+# after the config is updated by update_config (if any).
+Scenario = collections.namedtuple('Scenario', ['name',
+                                               'config_file',
+                                               'config_index',
+                                               'input_file_name',
+                                               'rows',
+                                               'make_input_file',
+                                               'update_config'])
+
+# Micro-benchmark of a transform function of CommonCompHarmTransformFunctions
+MicroBenchmark = collections.namedtuple('MicroBenchmark', ['function_name',
+                                                           'args'])
+
+
+def _get_rows(rows_at_full_scale, scale):
+    return max(int(rows_at_full_scale * scale), 1)
+
+
+def _random_choice(rng, values, size):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+
+def _random_amounts(rng, size):
+    return np.round(rng.uniform(0, 100000, size), 2)
+
+
+def make_wide_excel_file(file_path, rows):
+    """
+    Writes an Excel file with WIDE_EXCEL_COLUMNS columns of mixed
+    text and numeric values (like the Excel files of the Demo config).
+    """
+    rng = np.random.default_rng(RANDOM_SEED)
+    data = {}
+    for i in range(WIDE_EXCEL_COLUMNS):
+        if i % 3 == 0:
+            data[f"Text_{i}"] = _random_choice(rng, [f"Value {v}" for v in range(50)], rows)
+        elif i % 3 == 1:
+            data[f"Amount_{i}"] = _random_amounts(rng, rows)
+        else:
+            data[f"Count_{i}"] = rng.integers(0, 1000, rows)
+    pd.DataFrame(data).to_excel(file_path, index=False)
+
+
+def _write_csv_in_batches(file_path, rows, make_batch_df, delimiter, footer_rows=()):
+    """
+    Writes the CSV file batch by batch (each made by make_batch_df,
+    which is given the number of rows to make), so that we don't
+    need to hold all the rows in memory.
+    """
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        for start_row in range(0, rows, CSV_WRITE_BATCH_ROWS):
+            batch_df = make_batch_df(min(CSV_WRITE_BATCH_ROWS, rows - start_row))
+            batch_df.to_csv(f, sep=delimiter, index=False, header=start_row == 0)
+        for footer_row in footer_rows:
+            f.write(f"{footer_row}\n")
+
+
+def make_gcc_pipe_csv_file(file_path, rows):
+    """
+    Writes a pipe-delimited CSV file with the 11 columns that
+    the AED_GCC config expects.
+    """
+    rng = np.random.default_rng(RANDOM_SEED)
+    months = list(calendar.month_name)[1:]
+
+    def make_batch_df(size):
+        return pd.DataFrame({
+            'YEAR': rng.integers(2018, 2021, size),
+            'MONTH': _random_choice(rng, months, size),
+            'COUNTRY': _random_choice(rng, ['KSA', 'UAE', 'KUWAIT', 'QATAR', 'OMAN',
+                                            'BAHRAIN', 'PAN ARAB'], size),
+            'ADVERTISER': _random_choice(rng, ['COLGATE PALMOLIVE', 'P&G', 'UNILEVER',
+                                               'RECKITT BENCKISER', 'HENKEL', 'LOREAL',
+                                               'AL OTHMAN'], size),
+            'MEDIA': _random_choice(rng, ['TV', 'MAGAZINE', 'RADIO', 'CINEMA', 'OUTDOOR'], size),
+            'GROSS_SPEND_IN_LOCAL_CURRENCY': _random_amounts(rng, size),
+            'CATEGORY': _random_choice(rng, ['Toothpaste', 'Laundry Detergent', 'Dish Wash',
+                                             'Mouthwash', 'Shampoo', 'Bar Soap'], size),
+            'SUB-CATEGORY': _random_choice(rng, [f"Subcategory {v}" for v in range(40)], size),
+            'BRAND': _random_choice(rng, [f"Brand {v}" for v in range(500)], size),
+            'SUBBRAND': _random_choice(rng, [f"Subbrand {v}" for v in range(2000)], size),
+            'PRODUCT_NAME': _random_choice(rng, [f"Product {v}" for v in range(10000)], size),
+        })
+
+    _write_csv_in_batches(file_path, rows, make_batch_df, '|')
+
+
+def make_budget_ragged_footer_csv_file(file_path, rows):
+    """
+    Writes a pipe-delimited CSV file with the 13 columns that the
+    Budget_Rollup config (step 4) expects and footer rows (e.g.,
+    copyright notes) that have fewer columns than the data rows.
+    """
+    rng = np.random.default_rng(RANDOM_SEED)
+    current_year = datetime.datetime.now().year
+
+    def make_batch_df(size):
+        budgets = _random_amounts(rng, size)
+        return pd.DataFrame({
+            'Region': _random_choice(rng, ['aed', 'apac', 'europe', 'latam', 'na'], size),
+            'Market': _random_choice(rng, ['Argentina', 'Australia', 'Brazil', 'Canada', 'Chile',
+                                           'China', 'Colombia', 'US', 'Ukraine', 'Vietnam'], size),
+            'Year': rng.integers(current_year - 5, current_year + 1, size),
+            'Category': _random_choice(rng, ['Oral Care', 'Home Care', 'Personal Care'], size),
+            'Segment Macro': _random_choice(rng, ['Toothpaste', 'Toothbrush', 'Mouthwash',
+                                                  'Bar Soap', 'Body Wash', 'Dish Cleaners',
+                                                  'Fabric Conditioners'], size),
+            'Brand': _random_choice(rng, [f"Brand {v}" for v in range(300)], size),
+            'Sub Brand': _random_choice(rng, [f"Sub Brand {v}" for v in range(1000)], size),
+            'Macro Channel': _random_choice(rng, ['Digital', 'TV', 'Search', 'Other',
+                                                  'Online Video'], size),
+            'Channel': _random_choice(rng, ['TV', 'Print', 'YouTube', 'Facebook', 'Paid Search',
+                                            'Amazon', 'Programmatic'], size),
+            'Quarter': _random_choice(rng, ['Q1', 'Q2', 'Q3', 'Q4'], size),
+            'Division': _random_choice(rng, ['Division A', 'Division B'], size),
+            'Comments': _random_choice(rng, ['', 'Approved', 'Pending'], size),
+            'Budget (USD)': [f"${b:,.2f}" for b in budgets],
+        })
+
+    _write_csv_in_batches(file_path, rows, make_batch_df, '|', RAGGED_FOOTER_ROWS)
+
+
+def make_fx_rates_excel_file(file_path, rows):
+    """
+    Writes an Excel file of yearly average FX rates (from 2012 to
+    this year) by country, like the one the FX_Rates config (step 3)
+    reads to calculate the constant dollar ratios.
+    """
+    rng = np.random.default_rng(RANDOM_SEED)
+    countries = [f"Country {i}" for i in range(rows)]
+    data = {'COUNTRY': countries,
+            'HARMONIZED_COUNTRY': countries}
+    for year in range(2012, datetime.datetime.now().year + 1):
+        data[str(year)] = np.round(rng.uniform(0.5, 100, rows), 4)
+    pd.DataFrame(data).to_excel(file_path, index=False)
+
+
+def _drop_functions_not_defined(config):
+    """
+    Drops the functions in 'functions_to_apply' that aren't defined in
+    the transform functions class of the config (e.g., the Demo config
+    loads its data with a function that no longer exists, so the
+    synthesized file is read as its input file instead).
+    """
+    transform_funcs_kls = transform_utils.instantiate_transform_functions_class(config)
+    functions_to_apply = []
+    for f in config[KEY_FUNCTIONS_TO_APPLY]:
+        function_name = transform_utils.get_function_name(f)
+        if hasattr(transform_funcs_kls, function_name):
+            functions_to_apply.append(f)
+        else:
+            logger.warning(f"Function '{function_name}' is not defined, "
+                           f"so it is dropped from the benchmark.")
+    config[KEY_FUNCTIONS_TO_APPLY] = functions_to_apply
+    return config
+
+
+def _use_pipe_delimiter(config):
+    config[KEY_DELIMITER] = '|'
+    return config
+
+
+def _use_pipe_delimiter_and_skip_footer_rows(config):
+    config[KEY_DELIMITER] = '|'
+    config[PandasFileDataReader.KEY_SKIP_FOOTER] = len(RAGGED_FOOTER_ROWS)
+    # The config reads Excel files, whose 'Year' values are read as
+    # integers (but values in CSV files are read as strings)
+    config[PandasFileDataReader.KEY_COLUMN_DATA_TYPES] = {'Year': 'int64'}
+    return config
+
+
+SCENARIOS = [
+    Scenario('Demo',
+             os.path.join('configs', 'Demo', 'config.json'), 0,
+             'wide.xlsx', WIDE_EXCEL_ROWS,
+             make_wide_excel_file, _drop_functions_not_defined),
+    Scenario('AED_GCC',
+             os.path.join('configs', 'AED_GCC', 'config.json'), 0,
+             'gcc.csv', PIPE_CSV_ROWS,
+             make_gcc_pipe_csv_file, _use_pipe_delimiter),
+    Scenario('FX_Rates',
+             os.path.join('configs', 'FX_Rates', 'step3_calculate_constant_dollar_ratios_config.json'), 0,
+             'yearly_avg_fx_rates.xlsx', FX_RATES_EXCEL_ROWS,
+             make_fx_rates_excel_file, None),
+    Scenario('Budget_Rollup',
+             os.path.join('configs', 'Budget_Rollup', 'step4_transform_raw_budget_data.json'), 0,
+             'budget_with_footer.csv', RAGGED_FOOTER_CSV_ROWS,
+             make_budget_ragged_footer_csv_file, _use_pipe_delimiter_and_skip_footer_rows),
+]
+
+MICRO_BENCHMARKS = [
+    MicroBenchmark('rename_columns', [{'Country': 'COUNTRY', 'Spend': 'SPEND'}]),
+    MicroBenchmark('capitalize_column_names', []),
+    MicroBenchmark('drop_empty_rows', [['Comment']]),
+    MicroBenchmark('drop_rows_with_matching_string_values', [['Media'], [['Cinema', 'Radio']]]),
+    MicroBenchmark('capitalize_all_letters_of_each_word_in_columns', [['Country', 'Brand']]),
+    MicroBenchmark('capitalize_first_letter_of_each_word_in_columns', [['Advertiser']]),
+    MicroBenchmark('update_str_values_in_columns', [['Media'], [{'TV': 'Television',
+                                                                 'Print': 'Press'}]]),
+    MicroBenchmark('update_decimal_places_in_columns', [['Spend'], 2]),
+    MicroBenchmark('copy_value_from_row_above_to_empty_rows_below', [['Comment']]),
+    MicroBenchmark('add_new_column_with_fixed_str_value', ['Region', 'Africa-Eurasia']),
+    MicroBenchmark('add_new_column_by_copying_values_from_another_column', [['Spend'], ['Spend_Copy']]),
+    MicroBenchmark('add_new_column_with_values_based_on_another_column_values_using_regex_match',
+                   ['Advertiser', 'HARMONIZED_ADVERTISER', comp_harm_constants.ADVERTISER_MAPPINGS]),
+    MicroBenchmark('add_integer_month_column_using_existing_month_col_with_full_month_names',
+                   ['Month', 'HARMONIZED_MONTH']),
+    MicroBenchmark('add_date_column_with_current_date', []),
+    MicroBenchmark('multiply_values_in_column_by_a_thousand', ['Spend']),
+    MicroBenchmark('update_order_of_columns_in_dataframe', [['Spend', 'Country', 'Brand']]),
+]
+
+
+def make_micro_benchmark_dataframe(rows):
+    """Returns the dataframe which micro-benchmarks are run on."""
+    rng = np.random.default_rng(RANDOM_SEED)
+    return pd.DataFrame({
+        'Country': _random_choice(rng, ['russia', 'turkey', 'kenya', 'oman', 'qatar'], rows),
+        'Advertiser': _random_choice(rng, ['colgate palmolive', 'procter & gamble', 'unilever',
+                                           'reckitt', 'henkel', 'some local company'], rows),
+        'Media': _random_choice(rng, ['TV', 'Print', 'Radio', 'Cinema', 'Digital'], rows),
+        'Brand': _random_choice(rng, [f"brand {v}" for v in range(1000)], rows),
+        'Month': _random_choice(rng, list(calendar.month_name)[1:], rows),
+        'Spend': _random_amounts(rng, rows),
+        'Comment': _random_choice(rng, ['', '', 'Note'], rows),
+    })
+
+
+def _get_input_file(scenario, scale, work_folder):
+    """
+    Returns the synthesized input file of the scenario (and its number
+    of rows), which is made only if it isn't made in the previous runs.
+    """
+    rows = _get_rows(scenario.rows, scale)
+    input_folder = os.path.join(work_folder, 'input', scenario.name)
+    os.makedirs(input_folder, exist_ok=True)
+    name, ext = os.path.splitext(scenario.input_file_name)
+    input_file = os.path.join(input_folder, f"{name}_{rows}_rows{ext}")
+    if not os.path.exists(input_file):
+        logger.info(f"Synthesizing input file with {rows} rows: {input_file}")
+        # Written to a temporary file first so that
+        # a half-written file is never reused
+        tmp_file = os.path.join(input_folder, f"tmp_{os.path.basename(input_file)}")
+        scenario.make_input_file(tmp_file, rows)
+        os.replace(tmp_file, input_file)
+    return input_file, rows
+
+
+def _get_scenario_config(scenario, input_file, work_folder):
+    config = copy.deepcopy(transform_utils.load_config(scenario.config_file)[scenario.config_index])
+    config[KEY_INPUT_FOLDER_PATH] = os.path.dirname(input_file)
+    config[KEY_INPUT_FILE_NAME_OR_PATTERN] = os.path.basename(input_file)
+    config[FileDataWriter.KEY_OUTPUT_FOLDER_PATH] = os.path.join(work_folder, 'output', scenario.name)
+    # Synthesized files always have the header in the first row
+    config[KEY_HEADER] = 0
+    config[PandasFileDataReader.KEY_SKIP_ROWS] = 1
+    if scenario.update_config:
+        config = scenario.update_config(config)
+    return config
+
+
+def run_scenario(scenario_input_file_and_work_folder):
+    """
+    Runs the config of the scenario on its input file with transform.py
+    (in a worker process of its own so that the peak memory usage is
+    that of the scenario alone) and returns the measurements.
+    """
+    scenario, input_file, input_rows, work_folder = scenario_input_file_and_work_folder
+    rss_before = _get_peak_rss_in_mb()
+    config = _get_scenario_config(scenario, input_file, work_folder)
+    transform_utils.validate_configurations(config)
+    config = transform_utils.insert_inferred_input_columns_to_config_json(config)
+
+    profiler = TransformProfiler()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    rows_written = transform.transform_input_file(input_file, config, profiler=profiler)
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    peak_rss = _get_peak_rss_in_mb()
+    return {
+        'name': scenario.name,
+        'config_file': scenario.config_file,
+        'input_file': input_file,
+        'input_rows': input_rows,
+        'input_file_size_mb': round(os.path.getsize(input_file) / (1024 * 1024), 3),
+        'rows_written': rows_written,
+        'wall_time_secs': round(wall_time, 3),
+        'cpu_time_secs': round(cpu_time, 3),
+        'rows_per_sec': round(input_rows / wall_time, 1),
+        'mb_per_sec': round(os.path.getsize(input_file) / (1024 * 1024) / wall_time, 3),
+        'peak_rss_mb': None if peak_rss is None else round(peak_rss, 1),
+        'peak_rss_increase_mb': None if peak_rss is None else round(peak_rss - rss_before, 1),
+        'summary_by_function': profiler.get_summary_by_function(),
+    }
+
+
+def run_scenarios(scenarios, scale, work_folder):
+    results = []
+    for scenario in scenarios:
+        input_file, input_rows = _get_input_file(scenario, scale, work_folder)
+        logger.info(f"Running end-to-end benchmark: {scenario.name}")
+        # A new process (not a forked copy of this one, which already
+        # holds the synthesized data) is used for each scenario.
+        # REF: https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods
+        with multiprocessing.get_context('spawn').Pool(processes=1,
+                                                       initializer=transform.set_logging_config) as pool:
+            results.append(pool.apply(run_scenario, ((scenario, input_file,
+                                                      input_rows, work_folder),)))
+    return results
+
+
+def run_startup_benchmark(repeats):
+    """
+    Starts transform.py (only to print its help text) in a new Python
+    process 'repeats' times and returns the measurements, along with
+    the optional packages that are imported when transform.py starts.
+    """
+    logger.info("Running startup benchmark: transform.py")
+    wall_times = []
+    for _ in range(repeats):
+        wall_start = time.perf_counter()
+        subprocess.run(STARTUP_COMMAND, check=True, stdout=subprocess.DEVNULL)
+        wall_times.append(time.perf_counter() - wall_start)
+
+    optional_packages_imported = subprocess.run(OPTIONAL_PACKAGES_IMPORTED_COMMAND,
+                                                check=True, capture_output=True,
+                                                text=True).stdout.strip()
+    return {
+        'name': 'transform.py',
+        'repeats': repeats,
+        'median_secs': round(statistics.median(wall_times), 3),
+        'min_secs': round(min(wall_times), 3),
+        'budget_secs': STARTUP_BUDGET_SECS,
+        'optional_packages_imported': optional_packages_imported.split(',')
+        if optional_packages_imported else [],
+    }
+
+
+def find_startup_problems(startup_result):
+    """
+    Returns the list of problems (in the same format as regressions)
+    if transform.py takes longer than the budget to start or imports
+    optional packages that it doesn't need yet.
+    """
+    problems = []
+    if startup_result['median_secs'] > startup_result['budget_secs']:
+        problems.append({'kind': 'startup',
+                         'name': startup_result['name'],
+                         'metric': 'median_secs',
+                         'baseline': startup_result['budget_secs'],
+                         'current': startup_result['median_secs']})
+    if startup_result['optional_packages_imported']:
+        problems.append({'kind': 'startup',
+                         'name': startup_result['name'],
+                         'metric': 'optional_packages_imported',
+                         'baseline': [],
+                         'current': startup_result['optional_packages_imported']})
+    return problems
+
+
+def run_micro_benchmark(transform_funcs_kls, micro_benchmark, df, repeats):
+    """
+    Applies the function to a copy of the dataframe 'repeats' times and
+    returns the measurements. Peak memory allocated by the function is
+    measured in one more run with tracemalloc (which slows it down).
+    REF: https://docs.python.org/3/library/tracemalloc.html
+    """
+    func = getattr(transform_funcs_kls, micro_benchmark.function_name)
+    wall_times = []
+    for _ in range(repeats):
+        df_copy = df.copy()
+        wall_start = time.perf_counter()
+        func(df_copy, *copy.deepcopy(micro_benchmark.args))
+        wall_times.append(time.perf_counter() - wall_start)
+
+    df_copy = df.copy()
+    tracemalloc.start()
+    func(df_copy, *copy.deepcopy(micro_benchmark.args))
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    median_time = statistics.median(wall_times)
+    return {
+        'name': micro_benchmark.function_name,
+        'rows': df.shape[0],
+        'repeats': repeats,
+        'median_secs': round(median_time, 6),
+        'min_secs': round(min(wall_times), 6),
+        'rows_per_sec': round(df.shape[0] / median_time, 1) if median_time else None,
+        'peak_memory_mb': round(peak_memory / (1024 * 1024), 3),
+    }
+
+
+def run_micro_benchmarks(micro_benchmarks, scale, repeats):
+    rows = _get_rows(MICRO_BENCHMARK_ROWS, scale)
+    df = make_micro_benchmark_dataframe(rows)
+    transform_funcs_kls = CommonCompHarmTransformFunctions()
+    results = []
+    for micro_benchmark in micro_benchmarks:
+        logger.info(f"Running micro-benchmark: {micro_benchmark.function_name}")
+        results.append(run_micro_benchmark(transform_funcs_kls, micro_benchmark, df, repeats))
+    return results
+
+
+def _is_regression(current_value, baseline_value, tolerance, min_diff):
+    if (current_value is None) or (baseline_value is None):
+        return False
+    return (current_value > baseline_value * (1 + tolerance)) \
+        and (current_value - baseline_value > min_diff)
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Returns the list of regressions (benchmark, metric, baseline and
+    current values) found by comparing the results with the baseline.
+    Benchmarks that aren't in the baseline are not compared.
+    """
+    metrics = {'startup': [('median_secs', MIN_TIME_DIFF_SECS)],
+               'end_to_end': [('wall_time_secs', MIN_TIME_DIFF_SECS),
+                              ('peak_rss_increase_mb', MIN_MEMORY_DIFF_MB)],
+               'micro': [('median_secs', MIN_TIME_DIFF_SECS),
+                         ('peak_memory_mb', MIN_MEMORY_DIFF_MB)]}
+    regressions = []
+    for kind, kind_metrics in metrics.items():
+        baseline_results = {r['name']: r for r in baseline.get(kind, [])}
+        for r in results.get(kind, []):
+            baseline_result = baseline_results.get(r['name'])
+            if baseline_result is None:
+                continue
+            for metric, min_diff in kind_metrics:
+                if _is_regression(r[metric], baseline_result[metric], tolerance, min_diff):
+                    regressions.append({'kind': kind,
+                                        'name': r['name'],
+                                        'metric': metric,
+                                        'baseline': baseline_result[metric],
+                                        'current': r[metric]})
+    return regressions
+
+
+def _format_table(field_names, rows):
+    rows = [field_names] + [['' if r[k] is None else str(r[k]) for k in field_names]
+                            for r in rows]
+    col_widths = [max(len(r[i]) for r in rows) for i in range(len(field_names))]
+    return '\n'.join(['  '.join(v.ljust(col_widths[i]) for i, v in enumerate(r))
+                      for r in rows])
+
+
+def log_results(results):
+    if results['startup']:
+        logger.info("Startup benchmark:\n" + _format_table(
+            ['name', 'median_secs', 'min_secs', 'budget_secs', 'optional_packages_imported'],
+            results['startup']))
+    if results['end_to_end']:
+        logger.info("End-to-end benchmarks:\n" + _format_table(
+            ['name', 'input_rows', 'rows_written', 'wall_time_secs', 'rows_per_sec',
+             'mb_per_sec', 'peak_rss_mb', 'peak_rss_increase_mb'],
+            results['end_to_end']))
+    if results['micro']:
+        logger.info("Micro-benchmarks:\n" + _format_table(
+            ['name', 'rows', 'median_secs', 'min_secs', 'rows_per_sec', 'peak_memory_mb'],
+            results['micro']))
+
+
+def write_results(results, results_file):
+    os.makedirs(os.path.dirname(os.path.abspath(results_file)), exist_ok=True)
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Benchmark results are written to: {results_file}")
+
+
+def _select_by_name(items, names, get_name, kind):
+    if names is None:
+        return items
+    if names == [NO_BENCHMARKS]:
+        return []
+    unknown_names = set(names) - set(get_name(i) for i in items)
+    if unknown_names:
+        sys.exit(f"Unknown {kind}: {sorted(unknown_names)}. "
+                 f"Choose from: {[get_name(i) for i in items]}")
+    return [i for i in items if get_name(i) in names]
+
+
+if __name__ == '__main__':
+    transform.set_logging_config()
+
+    parser = argparse.ArgumentParser(
+        description=DESC,
+        formatter_class=argparse.RawTextHelpFormatter,
+        usage=argparse.SUPPRESS)
+    parser.add_argument('-s', '--scenarios', required=False, type=str, nargs='+',
+                        help=S_FLAG_HELP_TEXT)
+    parser.add_argument('-mb', '--micro_benchmarks', required=False, type=str, nargs='+',
+                        help=MB_FLAG_HELP_TEXT)
+    parser.add_argument('-x', '--scale', required=False, type=float,
+                        default=DEFAULT_SCALE, help=X_FLAG_HELP_TEXT)
+    parser.add_argument('-n', '--repeats', required=False, type=int,
+                        default=DEFAULT_MICRO_BENCHMARK_REPEATS, help=N_FLAG_HELP_TEXT)
+    parser.add_argument('-d', '--work_folder', required=False, type=str,
+                        default=DEFAULT_WORK_FOLDER, help=D_FLAG_HELP_TEXT)
+    parser.add_argument('-b', '--baseline', required=False, type=str,
+                        help=B_FLAG_HELP_TEXT)
+    parser.add_argument('-sb', '--save_baseline', required=False, action='store_true',
+                        help=SB_FLAG_HELP_TEXT)
+    parser.add_argument('-ss', '--skip_startup', required=False, action='store_true',
+                        help=SS_FLAG_HELP_TEXT)
+    parser.add_argument('-t', '--tolerance', required=False, type=float,
+                        default=DEFAULT_REGRESSION_TOLERANCE, help=T_FLAG_HELP_TEXT)
+    args = parser.parse_args()
+
+    scenarios = _select_by_name(SCENARIOS, args.scenarios,
+                                lambda s: s.name, 'scenarios')
+    micro_benchmarks = _select_by_name(MICRO_BENCHMARKS, args.micro_benchmarks,
+                                       lambda m: m.function_name, 'micro-benchmarks')
+
+    results = {
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'scale': args.scale,
+        'python_version': platform.python_version(),
+        'pandas_version': pd.__version__,
+        'machine': platform.platform(),
+        'startup': [] if args.skip_startup else [run_startup_benchmark(args.repeats)],
+        'end_to_end': run_scenarios(scenarios, args.scale, args.work_folder),
+        'micro': run_micro_benchmarks(micro_benchmarks, args.scale, args.repeats),
+    }
+    log_results(results)
+
+    # Startup budget is checked regardless of the baseline
+    startup_problems = [p for r in results['startup'] for p in find_startup_problems(r)]
+    if startup_problems:
+        sys.exit(f"transform.py doesn't start as fast as it should:\n"
+                 + _format_table(['kind', 'name', 'metric', 'baseline', 'current'],
+                                 startup_problems))
+
+    baseline_file = args.baseline or os.path.join(args.work_folder, BASELINE_FILE_NAME)
+    if args.save_baseline:
+        write_results(results, baseline_file)
+        sys.exit(0)
+
+    write_results(results, os.path.join(
+        args.work_folder,
+        f"{RESULTS_FILE_NAME_PREFIX}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"))
+
+    if not os.path.exists(baseline_file):
+        logger.info(f"No baseline to compare with: {baseline_file} (use '-sb' flag to save one).")
+        sys.exit(0)
+
+    baseline = transform_utils.load_config(baseline_file)
+    if baseline.get('scale') != args.scale:
+        sys.exit(f"The baseline was recorded with scale {baseline.get('scale')}, "
+                 f"not {args.scale}, so the results can't be compared.")
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        sys.exit(f"{len(regressions)} regression(s) found (compared with the "
+                 f"baseline: {baseline_file}):\n"
+                 + _format_table(['kind', 'name', 'metric', 'baseline', 'current'], regressions))
+    logger.info(f"No regression found (compared with the baseline: {baseline_file}).")
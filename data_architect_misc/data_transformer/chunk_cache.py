@@ -0,0 +1,179 @@
+"""
+On-disk cache of dataframes (chunks) after each step of
+'functions_to_apply', which helps when we re-run transform.py
+many times while changing only the last few steps in the config.
+
+Each cached dataframe is keyed by the hash of:
+- the content of the input file and the config (without
+  'functions_to_apply'), which decide how the file is read,
+- the index of the chunk in the input file, and
+- the steps applied so far (i.e. the prefix of 'functions_to_apply')
+  along with the transform functions and data writer modules
+  (and the modules of their parent classes).
+
+On the next run, each chunk resumes from the longest prefix of
+steps that is cached. If every chunk of the input file is cached,
+the input file is not even read.
+
+When the cache gets bigger than its maximum size, least recently
+used dataframes are deleted first.
+
+Note: Steps that are skipped because their results are cached are
+not run again, so do NOT use the cache if any of the functions has
+side effects that the later steps depend on (e.g., a function that
+sets a value in the transform functions class for later functions).
+"""
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+
+from constants.transform_constants import KEY_FUNCTIONS_TO_APPLY, KEY_CURRENT_INPUT_FILE
+from run_manifest import get_file_hash, get_transform_modules_hash
+
+CACHED_DATAFRAME_FILE_EXTENSION = '.pkl'
+CHUNK_COUNT_FILE_EXTENSION = '.json'
+
+
+def _get_hash(*values):
+    return hashlib.sha256(json.dumps(values, sort_keys=True,
+                                     default=str).encode('utf-8')).hexdigest()
+
+
+class ChunkCache:
+    """
+    Stores and loads dataframes to and from the cache folder.
+    Can be used from several processes at a time.
+    """
+
+    def __init__(self, cache_folder, max_size_mb):
+        self.logger = logging.getLogger(__name__)
+        self.cache_folder = cache_folder
+        self.max_size_in_bytes = max_size_mb * 1024 * 1024
+        if not os.path.exists(self.cache_folder):
+            os.makedirs(self.cache_folder, exist_ok=True)
+
+    def get_input_file_key(self, input_file, config):
+        """
+        Returns the key of the input file, which changes if the content
+        of the file or how it is read (i.e. config other than the
+        functions to apply) changes.
+        """
+        config_to_hash = {k: v for k, v in config.items()
+                          if k not in [KEY_FUNCTIONS_TO_APPLY, KEY_CURRENT_INPUT_FILE]}
+        return _get_hash(get_file_hash(input_file), config_to_hash)
+
+    def get_step_prefix_keys(self, config):
+        """
+        Returns the keys of all the prefixes of 'functions_to_apply',
+        i.e. [key of no steps applied, key of the first step applied,
+        key of the first two steps applied, ...].
+        """
+        modules_hash = get_transform_modules_hash(config)
+        functions_to_apply = config[KEY_FUNCTIONS_TO_APPLY]
+        return [_get_hash(modules_hash, functions_to_apply[:i])
+                for i in range(len(functions_to_apply) + 1)]
+
+    def _get_file_path(self, key, file_extension):
+        return os.path.join(self.cache_folder, f"{key}{file_extension}")
+
+    def _get_dataframe_file_path(self, input_file_key, chunk_idx, step_prefix_key):
+        return self._get_file_path(_get_hash(input_file_key, chunk_idx, step_prefix_key),
+                                   CACHED_DATAFRAME_FILE_EXTENSION)
+
+    def get_chunk_count(self, input_file_key):
+        """
+        Returns the number of chunks in the input file if
+        we have read the whole file before. Otherwise, None.
+        """
+        chunk_count_file = self._get_file_path(input_file_key, CHUNK_COUNT_FILE_EXTENSION)
+        try:
+            with open(chunk_count_file, 'r', encoding='utf-8') as f:
+                return json.load(f)['chunk_count']
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def set_chunk_count(self, input_file_key, chunk_count):
+        chunk_count_file = self._get_file_path(input_file_key, CHUNK_COUNT_FILE_EXTENSION)
+        with open(chunk_count_file, 'w', encoding='utf-8') as f:
+            json.dump({'chunk_count': chunk_count}, f)
+
+    def _get_longest_cached_step_count(self, input_file_key, chunk_idx, step_prefix_keys):
+        """
+        Returns the number of steps in the longest prefix of steps
+        cached for the chunk or None if nothing is cached.
+        """
+        for step_count in range(len(step_prefix_keys) - 1, -1, -1):
+            if os.path.isfile(self._get_dataframe_file_path(
+                    input_file_key, chunk_idx, step_prefix_keys[step_count])):
+                return step_count
+        return None
+
+    def load_longest_cached_prefix(self, input_file_key, chunk_idx, step_prefix_keys):
+        """
+        Returns the number of steps already applied and the dataframe
+        of the longest prefix of steps cached for the chunk, or
+        (0, None) if nothing is cached (or the cached file is gone).
+        """
+        step_count = self._get_longest_cached_step_count(input_file_key, chunk_idx,
+                                                         step_prefix_keys)
+        if step_count is None:
+            return 0, None
+
+        df_file = self._get_dataframe_file_path(input_file_key, chunk_idx,
+                                                step_prefix_keys[step_count])
+        try:
+            df = pd.read_pickle(df_file)
+            # Update modified time to mark it as recently used
+            os.utime(df_file)
+        except (FileNotFoundError, EOFError):
+            # Another process may have deleted it in the meantime
+            return 0, None
+
+        return step_count, df
+
+    def is_every_chunk_cached(self, input_file_key, step_prefix_keys):
+        """
+        Returns True if we know how many chunks the input file has
+        and at least one prefix of steps is cached for every chunk,
+        in which case we don't need to read the input file.
+        """
+        chunk_count = self.get_chunk_count(input_file_key)
+        return (chunk_count is not None) and all(
+            self._get_longest_cached_step_count(input_file_key, i, step_prefix_keys) is not None
+            for i in range(chunk_count))
+
+    def store(self, input_file_key, chunk_idx, step_prefix_key, df):
+        """Stores the dataframe and deletes old ones if the cache is full."""
+        df_file = self._get_dataframe_file_path(input_file_key, chunk_idx, step_prefix_key)
+        # Write to a temporary file first, so that other processes
+        # never read a dataframe that is only partially written.
+        tmp_file = f"{df_file}.{os.getpid()}.tmp"
+        # Polars dataframes are picklable, too
+        pd.to_pickle(df, tmp_file)
+        os.replace(tmp_file, df_file)
+        self._delete_least_recently_used_files()
+
+    def _delete_least_recently_used_files(self):
+        cached_files = []
+        total_size = 0
+        for entry in os.scandir(self.cache_folder):
+            if entry.name.endswith(CACHED_DATAFRAME_FILE_EXTENSION):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                cached_files.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        for _, size, path in sorted(cached_files):
+            if total_size <= self.max_size_in_bytes:
+                break
+            try:
+                os.remove(path)
+                self.logger.info(f"Deleted least recently used file from the cache: {path}")
+            except FileNotFoundError:
+                pass
+            total_size -= size
@@ -0,0 +1,153 @@
+"""
+Helpers to overlap reading, transforming and writing of
+dataframes (chunks) in transform.py. Reading happens in
+one background thread and writing in another, while the
+transform functions are applied in the main thread. So,
+a chunk can be written while the next one is transformed
+and the one after that is read.
+
+Queues between the threads are bounded so that neither the
+reader nor the transform functions can run too far ahead of
+the next stage, which keeps the number of chunks held in
+memory at any time capped.
+"""
+import queue
+import threading
+
+from dataframe_backends import is_empty
+
+# Seconds to wait on a full/empty queue before checking
+# again if the other side of the pipeline has stopped.
+QUEUE_WAIT_TIMEOUT = 1
+
+_END_OF_DATA = object()
+
+
+class _ErrorInThread:
+    """Wraps an exception raised in a background thread."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _put_until_stopped(q, item, stop_event):
+    """
+    Puts item in the queue, but gives up if stop_event is set
+    (i.e. the consumer is no longer taking items from the queue).
+    Returns False if we gave up.
+    """
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=QUEUE_WAIT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def read_dataframes_in_background(read_next_dataframe, queue_size):
+    """
+    Generator that yields dataframes returned by read_next_dataframe
+    function (e.g., data reader's read_next_dataframe method) until
+    it returns an empty dataframe. Reading is done in a background
+    thread, which reads at most 'queue_size' dataframes ahead of the
+    ones yielded.
+
+    Errors raised in the reader thread are re-raised here, including
+    the ones that are not Exception (e.g., KeyboardInterrupt and
+    SystemExit), without which we would wait forever for the end of
+    the data that the reader thread never puts in the queue.
+    """
+    q = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+
+    def read_dataframes():
+        try:
+            df = read_next_dataframe()
+            while not is_empty(df):
+                if not _put_until_stopped(q, df, stop_event):
+                    return
+                df = read_next_dataframe()
+            _put_until_stopped(q, _END_OF_DATA, stop_event)
+        except BaseException as e:
+            _put_until_stopped(q, _ErrorInThread(e), stop_event)
+
+    reader_thread = threading.Thread(target=read_dataframes,
+                                     name='chunk_reader',
+                                     daemon=True)
+    reader_thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _END_OF_DATA:
+                break
+            elif isinstance(item, _ErrorInThread):
+                raise item.error
+            yield item
+    finally:
+        # If the consumer stops early (e.g., transform function
+        # raised an error), let the reader thread finish, too.
+        stop_event.set()
+        reader_thread.join()
+
+
+class BackgroundWriter:
+    """
+    Runs write function calls (e.g., data writer's write_data method)
+    one after another, in the order they are submitted, in a
+    background thread. At most 'queue_size' calls can wait in the
+    queue; submitting more blocks until the writer catches up.
+
+    Errors raised in the writer thread (including the ones that are
+    not Exception, e.g., KeyboardInterrupt) are re-raised on the next
+    submit or close call.
+    """
+
+    def __init__(self, queue_size):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.error = None
+        self.writer_thread = threading.Thread(target=self._run_write_functions,
+                                              name='chunk_writer',
+                                              daemon=True)
+        self.writer_thread.start()
+
+    def _run_write_functions(self):
+        while True:
+            item = self.queue.get()
+            if (item is _END_OF_DATA) or self.stop_event.is_set():
+                return
+
+            func, args = item
+            try:
+                func(*args)
+            except BaseException as e:
+                self.error = e
+                # Nothing else should be written after a failed write
+                self.stop_event.set()
+                return
+
+    def _raise_error_from_writer_thread(self):
+        if self.error is not None:
+            raise self.error
+
+    def submit(self, func, *args):
+        """Queues func(*args) to be run in the writer thread."""
+        self._raise_error_from_writer_thread()
+        if not _put_until_stopped(self.queue, (func, args), self.stop_event):
+            self._raise_error_from_writer_thread()
+
+    def close(self):
+        """Waits for all queued writes to finish."""
+        _put_until_stopped(self.queue, _END_OF_DATA, self.stop_event)
+        self.writer_thread.join()
+        self._raise_error_from_writer_thread()
+
+    def abort(self):
+        """Stops the writer thread without waiting for queued writes."""
+        self.stop_event.set()
+        # Unblock the writer thread if it is waiting on an empty queue
+        try:
+            self.queue.put_nowait(_END_OF_DATA)
+        except queue.Full:
+            pass
@@ -13,13 +13,25 @@ Last Modified: May 9, 2020
 import os
 
 from data_readers.pandas_file_data_reader import PandasFileDataReader
-from data_readers.pandas_excel_data_reader import PandasExcelDataReader
 from data_readers.pandas_csv_data_reader import PandasCSVDataReader
+from data_readers.pandas_zip_data_reader import PandasZipDataReader
+from data_readers.pandas_parallel_csv_data_reader import PandasParallelCSVDataReader
 from data_writers.file_data_writer import FileDataWriter
 from data_writers.excel_data_writer import ExcelDataWriter
 from data_writers.csv_data_writer import CSVDataWriter
 from data_writers.mssql_data_writer import MSSQLDataWriter
 
+# Modules of the readers and writers below are imported only when
+# they are used (see FileDataReader.get_data_reader), because they
+# need optional packages (pyxlsb and xlrd for Excel files and
+# pyarrow for Parquet and Feather files). So, their keys are
+# repeated here and must be the same as the ones in their classes.
+KEY_SHEET_NAME = 'input_sheet_name'  # PandasExcelDataReader.KEY_SHEET_NAME
+KEY_SHEET_NAME_COLUMN = 'sheet_name_column'  # PandasMultiSheetExcelDataReader.KEY_SHEET_NAME_COLUMN
+# Both Parquet and Feather writers use the same key for compression
+KEY_OUTPUT_COMPRESSION = 'output_compression'  # ParquetDataWriter/FeatherDataWriter.KEY_OUTPUT_COMPRESSION
+KEY_OUTPUT_ROW_GROUP_SIZE = 'output_row_group_size'  # ParquetDataWriter.KEY_OUTPUT_ROW_GROUP_SIZE
+
 # transform.py and transform_utils.py will allow
 # processing of more than one input files. Then we feed
 # the combined folder+file name to data reader modules.
@@ -33,10 +45,43 @@ DEFAULT_DATA_WRITER_MODULE_FILE = os.path.join(os.getcwd(),
                                                'data_writers',
                                                'csv_data_writer.py')
 
+# If greater than 0, transform.py reads and writes dataframes
+# in background threads while transform functions are applied,
+# and at most this many dataframes can wait to be transformed
+# (and written) at a time. 0 means read, transform and write
+# one after another.
+KEY_CHUNK_QUEUE_SIZE = 'chunk_queue_size'
+DEFAULT_CHUNK_QUEUE_SIZE = 0
+
+# Maximum size of the chunk cache folder (used only if transform.py
+# is run with '-cc' flag). When the cached dataframes take up more
+# space than this, the least recently used ones are deleted.
+KEY_CHUNK_CACHE_MAX_SIZE_MB = 'chunk_cache_max_size_mb'
+DEFAULT_CHUNK_CACHE_MAX_SIZE_MB = 1024
+
+# If True, consecutive column-wise steps in 'functions_to_apply'
+# (see lazy_execution.py for which functions) are fused into one
+# step that is executed in a single pass over each chunk. Steps
+# that can't be fused are still executed one after another.
+KEY_LAZY_EXECUTION = 'lazy_execution'
+DEFAULT_LAZY_EXECUTION = False
+
+# Dataframe library used to read, transform and write the data:
+# 'pandas' or 'polars' (see dataframe_backends.py). With 'polars',
+# steps are not fused even if 'lazy_execution' is turned on.
+KEY_DATAFRAME_BACKEND = 'dataframe_backend'
+DEFAULT_DATAFRAME_BACKEND = 'pandas'
+
 KEY_CUSTOM_TRANSFORM_FUNCTIONS_FILE = 'custom_transform_functions_file'
 DEFAULT_COMMON_TRANSFORM_FUNCTIONS_FILE = os.path.join(os.getcwd(),
                                                        'transform_functions',
                                                        'common_transform_functions.py')
+# With Polars backend, these transform functions files are replaced
+# with the ones that have Polars implementations of their functions.
+POLARS_TRANSFORM_FUNCTIONS_FILES = {
+    'common_transform_functions.py': 'polars_common_transform_functions.py',
+    'common_comp_harm_transform_functions.py': 'polars_common_comp_harm_transform_functions.py'
+}
 KEY_FUNCTIONS_TO_APPLY = 'functions_to_apply'
 KEY_FUNC_NAME = 'function_name'
 KEY_FUNC_ARGS = 'function_args'
@@ -57,6 +102,10 @@ EXPECTED_CONFIG_VALUE_DATA_TYPES = {
     KEY_INPUT_FILE_NAME_OR_PATTERN: [str],
     KEY_WRITE_OUTPUT: [bool],
     KEY_DATA_WRITER_MODULE_FILE: [str],
+    KEY_CHUNK_QUEUE_SIZE: [int],
+    KEY_CHUNK_CACHE_MAX_SIZE_MB: [int, float],
+    KEY_LAZY_EXECUTION: [bool],
+    KEY_DATAFRAME_BACKEND: [str],
     KEY_CUSTOM_TRANSFORM_FUNCTIONS_FILE: [str],
     KEY_FUNCTIONS_TO_APPLY: [list],
 
@@ -66,10 +115,21 @@ EXPECTED_CONFIG_VALUE_DATA_TYPES = {
     PandasFileDataReader.KEY_HEADER: [int],
     PandasFileDataReader.KEY_SKIP_ROWS: [int],
     PandasFileDataReader.KEY_SKIP_FOOTER: [int],
-    PandasExcelDataReader.KEY_SHEET_NAME: [str, int, type(None)],
+    PandasFileDataReader.KEY_READ_IN_SINGLE_PASS: [bool],
+    PandasFileDataReader.KEY_COLUMN_DATA_TYPES: [dict],
+    PandasFileDataReader.KEY_CONVERT_LOW_CARDINALITY_COLUMNS_TO_CATEGORY: [bool],
+    PandasFileDataReader.KEY_MAX_UNIQUE_VALUE_RATIO_FOR_CATEGORY: [float, int],
+    PandasFileDataReader.KEY_INPUT_COLUMNS: [list],
+    PandasFileDataReader.KEY_INFER_INPUT_COLUMNS: [bool],
+    KEY_SHEET_NAME: [str, int, list, type(None)],
+    KEY_SHEET_NAME_COLUMN: [str],
     PandasCSVDataReader.KEY_INPUT_CSV_DELIMITER: [str],
     PandasCSVDataReader.KEY_INPUT_FILE_ENCODING: [str],
     PandasCSVDataReader.KEY_SKIP_BLANK_LINES: [bool],
+    PandasZipDataReader.KEY_ZIP_MEMBER_PATTERN: [str],
+    PandasZipDataReader.KEY_ZIP_MEMBER_NAME_COLUMN: [str, type(None)],
+    PandasParallelCSVDataReader.KEY_PARSE_WORKERS: [int],
+    PandasParallelCSVDataReader.KEY_PARSE_RANGE_SIZE_MB: [int, float],
 
     # Data writer modules' constants
     FileDataWriter.KEY_INCLUDE_INDEX_COLUMN_IN_OUTPUT_FILE: [bool],
@@ -82,6 +142,8 @@ EXPECTED_CONFIG_VALUE_DATA_TYPES = {
     MSSQLDataWriter.KEY_DATABASE_SCHEMA: [str],
     MSSQLDataWriter.KEY_OUTPUT_TABLE_NAME: [str],
     MSSQLDataWriter.KEY_INCLUDE_INDEX_COLUMN_IN_OUTPUT_FILE: [bool],
+    KEY_OUTPUT_COMPRESSION: [str, type(None)],
+    KEY_OUTPUT_ROW_GROUP_SIZE: [int],
 }
 
 # The lists below are not used; I decided to group them together
@@ -93,12 +155,25 @@ READER_CONSTANTS = [
     PandasFileDataReader.KEY_HEADER,
     PandasFileDataReader.KEY_SKIP_ROWS,
     PandasFileDataReader.KEY_SKIP_FOOTER,
+    PandasFileDataReader.KEY_READ_IN_SINGLE_PASS,
+    PandasFileDataReader.KEY_COLUMN_DATA_TYPES,
+    PandasFileDataReader.KEY_CONVERT_LOW_CARDINALITY_COLUMNS_TO_CATEGORY,
+    PandasFileDataReader.KEY_MAX_UNIQUE_VALUE_RATIO_FOR_CATEGORY,
+    PandasFileDataReader.KEY_INPUT_COLUMNS,
+    PandasFileDataReader.KEY_INFER_INPUT_COLUMNS,
 
-    PandasExcelDataReader.KEY_SHEET_NAME,
+    KEY_SHEET_NAME,
+    KEY_SHEET_NAME_COLUMN,
 
     PandasCSVDataReader.KEY_INPUT_CSV_DELIMITER,
     PandasCSVDataReader.KEY_INPUT_FILE_ENCODING,
-    PandasCSVDataReader.KEY_SKIP_BLANK_LINES
+    PandasCSVDataReader.KEY_SKIP_BLANK_LINES,
+
+    PandasZipDataReader.KEY_ZIP_MEMBER_PATTERN,
+    PandasZipDataReader.KEY_ZIP_MEMBER_NAME_COLUMN,
+
+    PandasParallelCSVDataReader.KEY_PARSE_WORKERS,
+    PandasParallelCSVDataReader.KEY_PARSE_RANGE_SIZE_MB
 ]
 
 WRITER_CONSTANTS = [
@@ -114,7 +189,10 @@ WRITER_CONSTANTS = [
 
     MSSQLDataWriter.KEY_DATABASE_SCHEMA,
     MSSQLDataWriter.KEY_OUTPUT_TABLE_NAME,
-    MSSQLDataWriter.KEY_INCLUDE_INDEX_COLUMN_IN_OUTPUT_FILE
+    MSSQLDataWriter.KEY_INCLUDE_INDEX_COLUMN_IN_OUTPUT_FILE,
+
+    KEY_OUTPUT_COMPRESSION,
+    KEY_OUTPUT_ROW_GROUP_SIZE
 ]
 
 # These constants below are used in transform.py
@@ -0,0 +1,85 @@
+"""
+Helpers to read compressed input files (.gz, .bz2, .zst and .zip)
+as streams, so that the readers don't have to extract them to disk
+first. Files are decompressed as the readers read them, so only the
+part of the file that is being parsed is held in memory.
+
+File type of a compressed file is decided by the extension before
+the compression extension (e.g., 'Spend_2020.csv.gz' is a CSV file).
+Compressed files without one (e.g., 'Spend_2020.gz') are treated as
+text (CSV) files. Each member of a zip file has its own name and
+extension (see PandasZipDataReader).
+
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import bz2
+import gzip
+import os
+import zipfile
+
+GZIP_FILE_EXTENSION = '.gz'
+BZIP2_FILE_EXTENSION = '.bz2'
+ZSTD_FILE_EXTENSION = '.zst'
+ZIP_FILE_EXTENSION = '.zip'
+COMPRESSED_FILE_EXTENSIONS = [GZIP_FILE_EXTENSION,
+                              BZIP2_FILE_EXTENSION,
+                              ZSTD_FILE_EXTENSION,
+                              ZIP_FILE_EXTENSION]
+
+
+def _get_file_extension(file_name):
+    return os.path.splitext(file_name)[1].lower()
+
+
+def is_compressed_file(file_name):
+    """Checks if the file is compressed *by checking its file extension*"""
+    return _get_file_extension(file_name) in COMPRESSED_FILE_EXTENSIONS
+
+
+def is_zip_file(file_name):
+    return _get_file_extension(file_name) == ZIP_FILE_EXTENSION
+
+
+def get_uncompressed_file_name(file_name):
+    """
+    Returns the file name without the compression extension,
+    e.g., 'Spend_2020.csv' for 'Spend_2020.csv.gz'.
+    """
+    if is_compressed_file(file_name):
+        return os.path.splitext(file_name)[0]
+    return file_name
+
+
+def list_zip_members(file_path_and_name):
+    """
+    Returns the names of the files in the zip file (in the order
+    they are stored) from its central directory, without reading
+    (or decompressing) their content.
+    """
+    with zipfile.ZipFile(file_path_and_name) as zip_file:
+        return [info.filename for info in zip_file.infolist() if not info.is_dir()]
+
+
+def open_binary_stream(file_path_and_name, zip_member=None):
+    """
+    Opens the (compressed) file and returns a stream of its
+    decompressed content in bytes. For zip files, zip_member
+    (name of the file in the zip file) must be provided.
+    """
+    file_extension = _get_file_extension(file_path_and_name)
+    if file_extension == GZIP_FILE_EXTENSION:
+        return gzip.open(file_path_and_name, 'rb')
+    elif file_extension == BZIP2_FILE_EXTENSION:
+        return bz2.open(file_path_and_name, 'rb')
+    elif file_extension == ZSTD_FILE_EXTENSION:
+        # zstandard is only needed to read .zst files
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(file_path_and_name, 'rb'),
+                                                          closefd=True)
+    elif file_extension == ZIP_FILE_EXTENSION:
+        with zipfile.ZipFile(file_path_and_name) as zip_file:
+            # zipfile keeps the file open until the member's
+            # stream is closed (even after closing zip_file).
+            return zip_file.open(zip_member)
+    return open(file_path_and_name, 'rb')
@@ -0,0 +1,304 @@
+"""
+Detects the encoding and the delimiter of a CSV (text) file by
+looking at only the first few KB of it, so that we can read files
+of different formats in the same folder with one config (i.e. by
+setting 'input_encoding' and/or 'input_delimiter' to 'auto').
+
+Encoding is detected in this order:
+1. Byte order mark (BOM) at the start of the file (e.g., UTF-16
+   files exported from Excel or the ones from Nielsen).
+2. UTF-16/UTF-32 without BOM, whose ASCII characters have null
+   bytes next to them.
+3. UTF-8, if the sample can be decoded as UTF-8.
+4. charset_normalizer's best guess, if it is installed.
+5. cp1252 (Windows' default for western languages), or latin-1
+   which can decode any bytes.
+
+Delimiter is the candidate that splits the sampled lines into the
+same number (more than one) of fields most consistently. Python's
+csv.Sniffer (which pandas uses with sep=None) often picks letters
+or spaces as delimiters, so we only score the delimiters we see
+in the raw data files.
+REF: https://docs.python.org/3/library/csv.html#csv.Sniffer
+
+Compressed files (and members of zip files) are sniffed from the
+start of their decompressed content.
+
+Results are cached by the file's path, size and modified time
+(fingerprint), so each file is sniffed only once per process even
+if we create more than one reader for it (e.g., for each config of
+the file). transform.py also saves them in the manifest folder
+(see set_sniffed_formats_folder), so that later runs and worker
+processes ('-w' flag) reuse them until the file changes.
+
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import codecs
+import collections
+import csv
+import io
+import json
+import logging
+import os
+
+from data_readers.compressed_files import open_binary_stream
+
+logger = logging.getLogger(__name__)
+
+# Value of 'input_encoding' and 'input_delimiter' in the config
+# which tells the readers to detect them from the file
+AUTO_DETECT = 'auto'
+
+# Bytes to read from the start of the file to detect the format
+SNIFF_SIZE_IN_BYTES = 64 * 1024
+# Lines (from the start of the sample) to score the delimiters
+MAX_LINES_TO_SNIFF = 200
+DELIMITERS_TO_SNIFF = [',', '|', '\t', ';']
+DEFAULT_DELIMITER = ','
+DEFAULT_ENCODING = 'utf-8'
+FALLBACK_ENCODINGS = ['cp1252', 'latin-1']
+
+# Longest BOMs come first, because UTF-32 LE BOM starts with UTF-16 LE BOM
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# {(path, size, modified time, zip member): (encoding, delimiter)}
+_SNIFFED_FORMATS = {}
+
+# File in which the sniffed formats are saved across runs
+# (None if they are only cached in the process)
+SNIFFED_FORMATS_FILE_NAME = 'sniffed_csv_formats.json'
+_sniffed_formats_file = None
+
+
+def _get_file_fingerprint(file_path_and_name, zip_member=None):
+    stat = os.stat(file_path_and_name)
+    return os.path.abspath(file_path_and_name), stat.st_size, stat.st_mtime_ns, zip_member
+
+
+def set_sniffed_formats_folder(folder):
+    """
+    Saves the sniffed formats in the folder (e.g., the manifest
+    folder of transform.py) from now on, and reuses the ones saved
+    there before. If folder is None, they are only cached in the process.
+    """
+    global _sniffed_formats_file
+    _sniffed_formats_file = (None if folder is None
+                             else os.path.join(folder, SNIFFED_FORMATS_FILE_NAME))
+
+
+def _get_saved_format_key(fingerprint):
+    # Only the latest format of each file (or zip member) is saved
+    file_path_and_name, _, _, zip_member = fingerprint
+    return json.dumps([file_path_and_name, zip_member])
+
+
+def _load_saved_formats():
+    if (_sniffed_formats_file is None) or (not os.path.isfile(_sniffed_formats_file)):
+        return {}
+    try:
+        with open(_sniffed_formats_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        logger.warning(f"Could not load the sniffed formats, so the files "
+                       f"will be sniffed again: {_sniffed_formats_file}")
+        return {}
+
+
+def _get_saved_format(fingerprint):
+    """Returns (encoding, delimiter) saved for the fingerprint, or None."""
+    saved_format = _load_saved_formats().get(_get_saved_format_key(fingerprint))
+    if (saved_format is None) or (saved_format['fingerprint'] != list(fingerprint)):
+        return None
+    return saved_format['encoding'], saved_format['delimiter']
+
+
+def _save_format(fingerprint, encoding, delimiter):
+    """
+    Adds the format to the saved ones. The file is written to a
+    temporary file first and then replaces the saved one, so other
+    processes never read a half-written file (though the format
+    saved by one of two processes at the same time may be lost,
+    in which case the file is sniffed again in the next run).
+    """
+    if _sniffed_formats_file is None:
+        return
+
+    saved_formats = _load_saved_formats()
+    saved_formats[_get_saved_format_key(fingerprint)] = {'fingerprint': list(fingerprint),
+                                                         'encoding': encoding,
+                                                         'delimiter': delimiter}
+    os.makedirs(os.path.dirname(_sniffed_formats_file), exist_ok=True)
+    tmp_file = f"{_sniffed_formats_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(saved_formats, f, indent=2)
+    os.replace(tmp_file, _sniffed_formats_file)
+
+
+def _detect_utf16_or_utf32_without_bom(sample):
+    """
+    Text files in UTF-16/UTF-32 without BOM have null bytes around
+    (mostly ASCII) characters like delimiters and digits, which
+    files in single-byte encodings or UTF-8 almost never have.
+    """
+    sample = sample[:len(sample) // 4 * 4]
+    if not sample:
+        return None
+
+    # Ratio of null bytes at each of the 4 positions of every 4 bytes
+    null_ratios = [sample[i::4].count(0) / (len(sample) // 4) for i in range(4)]
+    is_null = [ratio > 0.8 for ratio in null_ratios]
+    is_not_null = [ratio < 0.2 for ratio in null_ratios]
+    if is_not_null[0] and is_null[1] and is_null[2] and is_null[3]:
+        return 'utf-32-le'
+    if is_null[0] and is_null[1] and is_null[2] and is_not_null[3]:
+        return 'utf-32-be'
+    if is_not_null[0] and is_null[1] and is_not_null[2] and is_null[3]:
+        return 'utf-16-le'
+    if is_null[0] and is_not_null[1] and is_null[2] and is_not_null[3]:
+        return 'utf-16-be'
+    return None
+
+
+def _can_decode(sample, encoding):
+    """
+    Checks if the sample can be decoded. Because the sample may end
+    in the middle of a multi-byte character, incomplete bytes at
+    the end of the sample are ignored.
+    """
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def _detect_charset(sample):
+    """Returns charset_normalizer's best guess (if it is installed)."""
+    try:
+        # charset_normalizer is optional; we fall back to
+        # FALLBACK_ENCODINGS if it is not installed.
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return None
+
+    best_match = from_bytes(sample).best()
+    return None if best_match is None else best_match.encoding
+
+
+def detect_encoding(sample):
+    """Returns the encoding of the sample (bytes) from the start of a file."""
+    for bom, encoding in BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+
+    encoding = _detect_utf16_or_utf32_without_bom(sample)
+    if encoding is not None:
+        return encoding
+
+    if _can_decode(sample, DEFAULT_ENCODING):
+        return DEFAULT_ENCODING
+
+    encoding = _detect_charset(sample)
+    if encoding is not None:
+        return encoding
+
+    for encoding in FALLBACK_ENCODINGS:
+        if _can_decode(sample, encoding):
+            return encoding
+
+
+def _get_lines_to_sniff(sample, encoding, is_whole_file):
+    """
+    Decodes the sample and returns its lines (except the last one,
+    which may be cut in the middle, unless the sample is the whole file).
+    """
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample, final=is_whole_file)
+    lines = text.splitlines()
+    if (not is_whole_file) and (len(lines) > 1):
+        lines = lines[:-1]
+    return [line for line in lines[:MAX_LINES_TO_SNIFF] if line.strip()]
+
+
+def detect_delimiter(lines):
+    """
+    Scores each delimiter by how many lines have the most common
+    number of fields (if it is more than one) when split by it.
+    Quoted delimiters are not counted, because we use csv.reader
+    to split the lines. Ties go to the delimiter listed first in
+    DELIMITERS_TO_SNIFF.
+    """
+    best_delimiter, best_score = None, (0, 0)
+    for delimiter in DELIMITERS_TO_SNIFF:
+        field_counts = collections.Counter(
+            len(fields) for fields in csv.reader(io.StringIO('\n'.join(lines)), delimiter=delimiter))
+        if not field_counts:
+            continue
+
+        field_count, line_count = field_counts.most_common(1)[0]
+        score = (line_count, field_count)
+        if (field_count > 1) and (score > best_score):
+            best_delimiter, best_score = delimiter, score
+
+    return best_delimiter or DEFAULT_DELIMITER
+
+
+def sniff_csv_format(file_path_and_name, zip_member=None):
+    """
+    Returns (encoding, delimiter) of the file (or the member of the
+    zip file), which are detected from the first SNIFF_SIZE_IN_BYTES
+    of the file only once for each version of the file (see module
+    docstring).
+    """
+    fingerprint = _get_file_fingerprint(file_path_and_name, zip_member)
+    if fingerprint in _SNIFFED_FORMATS:
+        return _SNIFFED_FORMATS[fingerprint]
+
+    saved_format = _get_saved_format(fingerprint)
+    if saved_format is not None:
+        _SNIFFED_FORMATS[fingerprint] = saved_format
+        return saved_format
+
+    with open_binary_stream(file_path_and_name, zip_member) as f:
+        # Decompressing streams may return fewer bytes than we ask for
+        sample = b''
+        for block in iter(lambda: f.read(SNIFF_SIZE_IN_BYTES - len(sample)), b''):
+            sample += block
+            if len(sample) >= SNIFF_SIZE_IN_BYTES:
+                break
+        is_whole_file = not f.read(1)
+
+    encoding = detect_encoding(sample)
+    delimiter = detect_delimiter(_get_lines_to_sniff(sample, encoding, is_whole_file))
+    logger.info(f"Detected encoding, '{encoding}', and delimiter, "
+                f"{repr(delimiter)}, of this file: {file_path_and_name}"
+                f"{'' if zip_member is None else f' (member: {zip_member})'}")
+
+    _SNIFFED_FORMATS[fingerprint] = (encoding, delimiter)
+    _save_format(fingerprint, encoding, delimiter)
+    return encoding, delimiter
+
+
+def resolve_csv_format(file_path_and_name, config, encoding_key, delimiter_key,
+                       zip_member=None):
+    """
+    Returns a copy of the config in which the encoding and delimiter
+    set to 'auto' are replaced with the ones detected from the file.
+    If neither is set to 'auto', the config is returned as is.
+    """
+    if AUTO_DETECT not in (config.get(encoding_key), config.get(delimiter_key)):
+        return config
+
+    encoding, delimiter = sniff_csv_format(file_path_and_name, zip_member)
+    config = config.copy()
+    if config.get(encoding_key) == AUTO_DETECT:
+        config[encoding_key] = encoding
+    if config.get(delimiter_key) == AUTO_DETECT:
+        config[delimiter_key] = delimiter
+    return config
@@ -4,8 +4,11 @@ Last Modified Date: April 14, 2020
 """
 import os
 
-from data_readers.pandas_excel_data_reader import PandasExcelDataReader
 from data_readers.pandas_csv_data_reader import PandasCSVDataReader
+from data_readers.pandas_parallel_csv_data_reader import PandasParallelCSVDataReader
+from data_readers.pandas_zip_data_reader import PandasZipDataReader
+from data_readers.compressed_files import is_compressed_file, is_zip_file, get_uncompressed_file_name
+from data_readers.csv_format_sniffer import resolve_csv_format
 
 
 def _extract_file_name(file_path_and_name):
@@ -29,39 +32,142 @@ class FileDataReader:
     which has the key-value pairs for other required
     parameters for different reader classes this
     factory class generates.
+
+    CSV files compressed as .gz, .bz2 or .zst (e.g.,
+    'Spend.csv.gz') are read by the CSV readers as they
+    are decompressed, and the CSV files in .zip files are
+    read one after another by PandasZipDataReader, so that
+    we don't have to extract them to disk first.
     """
     TXT_FILE_EXTENSION = '.txt'
     CSV_FILE_EXTENSION = '.csv'
     EXCEL_FILE_EXTENSION_OLD = '.xls'
     EXCEL_FILE_EXTENSION_NEW = '.xlsx'
+    # Macro-enabled and binary workbooks
+    EXCEL_FILE_EXTENSION_MACRO = '.xlsm'
+    EXCEL_FILE_EXTENSION_BINARY = '.xlsb'
+    PARQUET_FILE_EXTENSION = '.parquet'
+    # Feather v2 files are Arrow IPC files
+    ARROW_FILE_EXTENSIONS = ['.arrow', '.feather']
+
+    # Same as 'dataframe_backend' key and its values in transform_constants.py
+    KEY_DATAFRAME_BACKEND = 'dataframe_backend'
+    POLARS_DATAFRAME_BACKEND = 'polars'
+    # Polars can only read CSV files encoded in UTF-8
+    KEY_INPUT_FILE_ENCODING = 'input_encoding'
+    POLARS_CSV_ENCODINGS = ['utf-8', 'utf8']
 
     def __init__(self, input_file_path_and_name, config):
         self.input_file_path_and_name = input_file_path_and_name
         self.config = config
+        if self._is_csv(input_file_path_and_name):
+            # Replaces 'auto' encoding and delimiter (if any)
+            # with the ones detected from the file
+            self.config = resolve_csv_format(input_file_path_and_name,
+                                             config,
+                                             PandasCSVDataReader.KEY_INPUT_FILE_ENCODING,
+                                             PandasCSVDataReader.KEY_INPUT_CSV_DELIMITER)
 
     def get_data_reader(self):
         """
         Factory method that returns the fitting
         data reader object based on the type of
         input file.
+
+        Readers that need optional packages (Polars, pyarrow, and
+        pyxlsb and xlrd for Excel files) are imported only when they
+        are used, so that runs that don't need them don't have to
+        wait for them to be imported.
         """
-        if self._is_excel(self.input_file_path_and_name):
+        if self._use_polars(self.input_file_path_and_name):
+            from data_readers.polars_data_reader import PolarsDataReader
+            return PolarsDataReader(self.input_file_path_and_name,
+                                    self.config)
+        elif is_zip_file(self.input_file_path_and_name):
+            return PandasZipDataReader(self.input_file_path_and_name,
+                                       self.config)
+        elif self._is_excel(self.input_file_path_and_name):
+            if self._read_multiple_sheets():
+                from data_readers.pandas_multi_sheet_excel_data_reader import PandasMultiSheetExcelDataReader
+                return PandasMultiSheetExcelDataReader(self.input_file_path_and_name,
+                                                       self.config)
+            from data_readers.pandas_excel_data_reader import PandasExcelDataReader
             return PandasExcelDataReader(self.input_file_path_and_name,
                                          self.config)
         elif self._is_csv(self.input_file_path_and_name):
+            if PandasParallelCSVDataReader.can_parse_in_parallel(self.input_file_path_and_name,
+                                                                 self.config):
+                return PandasParallelCSVDataReader(self.input_file_path_and_name,
+                                                   self.config)
             return PandasCSVDataReader(self.input_file_path_and_name,
                                        self.config)
+        elif self._is_parquet_or_arrow(self.input_file_path_and_name):
+            from data_readers.pandas_arrow_data_reader import PandasArrowDataReader
+            return PandasArrowDataReader(self.input_file_path_and_name,
+                                         self.config)
 
     def _is_excel(self, file_name_with_path):
         """Checks if file is an Excel file *by checking its file extension*"""
         file_extension = _get_file_extension(
             _extract_file_name(file_name_with_path))
-        return ((self.EXCEL_FILE_EXTENSION_NEW == file_extension.lower()) or
-                (self.EXCEL_FILE_EXTENSION_OLD == file_extension.lower()))
+        return file_extension.lower() in [self.EXCEL_FILE_EXTENSION_NEW,
+                                          self.EXCEL_FILE_EXTENSION_OLD,
+                                          self.EXCEL_FILE_EXTENSION_MACRO,
+                                          self.EXCEL_FILE_EXTENSION_BINARY]
+
+    def _read_multiple_sheets(self):
+        """
+        Checks if the config asks for all the sheets, a list of
+        sheets or the sheets matching a glob pattern (instead of
+        just one sheet) to be read from the Excel file.
+        """
+        from data_readers.pandas_excel_data_reader import PandasExcelDataReader
+        from data_readers.pandas_multi_sheet_excel_data_reader import PandasMultiSheetExcelDataReader
+        return PandasMultiSheetExcelDataReader.is_multi_sheet_name(
+            self.config.get(PandasExcelDataReader.KEY_SHEET_NAME,
+                            PandasExcelDataReader.DEFAULT_SHEET_TO_READ))
 
     def _is_csv(self, file_name_with_path):
-        """Checks if file is a CSV file *by checking its file extension*"""
-        file_extension = _get_file_extension(
-            _extract_file_name(file_name_with_path))
+        """
+        Checks if file is a CSV file *by checking its file extension*
+        (the one before the compression extension, if the file is
+        compressed). Compressed files without one are read as CSV files.
+        """
+        file_name = _extract_file_name(file_name_with_path)
+        if is_zip_file(file_name):
+            # Zip files can have more than one CSV file in them
+            return False
+        if is_compressed_file(file_name):
+            file_name = get_uncompressed_file_name(file_name)
+            if not _get_file_extension(file_name):
+                return True
+
+        file_extension = _get_file_extension(file_name)
         return ((self.CSV_FILE_EXTENSION == file_extension.lower()) or
                 (self.TXT_FILE_EXTENSION == file_extension.lower()))
+
+    def _is_parquet_or_arrow(self, file_name_with_path):
+        """
+        Checks if file is a Parquet or an Arrow IPC (Feather)
+        file *by checking its file extension*
+        """
+        file_extension = _get_file_extension(
+            _extract_file_name(file_name_with_path))
+        return ((self.PARQUET_FILE_EXTENSION == file_extension.lower()) or
+                (file_extension.lower() in self.ARROW_FILE_EXTENSIONS))
+
+    def _use_polars(self, file_name_with_path):
+        """
+        Checks if the config asks for Polars dataframes and the file can
+        be read by Polars. Other files (e.g., Excel) are read by pandas
+        readers and their dataframes are converted when needed.
+        """
+        if self.config.get(self.KEY_DATAFRAME_BACKEND) != self.POLARS_DATAFRAME_BACKEND:
+            return False
+        if is_compressed_file(file_name_with_path):
+            # Polars can't read compressed files in batches
+            return False
+        if self._is_csv(file_name_with_path):
+            encoding = self.config.get(self.KEY_INPUT_FILE_ENCODING)
+            return (encoding is None) or (encoding.lower() in self.POLARS_CSV_ENCODINGS)
+        return self._is_parquet_or_arrow(file_name_with_path)
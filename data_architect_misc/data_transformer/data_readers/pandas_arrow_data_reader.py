@@ -0,0 +1,118 @@
+"""
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import logging
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    # pyarrow is only needed to read Parquet and Arrow/Feather
+    # files, so CSV and Excel files can still be read without it.
+    pyarrow = None
+
+from data_readers.pandas_file_data_reader import PandasFileDataReader
+
+
+class PandasArrowDataReader(PandasFileDataReader):
+    """
+    This class uses pyarrow to read Pandas dataframe from
+    a Parquet or an Arrow IPC (Feather v2) file, which are
+    typically written by ParquetDataWriter or FeatherDataWriter
+    in the previous step of a multi-step transform process.
+
+    Unlike CSV and Excel files, these files store column names
+    and data types along with the data, so 'header' and
+    'skiprows' parameters are ignored. Instead, we stream the
+    data 'rows_per_read' rows at a time (Parquet files are read
+    row group by row group) and only read the columns listed
+    in 'input_columns', if it is provided in the config.
+    REF: https://arrow.apache.org/docs/python/parquet.html#reading-parquet-and-memory-mapping
+    """
+    PARQUET_FILE_EXTENSION = '.parquet'
+
+    def __init__(self, input_file_path_and_name, config):
+        if pyarrow is None:
+            raise ImportError(f"pyarrow must be installed to read this "
+                              f"file: {input_file_path_and_name}")
+
+        super().__init__(config)
+        self.logger = logging.getLogger(__name__)
+        self.input_file = input_file_path_and_name
+        self.is_parquet = (os.path.splitext(self.input_file)[1].lower()
+                           == self.PARQUET_FILE_EXTENSION)
+
+        self.headers = self._select_input_columns(self.read_header_row())
+        # Number of times read_next_dataframe is called
+        self.read_iter_count = 0
+
+        # Number of rows read from the file so far
+        self.rows_read = 0
+        # Iterator of pyarrow's RecordBatch objects,
+        # which is created when we read the first dataframe.
+        self.batch_iterator = None
+
+    def read_header_row(self):
+        """Returns the column names stored in the file's schema."""
+        if self.is_parquet:
+            schema = pyarrow.parquet.read_schema(self.input_file)
+        else:
+            with pyarrow.ipc.open_file(pyarrow.memory_map(self.input_file)) as f:
+                schema = f.schema
+        return schema.names
+
+    def _iter_record_batches(self):
+        """
+        Yields the data in the file as pyarrow's RecordBatch
+        objects of at most 'rows_per_read' rows.
+
+        Parquet files are read row group by row group, so only
+        the row groups (and the columns) that we need for the
+        current batch are decompressed. Arrow IPC files are
+        memory-mapped, so the batches are read without copying
+        the data until they are converted to dataframes.
+        REF: https://arrow.apache.org/docs/python/generated/pyarrow.parquet.ParquetFile.html#pyarrow.parquet.ParquetFile.iter_batches
+        """
+        if self.is_parquet:
+            parquet_file = pyarrow.parquet.ParquetFile(self.input_file,
+                                                       memory_map=True)
+            columns = None if self.input_column_indexes is None else self.headers
+            yield from parquet_file.iter_batches(batch_size=self.rows_per_read,
+                                                 columns=columns)
+        else:
+            with pyarrow.ipc.open_file(pyarrow.memory_map(self.input_file)) as f:
+                for i in range(f.num_record_batches):
+                    batch = f.get_batch(i)
+                    if self.input_column_indexes is not None:
+                        batch = batch.select(self.input_column_indexes)
+                    # Writers may have written batches that are bigger
+                    # than 'rows_per_read', so we slice them up.
+                    for offset in range(0, batch.num_rows, self.rows_per_read):
+                        yield batch.slice(offset, self.rows_per_read)
+
+    def _read_dataframe(self,
+                        row_idx_to_start_reading,
+                        rows_to_read,
+                        verbose=True):
+        if self.batch_iterator is None:
+            self.batch_iterator = self._iter_record_batches()
+
+        batch = next(self.batch_iterator, None)
+        if batch is None:
+            # Nothing more to read, thus returns an empty data frame
+            return pd.DataFrame(columns=self.headers)
+
+        df = batch.to_pandas()
+        if verbose:
+            self.logger.info(
+                f"Reading data between row range: {self.rows_read+1} "
+                f"=> {self.rows_read+df.shape[0]}\n"
+                f"from this file: {self.input_file}")
+
+        self.rows_read += df.shape[0]
+        return df
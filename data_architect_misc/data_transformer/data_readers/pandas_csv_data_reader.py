@@ -2,26 +2,53 @@
 Author: Phyo Thiha
 Last Modified Date: May 06, 2020
 """
+import contextlib
 import logging
 
 import pandas as pd
-from pandas.errors import EmptyDataError
+from pandas.errors import EmptyDataError, ParserError
 
+from data_readers.compressed_files import is_compressed_file, is_zip_file, open_binary_stream
 from data_readers.pandas_file_data_reader import PandasFileDataReader
 
 
+class CSVChunkParsingError(Exception):
+    """
+    Raise this if pandas cannot parse a chunk of the file
+    while we read it in a single pass. For example, pandas'
+    C parser fails on a chunk that starts with a blank line
+    (when 'skip_blank_lines' is False) followed by data rows,
+    which the old skiprows/nrows approach silently treated as
+    the end of the file (and dropped the rows after it).
+    """
+
+    def __init__(self, error_msg):
+        super().__init__(error_msg)
+
+
 class PandasCSVDataReader(PandasFileDataReader):
     """
     This class uses Pandas read_csv to read Pandas dataframe
     from a CSV file. It supports some most commonly-used
     parameters of read_csv which are defined as class
     CONSTANTS below.
+
+    Compressed files (.gz, .bz2 and .zst) are decompressed as they
+    are read, from the streams we open for pandas (see
+    compressed_files.py), because pandas can't infer every compression
+    (e.g., zstd) from the file extension before version 1.4. Zip files
+    are read by PandasZipDataReader (see FileDataReader.get_data_reader),
+    which gives the name of each file in the zip file to this class
+    as zip_member, so pandas never decompresses a zip file itself.
     """
     # Note: we tested and found that pandas' csv sniffer
     # isn't very good (even when using 'Python' as parser engine)
     # in detecting delimiters, so setting the default input csv
     # delimiter to None is not good enough. So, we settled on
-    # the default as 'comma'.
+    # the default as 'comma'. Set this to 'auto' to detect
+    # the delimiter from the first few KB of each file (see
+    # csv_format_sniffer.py), which scores only the delimiters
+    # we see in raw data files (comma, pipe, tab and semicolon).
     KEY_INPUT_CSV_DELIMITER = 'input_delimiter'
     DEFAULT_INPUT_CSV_DELIMITER = ','
 
@@ -30,6 +57,9 @@ class PandasCSVDataReader(PandasFileDataReader):
     # in Pandas's read_csv method
     # For full list of encoding available in Pandas/Python
     # REF: https://docs.python.org/3/library/codecs.html#standard-encodings
+    # Set this to 'auto' to detect the encoding (e.g., UTF-16
+    # files with or without BOM) from the first few KB of each
+    # file (see csv_format_sniffer.py).
     KEY_INPUT_FILE_ENCODING = 'input_encoding'
     DEFAULT_INPUT_FILE_ENCODING = None
 
@@ -45,10 +75,11 @@ class PandasCSVDataReader(PandasFileDataReader):
     ESCAPE_CHARACTER_CSV = 'escape_character'
     DEFAULT_ESCAPE_CHARACTER_CSV = None
 
-    def __init__(self, input_file_path_and_name, config):
+    def __init__(self, input_file_path_and_name, config, zip_member=None):
         super().__init__(config)
         self.logger = logging.getLogger(__name__)
         self.input_file = input_file_path_and_name
+        self.zip_member = zip_member
         self.delimiter = config.get(self.KEY_INPUT_CSV_DELIMITER,
                                     self.DEFAULT_INPUT_CSV_DELIMITER)
         # I'm aware that dict.get() returns None if key doesn't exist
@@ -62,10 +93,47 @@ class PandasCSVDataReader(PandasFileDataReader):
                                            self.DEFAULT_QUOTING_BEHAVIOR_CSV)
         self.escape_char = config.get(self.ESCAPE_CHARACTER_CSV,
                                            self.DEFAULT_ESCAPE_CHARACTER_CSV)
-        self.headers = self.read_header_row()
+        self.headers = self._select_input_columns(self.read_header_row())
         # Number of times read_next_dataframe is called
         self.read_iter_count = 0
 
+        # Used only if we read the file in a single pass.
+        # This is pandas' TextFileReader which keeps the file
+        # open (and its position) between the reads.
+        self.chunk_iterator = None
+        # Stream of the compressed file (or zip member)
+        # that chunk_iterator reads from
+        self.input_stream = None
+        # Data rows to skip (on top of 'skiprows') when we
+        # open the file to read in a single pass.
+        self.data_rows_to_skip = 0
+
+    def _get_file_name_for_log(self):
+        if self.zip_member is None:
+            return self.input_file
+        return f"{self.input_file} (member: {self.zip_member})"
+
+    def _is_read_from_stream(self):
+        """
+        Checks if we decompress the file (or the zip member) for pandas
+        instead of giving pandas the path of the file.
+        """
+        return ((self.zip_member is not None)
+                or (is_compressed_file(self.input_file) and not is_zip_file(self.input_file)))
+
+    @contextlib.contextmanager
+    def _open_input_file(self):
+        """
+        Gives pandas the path of the input file, or the stream of the
+        compressed file or zip member (which is closed once pandas is
+        done reading it).
+        """
+        if not self._is_read_from_stream():
+            yield self.input_file
+        else:
+            with open_binary_stream(self.input_file, self.zip_member) as f:
+                yield f
+
     def read_header_row(self):
         """
         Reads the row which has column headers
@@ -77,42 +145,143 @@ class PandasCSVDataReader(PandasFileDataReader):
         this will return [0, 1, 2, ...] basically
         list of integers as column headers.
         """
-        return pd.read_csv(
-            self.input_file,
-            keep_default_na=self.keep_default_na,
-            skip_blank_lines=self.skip_blank_lines,
-            header=self.header_row_index,
-            encoding=self.encoding,
-            delimiter=self.delimiter,
-            quoting=self.quoting,
-            escapechar=self.escape_char,
-            nrows=0
-        ).columns.to_list()
+        with self._open_input_file() as input_file:
+            return pd.read_csv(
+                input_file,
+                keep_default_na=self.keep_default_na,
+                skip_blank_lines=self.skip_blank_lines,
+                header=self.header_row_index,
+                encoding=self.encoding,
+                delimiter=self.delimiter,
+                quoting=self.quoting,
+                escapechar=self.escape_char,
+                nrows=0
+            ).columns.to_list()
 
-    def _read_dataframe(self,
-                        row_idx_to_start_reading,
-                        rows_to_read,
-                        verbose=True):
-        try:
-            df = pd.read_csv(
-                self.input_file,
+    def _get_chunk_iterator(self):
+        """
+        Opens the input file once and returns pandas' TextFileReader
+        which yields dataframes of 'rows_per_read' rows each time
+        it is iterated. Because the reader keeps its position in the
+        file, every row is tokenized exactly once no matter how many
+        chunks the file has (as opposed to skiprows/nrows approach,
+        which re-parses the file from the top for each chunk).
+        REF: https://pandas.pydata.org/pandas-docs/stable/user_guide/io.html#iterating-through-files-chunk-by-chunk
+        """
+        if self.chunk_iterator is None:
+            input_file = self.input_file
+            if self._is_read_from_stream():
+                # Stays open until we finish reading the file
+                self.input_stream = open_binary_stream(self.input_file, self.zip_member)
+                input_file = self.input_stream
+            self.chunk_iterator = pd.read_csv(
+                input_file,
                 keep_default_na=self.keep_default_na,
                 skip_blank_lines=self.skip_blank_lines,
                 header=None,
                 encoding=self.encoding,
                 delimiter=self.delimiter,
-                skiprows=row_idx_to_start_reading,
+                skiprows=self.skip_rows + self.data_rows_to_skip,
                 quoting=self.quoting,
                 escapechar=self.escape_char,
-                nrows=rows_to_read
+                usecols=self.input_column_indexes,
+                chunksize=self.rows_per_read
             )
+        return self.chunk_iterator
+
+    def _close_chunk_iterator(self):
+        if self.chunk_iterator is not None:
+            self.chunk_iterator.close()
+        if self.input_stream is not None:
+            self.input_stream.close()
+
+    def _read_next_chunk(self, row_idx_to_start_reading):
+        """
+        Returns the next chunk from the open file or an empty
+        dataframe (and closes the file) if there is nothing
+        more to read.
+        """
+        try:
+            # Index is reset so that every chunk is indexed
+            # from 0 like the ones read with skiprows/nrows.
+            return next(self._get_chunk_iterator()).reset_index(drop=True)
+        except (StopIteration, EmptyDataError):
+            self._close_chunk_iterator()
+            return pd.DataFrame()
+        except ParserError as e:
+            self._close_chunk_iterator()
+            raise CSVChunkParsingError(
+                f"Could not parse the rows starting from row "
+                f"{row_idx_to_start_reading+1} of this file: "
+                f"{self._get_file_name_for_log()}\n{e}\nIf the rows "
+                f"start with a blank line, please set "
+                f"'{self.KEY_SKIP_BLANK_LINES}' to true (or "
+                f"'{self.KEY_READ_IN_SINGLE_PASS}' to false) in the config.") from e
+
+    def skip_dataframes(self, dataframe_count):
+        """
+        If we haven't started reading and there is no footer to
+        drop, we skip the rows of the dataframes when we open the
+        file, which is a lot faster than reading and discarding
+        them. Otherwise, see the parent class' method.
+        """
+        if (self.chunk_iterator is not None) or (self.skip_footer > 0):
+            return super().skip_dataframes(dataframe_count)
+
+        # Rows are counted from 'read_iter_count' when we read
+        # with skiprows/nrows, and they are skipped when the
+        # file is opened if we read in a single pass.
+        self.read_iter_count += dataframe_count
+        if self.read_in_single_pass:
+            self.data_rows_to_skip += dataframe_count * self.rows_per_read
+
+    def _read_dataframe_in_single_pass(self,
+                                       row_idx_to_start_reading,
+                                       rows_to_read,
+                                       verbose=True):
+        df = self._read_next_chunk(row_idx_to_start_reading)
+        if df.empty:
+            # Nothing more to read, thus returns an empty data frame
+            return pd.DataFrame(columns=self.headers)
+
+        df = self._assign_column_headers(df)
+        if verbose:
+            self.logger.info(
+                f"Reading data between row range: {row_idx_to_start_reading+1} "
+                f"=> {row_idx_to_start_reading+df.shape[0]}\n"
+                f"from this file: {self._get_file_name_for_log()}")
+        return df
+
+    def _read_dataframe(self,
+                        row_idx_to_start_reading,
+                        rows_to_read,
+                        verbose=True):
+        if self.read_in_single_pass:
+            return self._read_dataframe_in_single_pass(row_idx_to_start_reading,
+                                                       rows_to_read,
+                                                       verbose)
+        try:
+            with self._open_input_file() as input_file:
+                df = pd.read_csv(
+                    input_file,
+                    keep_default_na=self.keep_default_na,
+                    skip_blank_lines=self.skip_blank_lines,
+                    header=None,
+                    encoding=self.encoding,
+                    delimiter=self.delimiter,
+                    skiprows=row_idx_to_start_reading,
+                    quoting=self.quoting,
+                    escapechar=self.escape_char,
+                    usecols=self.input_column_indexes,
+                    nrows=rows_to_read
+                )
 
             df = self._assign_column_headers(df)
             if verbose:
                 self.logger.info(
                     f"Reading data between row range: {row_idx_to_start_reading+1} "
                     f"=> {row_idx_to_start_reading+rows_to_read}\n"
-                    f"from this file: {self.input_file}")
+                    f"from this file: {self._get_file_name_for_log()}")
         except EmptyDataError:
             # Nothing more to read, thus returns an empty data frame
             return pd.DataFrame(columns=self.headers)
@@ -2,30 +2,241 @@
 Author: Phyo Thiha
 Last Modified Date: May 05, 2020
 """
+import itertools
 import logging
+import os
 
+import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextParser
 
 from data_readers.pandas_file_data_reader import PandasFileDataReader
 
 
+def _convert_cell_value(value, error_codes):
+    """
+    Converts cell value returned by openpyxl (or pyxlsb and
+    xlrd) the same way pandas' read_excel does (i.e. empty
+    cells to empty strings, error cells like '#N/A' (one of
+    openpyxl's error_codes) to NaN and whole number floats
+    like 2019.0 to integers).
+    """
+    if value is None:
+        return ''
+    elif isinstance(value, str) and (value in error_codes):
+        return np.nan
+    elif isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _convert_row_values(row, error_codes=()):
+    """
+    Converts cell values in a row and trims the empty
+    cells at the end of the row like pandas' read_excel.
+    """
+    values = [_convert_cell_value(v, error_codes) for v in row]
+    while values and (values[-1] == ''):
+        values.pop()
+    return values
+
+
+class _OpenpyxlWorkbook:
+    """
+    .xlsx/.xlsm workbook opened in openpyxl's read-only mode,
+    which parses the sheet lazily as we iterate its rows.
+    REF: https://openpyxl.readthedocs.io/en/stable/optimized.html
+    """
+
+    def __init__(self, input_file):
+        # Imported here (not at the top) because openpyxl takes a
+        # while to import and transform_constants.py imports this
+        # module for every run, even if there is no Excel file to read.
+        from openpyxl import load_workbook
+        from openpyxl.cell.cell import ERROR_CODES
+
+        self.workbook = load_workbook(input_file, read_only=True, data_only=True)
+        # Error values of Excel cells (e.g., '#N/A')
+        self.error_codes = ERROR_CODES
+        self.sheet_names = self.workbook.sheetnames
+
+    def iter_rows(self, sheet_name, min_row_idx, max_row_idx=None):
+        if isinstance(sheet_name, int):
+            worksheet = self.workbook.worksheets[sheet_name]
+        else:
+            worksheet = self.workbook[sheet_name]
+
+        for row in worksheet.iter_rows(min_row=min_row_idx + 1,
+                                       max_row=None if max_row_idx is None else max_row_idx + 1,
+                                       values_only=True):
+            yield _convert_row_values(row, self.error_codes)
+
+    def close(self):
+        self.workbook.close()
+
+
+class _PyxlsbWorkbook:
+    """
+    .xlsb (binary) workbook opened with pyxlsb, which streams
+    the records of the sheet from the file as we iterate its rows.
+    Cells are converted the same way pandas' read_excel does with
+    engine='pyxlsb' (e.g., dates are left as numbers like in pandas).
+    REF: https://github.com/willtrnr/pyxlsb#usage
+    """
+
+    def __init__(self, input_file):
+        # pyxlsb is only needed to read .xlsb files
+        from pyxlsb import open_workbook
+
+        self.workbook = open_workbook(input_file)
+        self.sheet_names = self.workbook.sheets
+
+    def iter_rows(self, sheet_name, min_row_idx, max_row_idx=None):
+        # pyxlsb's sheet indexes start at 1
+        sheet_key = sheet_name + 1 if isinstance(sheet_name, int) else sheet_name
+        with self.workbook.get_sheet(sheet_key) as worksheet:
+            # With sparse=True, pyxlsb skips empty rows, which
+            # we fill in so that the row indexes match the sheet.
+            next_row_idx = min_row_idx
+            for row in worksheet.rows(sparse=True):
+                row_idx = row[0].r
+                if row_idx < min_row_idx:
+                    continue
+                if (max_row_idx is not None) and (row_idx > max_row_idx):
+                    break
+
+                for _ in range(next_row_idx, row_idx):
+                    yield []
+                yield _convert_row_values([cell.v for cell in row])
+                next_row_idx = row_idx + 1
+
+    def close(self):
+        self.workbook.close()
+
+
+class _XlrdWorkbook:
+    """
+    Legacy .xls workbook opened with xlrd. xlrd must parse a whole
+    sheet before we can read its rows, but with on_demand=True it
+    only parses the sheets we read, and we parse each sheet just
+    once (instead of once per dataframe like read_excel with
+    skiprows/nrows). Cells are converted the same way pandas'
+    read_excel does with engine='xlrd'.
+    REF: https://xlrd.readthedocs.io/en/latest/api.html#xlrd.open_workbook
+    """
+
+    def __init__(self, input_file):
+        # xlrd is only needed to read .xls files
+        import xlrd
+
+        self.xlrd = xlrd
+        self.workbook = xlrd.open_workbook(input_file, on_demand=True)
+        self.sheet_names = self.workbook.sheet_names()
+
+    def _convert_cell(self, cell):
+        if cell.ctype == self.xlrd.XL_CELL_DATE:
+            try:
+                return self.xlrd.xldate.xldate_as_datetime(cell.value, self.workbook.datemode)
+            except (OverflowError, ValueError):
+                return cell.value
+        elif cell.ctype == self.xlrd.XL_CELL_ERROR:
+            return np.nan
+        elif cell.ctype == self.xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        return cell.value
+
+    def iter_rows(self, sheet_name, min_row_idx, max_row_idx=None):
+        if isinstance(sheet_name, int):
+            worksheet = self.workbook.sheet_by_index(sheet_name)
+        else:
+            worksheet = self.workbook.sheet_by_name(sheet_name)
+
+        row_count = worksheet.nrows if max_row_idx is None else min(worksheet.nrows, max_row_idx + 1)
+        for row_idx in range(min_row_idx, row_count):
+            yield _convert_row_values([self._convert_cell(cell) for cell in worksheet.row(row_idx)])
+
+        if max_row_idx is None:
+            # Frees the memory used by the sheet once we read all of it
+            self.workbook.unload_sheet(sheet_name)
+
+    def close(self):
+        self.workbook.release_resources()
+
+
+# Classes to open each type of Excel file with the package (engine)
+# that can stream (or at least parse only once) the rows of a sheet
+EXCEL_WORKBOOK_CLASSES = {
+    '.xlsx': _OpenpyxlWorkbook,
+    '.xlsm': _OpenpyxlWorkbook,
+    '.xlsb': _PyxlsbWorkbook,
+    '.xls': _XlrdWorkbook,
+}
+
+# Engines for pandas' read_excel (used if we don't read in single pass)
+EXCEL_ENGINES = {
+    '.xlsx': 'openpyxl',
+    '.xlsm': 'openpyxl',
+    '.xlsb': 'pyxlsb',
+    '.xls': 'xlrd',
+}
+
+
+def open_workbook_in_read_only_mode(input_file):
+    """
+    Opens the Excel file with the workbook class (see above)
+    for its file type and returns it. All these classes have
+    'sheet_names', 'iter_rows' and 'close' to read the rows
+    of their sheets the same way.
+    """
+    file_extension = os.path.splitext(input_file)[1].lower()
+    return EXCEL_WORKBOOK_CLASSES[file_extension](input_file)
+
+
 class PandasExcelDataReader(PandasFileDataReader):
     """
     This class uses Pandas read_excel to read Pandas dataframe
     from an Excel file. It supports a few most commonly-used
     parameters of read_excel which are defined as class
     CONSTANTS below.
+
+    For .xlsx/.xlsm, .xlsb and .xls files, this class opens the
+    workbook only once (with openpyxl in read-only mode, pyxlsb
+    and xlrd, respectively) and streams the rows of the sheet
+    chunk by chunk, so that we don't re-open and re-parse the
+    whole file for each chunk like read_excel with skiprows/nrows
+    does. This way, big binary workbooks (.xlsb) can be read
+    directly without converting them to CSV files first.
     """
     # Parameters supported from Pandas' read_excel method
     KEY_SHEET_NAME = 'input_sheet_name'
     DEFAULT_SHEET_TO_READ = 0
 
-    def __init__(self, input_file_path_and_name, config):
+    def __init__(self, input_file_path_and_name, config, workbook=None):
+        """
+        workbook (returned by open_workbook_in_read_only_mode) can be
+        provided if it is already open (e.g., to read more than one
+        sheet of it one after another), in which case it is used
+        instead of opening the file again and is NOT closed when we
+        are done reading the sheet.
+        """
         super().__init__(config)
         self.logger = logging.getLogger(__name__)
         self.input_file = input_file_path_and_name
         self.sheet_name = self._get_sheet_name(config)
+        self.engine = EXCEL_ENGINES.get(os.path.splitext(self.input_file)[1].lower())
+
+        # Used only if we read the file in a single pass.
+        # We keep the workbook open and iterate the rows of
+        # the worksheet between the reads.
+        self.read_in_single_pass = self._can_read_in_single_pass()
+        self.workbook = workbook
+        self.row_iterator = None
+        self.close_workbook_when_done = workbook is None
+
         self.headers = self.read_header_row()
+        if not isinstance(self.headers, dict):
+            # We don't select columns when reading all sheets
+            self.headers = self._select_input_columns(self.headers)
         # Number of times read_next_dataframe is called
         self.read_iter_count = 0
 
@@ -34,6 +245,70 @@ class PandasExcelDataReader(PandasFileDataReader):
         return config.get(self.KEY_SHEET_NAME,
                           self.DEFAULT_SHEET_TO_READ)
 
+    def _can_read_in_single_pass(self):
+        """
+        We can only stream the rows of one sheet from the file
+        types in EXCEL_WORKBOOK_CLASSES. For other scenarios
+        (e.g., reading all sheets at once), we fall back to
+        pandas' read_excel.
+        """
+        file_extension = os.path.splitext(self.input_file)[1].lower()
+        return (self.read_in_single_pass
+                and (self.sheet_name is not None)
+                and (file_extension in EXCEL_WORKBOOK_CLASSES))
+
+    def _get_workbook(self):
+        """Opens the workbook (only once) in read-only mode."""
+        if self.workbook is None:
+            self.workbook = open_workbook_in_read_only_mode(self.input_file)
+        return self.workbook
+
+    def _close_workbook(self):
+        """Read-only workbook keeps the file open until we close it."""
+        if (self.workbook is not None) and self.close_workbook_when_done:
+            self.workbook.close()
+
+    def _read_one_row_from_worksheet(self, row_idx):
+        """Returns the converted values of a row (0-indexed) in the sheet."""
+        for values in self._get_workbook().iter_rows(self.sheet_name, row_idx, row_idx):
+            return values
+        return []
+
+    def _iter_rows_from_worksheet(self):
+        """
+        Yields the rows of the sheet starting from 'skiprows'.
+        Like pandas' read_excel, empty rows at the bottom of the
+        sheet are not yielded, so we hold back empty rows until
+        we see a non-empty row below them.
+        """
+        empty_rows = []
+        for values in self._get_workbook().iter_rows(self.sheet_name, self.skip_rows):
+            if not values:
+                empty_rows.append(values)
+                continue
+
+            yield from empty_rows
+            empty_rows = []
+            yield values
+
+    def _read_header_row_in_single_pass(self):
+        """
+        Parses the header row the same way pandas' read_excel
+        does (e.g., empty header cells are named 'Unnamed: 1'
+        and duplicated names are renamed to 'a.1').
+
+        If there is no header row, we use the column indexes
+        of the first data row as column headers.
+        """
+        if self.header_row_index is None:
+            return list(range(len(self._read_one_row_from_worksheet(self.skip_rows))))
+
+        header_row = self._read_one_row_from_worksheet(self.header_row_index)
+        return TextParser([header_row],
+                          header=0,
+                          keep_default_na=self.keep_default_na
+                          ).read().columns.to_list()
+
     def read_header_row(self):
         """
         Reads the row which has column headers
@@ -47,9 +322,13 @@ class PandasExcelDataReader(PandasFileDataReader):
         this will return [0, 1, 2, ...] basically
         list of integers as column headers.
         """
+        if self.read_in_single_pass:
+            return self._read_header_row_in_single_pass()
+
         header_df = pd.read_excel(
             self.input_file,
             sheet_name=self.sheet_name,
+            engine=self.engine,
             keep_default_na=self.keep_default_na,
             header=self.header_row_index,
             nrows=0
@@ -66,16 +345,77 @@ class PandasExcelDataReader(PandasFileDataReader):
 
         return header_df.columns.to_list()
 
+    def skip_dataframes(self, dataframe_count):
+        """
+        If we read the sheet in a single pass and there is no footer
+        to drop, we skip the rows without converting them into
+        dataframes. Otherwise, see the parent class' method.
+        """
+        if (not self.read_in_single_pass) or (self.skip_footer > 0):
+            return super().skip_dataframes(dataframe_count)
+
+        if self.row_iterator is None:
+            self.row_iterator = self._iter_rows_from_worksheet()
+        rows_to_skip = dataframe_count * self.rows_per_read
+        # REF: https://docs.python.org/3/library/itertools.html#itertools-recipes (consume)
+        next(itertools.islice(self.row_iterator, rows_to_skip, rows_to_skip), None)
+        self.read_iter_count += dataframe_count
+
+    def _read_dataframe_in_single_pass(self,
+                                       row_idx_to_start_reading,
+                                       rows_to_read,
+                                       verbose=True):
+        if self.row_iterator is None:
+            self.row_iterator = self._iter_rows_from_worksheet()
+
+        rows = list(itertools.islice(self.row_iterator, rows_to_read))
+        if not rows:
+            # Nothing more to read, thus returns an empty data frame
+            self._close_workbook()
+            return pd.DataFrame(columns=self.headers)
+
+        # Like pandas' read_excel, pad the shorter rows with
+        # empty strings so that every row has the same width.
+        width = max([len(self.headers)] + [len(r) for r in rows])
+        if self.input_column_indexes is not None:
+            width = max(width, self.input_column_indexes[-1] + 1)
+        rows = [r + [''] * (width - len(r)) for r in rows]
+
+        if self.input_column_indexes is not None:
+            rows = [[r[i] for i in self.input_column_indexes] for r in rows]
+
+        # TextParser is what pandas' read_excel uses to
+        # infer data types of the values read from Excel.
+        df = TextParser(rows,
+                        header=None,
+                        keep_default_na=self.keep_default_na).read()
+
+        df = self._assign_column_headers(df)
+        if verbose:
+            self.logger.info(
+                f"Reading data between row range: {row_idx_to_start_reading+1} "
+                f"=> {row_idx_to_start_reading+df.shape[0]}\n"
+                f"from this file: {self.input_file}")
+
+        return df
+
     def _read_dataframe(self,
                         row_idx_to_start_reading,
                         rows_to_read,
                         verbose=True):
+        if self.read_in_single_pass:
+            return self._read_dataframe_in_single_pass(row_idx_to_start_reading,
+                                                       rows_to_read,
+                                                       verbose)
+
         df = pd.read_excel(
             self.input_file,
             sheet_name=self.sheet_name,
+            engine=self.engine,
             keep_default_na=self.keep_default_na,
             header=None,
             skiprows=row_idx_to_start_reading,
+            usecols=self.input_column_indexes,
             nrows=rows_to_read
         )
 
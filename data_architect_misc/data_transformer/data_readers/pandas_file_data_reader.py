@@ -4,6 +4,20 @@ Last Modified Date: May 2, 2020
 """
 import logging
 
+import pandas as pd
+
+
+def read_and_discard_dataframes(data_reader, dataframe_count):
+    """
+    Reads and discards the next 'dataframe_count' dataframes of the
+    data reader (or fewer if it runs out of dataframes before that).
+    Data readers that cannot skip dataframes without reading them
+    use this in their skip_dataframes method.
+    """
+    for _ in range(dataframe_count):
+        if data_reader.read_next_dataframe().empty:
+            break
+
 
 class ConflictingParametersError(Exception):
     """
@@ -38,6 +52,15 @@ class PandasFileDataReader:
     KEY_ROWS_PER_READ = 'rows_per_read'
     DEFAULT_ROWS_PER_READ = 100000
 
+    # If True, child classes keep the input file open and
+    # parse each row exactly once while reading chunk by
+    # chunk (instead of re-reading the file from the top
+    # to skip the rows that were already read in the
+    # previous iterations). Set this to False to fall back
+    # to the old way of reading with skiprows/nrows.
+    KEY_READ_IN_SINGLE_PASS = 'read_in_single_pass'
+    DEFAULT_READ_IN_SINGLE_PASS = True
+
     # Parameters below are pandas-related parameters
     # supported by this file reader class' children.
     KEY_KEEP_DEFAULT_NA = 'keep_default_na'
@@ -49,23 +72,60 @@ class PandasFileDataReader:
     KEY_SKIP_ROWS = 'skiprows'
     DEFAULT_SKIP_ROWS = 1
 
-    # Here, the user needs to be careful that rows
-    # to drop from the bottom, 'skipfooter',
-    # do not awkwardly fall between the previously
-    # read dataframe and the next one to read. If
-    # they do, then this will only drop fewer than
-    # self.skip_footer rows.
-    #
-    # In other words, user needs to make sure the
-    # 'rows_per_read' and 'skipfooter' don't conflict
-    # each other and thus, resulting in some rows
-    # from the bottom not being dropped.
+    # Rows to drop from the bottom are found by holding
+    # back the last 'skipfooter' rows of every dataframe
+    # we read and releasing them (in front of the next
+    # dataframe) only if there is more data to read.
+    # This way, footers that fall between the previously
+    # read dataframe and the next one are dropped, too.
     # See 'excel2.xlsx' and 'excel2_config.json'
-    # in 'examples/' folder as an example of this
-    # awkward scenario (assuming rows_per_read=10).
+    # in 'old_stuff/testing_data_readers/' folder as an
+    # example of such scenario (assuming rows_per_read=10).
     KEY_SKIP_FOOTER = 'skipfooter'  # number of rows to drop from the bottom
     DEFAULT_SKIP_FOOTER = 0
 
+    # Names of the columns to read from the file (or column
+    # indexes, if there is no header row). If provided, child
+    # classes pass the positions of these columns to pandas
+    # (as 'usecols') so that the other columns are never parsed
+    # or held in memory, which helps a lot with wide raw files.
+    # If not provided, all the columns in the file are read.
+    # REF: https://pandas.pydata.org/pandas-docs/stable/user_guide/io.html#usecols
+    KEY_INPUT_COLUMNS = 'input_columns'
+    DEFAULT_INPUT_COLUMNS = None
+
+    # If True (and 'input_columns' is not provided), transform.py
+    # fills 'input_columns' with every string value found in the
+    # arguments of 'functions_to_apply', so that only the columns
+    # referred to by the transform functions are read. Do NOT use
+    # this if any of the functions uses columns that are not named
+    # in its arguments (e.g., custom functions with hard-coded
+    # column names or functions that check the number of columns).
+    KEY_INFER_INPUT_COLUMNS = 'infer_input_columns'
+    DEFAULT_INFER_INPUT_COLUMNS = False
+
+    # Data types to convert the columns to after reading, to
+    # reduce the memory used by each dataframe. Any data type
+    # pandas' astype understands can be used, e.g.,
+    # {"HARMONIZED_REGION": "category", "RAW_PRODUCT_NAME": "string",
+    # "YEAR": "Int64", "HARMONIZED_GROSS_SPEND": "Float64"}
+    # ("string[pyarrow]" needs pyarrow to be installed).
+    # REF: https://pandas.pydata.org/pandas-docs/stable/user_guide/basics.html#basics-dtypes
+    KEY_COLUMN_DATA_TYPES = 'column_data_types'
+    DEFAULT_COLUMN_DATA_TYPES = {}
+
+    # If True, text columns (not listed in 'column_data_types')
+    # whose number of unique values is no more than the ratio
+    # below (of the number of rows) in the first dataframe we read
+    # are converted to 'category' data type. Columns like region,
+    # country and media type, which have only a handful of unique
+    # values, use a fraction of memory as categorical columns.
+    # REF: https://pandas.pydata.org/pandas-docs/stable/user_guide/categorical.html#memory-usage
+    KEY_CONVERT_LOW_CARDINALITY_COLUMNS_TO_CATEGORY = 'convert_low_cardinality_columns_to_category'
+    DEFAULT_CONVERT_LOW_CARDINALITY_COLUMNS_TO_CATEGORY = False
+    KEY_MAX_UNIQUE_VALUE_RATIO_FOR_CATEGORY = 'max_unique_value_ratio_for_category'
+    DEFAULT_MAX_UNIQUE_VALUE_RATIO_FOR_CATEGORY = 0.5
+
     def __init__(self, config):
         self.logger = logging.getLogger(__name__)
         self.rows_per_read = self._get_rows_per_read(config)
@@ -73,6 +133,20 @@ class PandasFileDataReader:
         self.header_row_index = self._get_row_index_to_read_column_header(config)
         self.skip_rows = self._get_leading_rows_to_skip(config)
         self.skip_footer = self._get_bottom_rows_to_skip(config)
+        self.read_in_single_pass = config.get(self.KEY_READ_IN_SINGLE_PASS,
+                                              self.DEFAULT_READ_IN_SINGLE_PASS)
+        self.input_columns = config.get(self.KEY_INPUT_COLUMNS,
+                                        self.DEFAULT_INPUT_COLUMNS)
+        self.infer_input_columns = config.get(self.KEY_INFER_INPUT_COLUMNS,
+                                              self.DEFAULT_INFER_INPUT_COLUMNS)
+        self.column_data_types = config.get(self.KEY_COLUMN_DATA_TYPES,
+                                            self.DEFAULT_COLUMN_DATA_TYPES)
+        self.convert_low_cardinality_columns = config.get(
+            self.KEY_CONVERT_LOW_CARDINALITY_COLUMNS_TO_CATEGORY,
+            self.DEFAULT_CONVERT_LOW_CARDINALITY_COLUMNS_TO_CATEGORY)
+        self.max_unique_value_ratio_for_category = config.get(
+            self.KEY_MAX_UNIQUE_VALUE_RATIO_FOR_CATEGORY,
+            self.DEFAULT_MAX_UNIQUE_VALUE_RATIO_FOR_CATEGORY)
         if self.rows_per_read < self.skip_footer:
             raise ConflictingParametersError(
                 f"The number of rows to read per iteration, "
@@ -86,6 +160,19 @@ class PandasFileDataReader:
         self.headers = None
         self.read_iter_count = None
 
+        # Positions (in the file) of the columns to read, which
+        # are set by _select_input_columns. None means all columns.
+        self.input_column_indexes = None
+
+        # Last 'skipfooter' rows of the previously read
+        # dataframe that are held back until we know
+        # they are not the footer rows of the file.
+        self.footer_buffer_df = None
+
+        # Data types to apply to every dataframe we read, which
+        # are decided when we read the first dataframe.
+        self.data_types_to_apply = None
+
     def _get_rows_per_read(self, config):
         """
         Get rows to read per iteration (each read).
@@ -150,6 +237,37 @@ class PandasFileDataReader:
         return config.get(self.KEY_SKIP_FOOTER,
                           self.DEFAULT_SKIP_FOOTER)
 
+    def _select_input_columns(self, all_headers):
+        """
+        Given all the column headers in the file, keeps track of
+        the positions of the columns listed in 'input_columns'
+        and returns their headers (in the order they appear
+        in the file). If 'input_columns' is not provided, or none
+        of them is found in the file, all columns are read.
+        """
+        if self.input_columns is None:
+            return all_headers
+
+        missing_cols = [col for col in self.input_columns if col not in all_headers]
+        # Inferred input columns are mostly values other than column
+        # names (e.g., new column names or values to look for).
+        if missing_cols and not self.infer_input_columns:
+            self.logger.warning(f"These columns in '{self.KEY_INPUT_COLUMNS}' are not "
+                                f"found in the column headers of the file: {missing_cols}")
+
+        self.input_column_indexes = [i for i, col in enumerate(all_headers)
+                                     if col in self.input_columns]
+        if not self.input_column_indexes:
+            self.logger.warning(f"None of the columns in '{self.KEY_INPUT_COLUMNS}' "
+                                f"is found in the file, so all the columns are read.")
+            self.input_column_indexes = None
+            return all_headers
+
+        headers = [all_headers[i] for i in self.input_column_indexes]
+        self.logger.info(f"Reading only {len(headers)} out of {len(all_headers)} "
+                         f"columns from the file: {headers}")
+        return headers
+
     def _rename_existing_and_add_new_cols_with_empty_str(self, df):
         """
         In Pandas CSV reader when we read chunk by chunk and
@@ -215,46 +333,119 @@ class PandasFileDataReader:
         return (self.rows_per_read
                 * self.read_iter_count) + self.skip_rows
 
-    def _read_one_line_ahead(self):
+    def _hold_back_footer_rows(self, df):
         """
-        This method is used to check if the dataframe
-        we'll be reading in the next iteration is
-        empty.
+        Holds back the last 'skipfooter' rows of the dataframe
+        and releases the rows held back from the previous call
+        in front of it. When there is no more data to read (i.e.
+        df is empty), the rows still held back are the footer
+        rows of the file and they are dropped.
+
+        Unlike the old way of reading one row ahead to check if
+        we reached the end of the file, the returned dataframe can
+        be empty before the end of the file: if 'rows_per_read'
+        is the same as 'skipfooter', all rows of the first dataframe
+        are held back. read_next_dataframe reads on in that case.
         """
-        return self._read_dataframe(
-            self._get_row_idx_to_start_reading(),
-            1,
-            False)
+        if self.footer_buffer_df is not None:
+            if df.empty:
+                self.logger.info(
+                    f"Dropped this number of rows of data from the "
+                    f"bottom of the file: {self.skip_footer}"
+                    f"\nThe following rows are dropped:\n"
+                    f"{self.footer_buffer_df}")
+                self.footer_buffer_df = None
+                return df
+
+            df = pd.concat([self.footer_buffer_df, df], ignore_index=True)
+
+        if df.empty:
+            return df
+
+        # REF: https://stackoverflow.com/a/57681199
+        self.footer_buffer_df = df[-self.skip_footer:]
+        return df[:-self.skip_footer]
+
+    def _get_low_cardinality_text_columns(self, df):
+        """
+        Returns the names of text (object type) columns whose number
+        of unique values is no more than 'max_unique_value_ratio_for_category'
+        of the number of rows in the dataframe.
+        """
+        max_unique_values = self.max_unique_value_ratio_for_category * df.shape[0]
+        return [col for col in df.select_dtypes(include='object').columns
+                if df[col].nunique(dropna=False) <= max_unique_values]
 
-    def read_next_dataframe(self):
-        df = self._read_dataframe(self._get_row_idx_to_start_reading(),
-                                  self.rows_per_read)
-
-        # Increment counter below to prepare for the next read
-        self.read_iter_count += 1
-
-        if (self.skip_footer > 0) and self._read_one_line_ahead().empty:
-            # Here, the user needs to be careful that rows
-            # to drop from the bottom, 'skipfooter',
-            # do not awkwardly fall between the previously
-            # read dataframe and the next one to read. If
-            # they do, then this will only drop fewer than
-            # self.skip_footer rows.
-            #
-            # In other words, user needs to make sure the
-            # 'rows_per_read' and 'skipfooter' don't conflict
-            # each other and thus, resulting in some rows
-            # from the bottom not being dropped.
-            # See 'TestExcelFile2.xlsx' and 'TestExcelConfig2.json'
-            # in examples/test folder as an example of this
-            # awkward scenario.
-            self.logger.info(
-                f"Dropped *as many as* (could be fewer than) "
-                f"this number of rows of data: {self.skip_footer}"
-                f"\nThe following rows are dropped:\n"
-                f"{df[-self.skip_footer:]}")
-
-            # REF: https://stackoverflow.com/a/57681199
-            return df[:-self.skip_footer]
+    def _get_data_types_to_apply(self, df):
+        """
+        Decides (once, using the first dataframe read) which columns
+        to convert to which data types, so that every dataframe
+        read from the file ends up with the same data types.
+        """
+        if self.data_types_to_apply is None:
+            data_types = {}
+            if self.convert_low_cardinality_columns:
+                data_types.update({col: 'category' for col in
+                                   self._get_low_cardinality_text_columns(df)})
+
+            for col, data_type in self.column_data_types.items():
+                if col in df.columns:
+                    data_types[col] = data_type
+                else:
+                    self.logger.warning(f"Column '{col}' in '{self.KEY_COLUMN_DATA_TYPES}' "
+                                        f"is not found in the data, so we will not "
+                                        f"convert its data type to: {data_type}")
+
+            if data_types:
+                self.logger.info(f"Columns will be converted to these data types "
+                                 f"after reading: {data_types}")
+            self.data_types_to_apply = data_types
+
+        return self.data_types_to_apply
+
+    def _apply_data_types(self, df):
+        """
+        Converts the data types of the columns based on 'column_data_types'
+        and 'convert_low_cardinality_columns_to_category' in the config.
+        """
+        if df.empty or not (self.column_data_types or self.convert_low_cardinality_columns):
+            return df
 
-        return df
+        data_types = self._get_data_types_to_apply(df)
+        if not data_types:
+            return df
+        return df.astype(data_types)
+
+    def skip_dataframes(self, dataframe_count):
+        """
+        Skips the next 'dataframe_count' dataframes (e.g., the ones
+        already transformed before the program was stopped), so that
+        the next read_next_dataframe call returns the dataframe after
+        them. This reads and discards the dataframes, which makes sure
+        that the rest of the dataframes are exactly the same as if we
+        read them one by one. Child classes may override this to skip
+        the rows without parsing them.
+        """
+        read_and_discard_dataframes(self, dataframe_count)
+
+    def read_next_dataframe(self):
+        while True:
+            df = self._read_dataframe(self._get_row_idx_to_start_reading(),
+                                      self.rows_per_read)
+
+            # Increment counter below to prepare for the next read
+            self.read_iter_count += 1
+
+            if self.skip_footer == 0:
+                break
+
+            # An empty dataframe tells the caller that there is nothing
+            # more to read, so we keep reading while all the rows we read
+            # are held back (see _hold_back_footer_rows). We check shape
+            # because Polars dataframes (see PolarsDataReader) have it, too.
+            is_end_of_file = df.shape[0] == 0
+            df = self._hold_back_footer_rows(df)
+            if is_end_of_file or (df.shape[0] > 0):
+                break
+
+        return self._apply_data_types(df)
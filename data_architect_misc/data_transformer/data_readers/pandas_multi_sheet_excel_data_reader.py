@@ -0,0 +1,202 @@
+"""
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import copy
+import fnmatch
+import logging
+import os
+
+import pandas as pd
+
+from data_readers.pandas_excel_data_reader import (PandasExcelDataReader,
+                                                  EXCEL_WORKBOOK_CLASSES,
+                                                  open_workbook_in_read_only_mode)
+from data_readers.pandas_file_data_reader import read_and_discard_dataframes
+
+
+class SheetNotFoundError(Exception):
+    """
+    Raise this if none of the sheets in the Excel file
+    matches the sheet name(s) provided in the config.
+    """
+
+    def __init__(self, error_msg):
+        super().__init__(error_msg)
+
+
+class PandasMultiSheetExcelDataReader:
+    """
+    This class reads more than one sheet of an Excel file one
+    after another, chunk by chunk, as if the rows of these sheets
+    were stacked on top of each other. It is used instead of
+    PandasExcelDataReader if 'input_sheet_name' in the config is:
+        - null (None), which means all the sheets in the file,
+        - a list of sheet names (or indexes), e.g., ["Jan", "Feb"], or
+        - a glob pattern of sheet names, e.g., "2019_*" or "Q[1-2]".
+
+    Each sheet is read by its own PandasExcelDataReader (one at
+    a time), so that the rest of the parameters (e.g., 'header',
+    'skiprows' and 'skipfooter') apply to every sheet, and no
+    dataframe has more than 'rows_per_read' rows or rows from
+    more than one sheet. Name of the sheet that the rows come from
+    is added to each dataframe as a column named by 'sheet_name_column'
+    in the config (default: 'SHEET_NAME'), so that the transform
+    functions can use it like any other column.
+
+    For .xlsx/.xlsm, .xlsb and .xls files, the workbook is opened
+    only once (see open_workbook_in_read_only_mode) and shared by
+    the readers of all the sheets, so only the rows of the current
+    chunk are held in memory, not the whole workbook (except for
+    .xls files, whose sheets xlrd parses one at a time).
+    """
+    KEY_SHEET_NAME = PandasExcelDataReader.KEY_SHEET_NAME
+
+    KEY_SHEET_NAME_COLUMN = 'sheet_name_column'
+    DEFAULT_SHEET_NAME_COLUMN = 'SHEET_NAME'
+
+    # Characters that make a sheet name in the config a glob pattern
+    # REF: https://docs.python.org/3/library/fnmatch.html
+    GLOB_PATTERN_CHARACTERS = ['*', '?', '[']
+
+    def __init__(self, input_file_path_and_name, config):
+        self.logger = logging.getLogger(__name__)
+        self.input_file = input_file_path_and_name
+        self.config = config
+        self.sheet_name_column = config.get(self.KEY_SHEET_NAME_COLUMN,
+                                            self.DEFAULT_SHEET_NAME_COLUMN)
+
+        self.workbook = None
+        if self._can_share_workbook():
+            self.workbook = open_workbook_in_read_only_mode(self.input_file)
+
+        self.sheet_names = self._select_sheet_names(self._get_all_sheet_names(),
+                                                    config.get(self.KEY_SHEET_NAME))
+        self.logger.info(f"Reading these sheets one after another from "
+                         f"the file, {self.input_file}: {self.sheet_names}")
+
+        # Index (in self.sheet_names) of the sheet we are reading
+        # and its reader, which is created only when we start
+        # reading the sheet (i.e. after we finish the previous one).
+        self.sheet_idx = 0
+        self.sheet_reader = None
+        # Number of times read_next_dataframe is called
+        self.read_iter_count = 0
+
+    @classmethod
+    def is_multi_sheet_name(cls, sheet_name):
+        """
+        Checks if the sheet name in the config (i.e. value of
+        'input_sheet_name') refers to more than one sheet.
+        """
+        if (sheet_name is None) or isinstance(sheet_name, list):
+            return True
+        return isinstance(sheet_name, str) and any(c in sheet_name for c in cls.GLOB_PATTERN_CHARACTERS)
+
+    def _can_share_workbook(self):
+        """
+        We can only share the workbook between the readers of the
+        sheets if PandasExcelDataReader streams the rows of the sheet
+        from the workbook (i.e. file types in EXCEL_WORKBOOK_CLASSES).
+        """
+        file_extension = os.path.splitext(self.input_file)[1].lower()
+        return (self.config.get(PandasExcelDataReader.KEY_READ_IN_SINGLE_PASS,
+                                PandasExcelDataReader.DEFAULT_READ_IN_SINGLE_PASS)
+                and (file_extension in EXCEL_WORKBOOK_CLASSES))
+
+    def _get_all_sheet_names(self):
+        """
+        Returns the names of all sheets in the file (in the order
+        they appear in the workbook) without reading their data.
+        """
+        if self.workbook is not None:
+            return self.workbook.sheet_names
+
+        with pd.ExcelFile(self.input_file) as excel_file:
+            return excel_file.sheet_names
+
+    def _select_sheet_names(self, all_sheet_names, sheet_name):
+        """
+        Returns the names of the sheets to read based on the
+        'input_sheet_name' in the config (see class docstring).
+        Sheets in a list are read in the order they are listed
+        and the ones matching a glob pattern are read in the
+        order they appear in the workbook.
+        """
+        if sheet_name is None:
+            selected_sheet_names = all_sheet_names
+        elif isinstance(sheet_name, list):
+            selected_sheet_names = []
+            for name in sheet_name:
+                if isinstance(name, int) and (0 <= name < len(all_sheet_names)):
+                    selected_sheet_names.append(all_sheet_names[name])
+                elif name in all_sheet_names:
+                    selected_sheet_names.append(name)
+                else:
+                    raise SheetNotFoundError(f"Sheet '{name}' in '{self.KEY_SHEET_NAME}' is not "
+                                             f"found in the file, {self.input_file}, which "
+                                             f"has these sheets: {all_sheet_names}")
+        elif sheet_name in all_sheet_names:
+            # Sheet names in Excel can have '[' in them,
+            # e.g., 'Spend [USD]', which we read as is.
+            selected_sheet_names = [sheet_name]
+        else:
+            selected_sheet_names = [name for name in all_sheet_names
+                                    if fnmatch.fnmatchcase(name, sheet_name)]
+
+        if not selected_sheet_names:
+            raise SheetNotFoundError(f"None of the sheets in the file, {self.input_file}, "
+                                     f"matches '{sheet_name}' in '{self.KEY_SHEET_NAME}'. "
+                                     f"The file has these sheets: {all_sheet_names}")
+        return selected_sheet_names
+
+    def _get_sheet_reader(self):
+        """
+        Returns the reader of the sheet we are reading, which uses
+        the same config as this class except the sheet name.
+        """
+        if self.sheet_reader is None:
+            sheet_config = copy.copy(self.config)
+            sheet_config[self.KEY_SHEET_NAME] = self.sheet_names[self.sheet_idx]
+            self.sheet_reader = PandasExcelDataReader(self.input_file,
+                                                      sheet_config,
+                                                      workbook=self.workbook)
+        return self.sheet_reader
+
+    def _close_workbook(self):
+        """Read-only workbook keeps the file open until we close it."""
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+
+    def read_next_dataframe(self):
+        """
+        Reads the next dataframe from the sheet we are reading
+        and moves on to the next sheet when there is nothing more
+        to read from it. Returns an empty dataframe only after
+        all the sheets are read.
+        """
+        self.read_iter_count += 1
+        while self.sheet_idx < len(self.sheet_names):
+            df = self._get_sheet_reader().read_next_dataframe()
+            if not df.empty:
+                # Sheet names can be anything (e.g., '2019'), so we
+                # keep them as strings like other text columns.
+                df[self.sheet_name_column] = str(self.sheet_names[self.sheet_idx])
+                return df
+
+            self.sheet_idx += 1
+            self.sheet_reader = None
+
+        # Nothing more to read, thus returns an empty data frame
+        self._close_workbook()
+        return pd.DataFrame()
+
+    def skip_dataframes(self, dataframe_count):
+        """
+        Skips the next 'dataframe_count' dataframes (e.g., the ones
+        already transformed before the program was stopped). Because
+        we don't know how many dataframes each sheet has without
+        reading it, this reads and discards the dataframes.
+        """
+        read_and_discard_dataframes(self, dataframe_count)
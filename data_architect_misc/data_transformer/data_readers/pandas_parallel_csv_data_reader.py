@@ -0,0 +1,417 @@
+"""
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import codecs
+import collections
+import csv
+import io
+import logging
+import mmap
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.errors import EmptyDataError, ParserError
+
+from data_readers.compressed_files import is_compressed_file
+from data_readers.pandas_csv_data_reader import PandasCSVDataReader
+
+# Bytes to scan at a time when skipping rows or counting quotes
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+# Bytes to scan at a time when counting the rows of a chunk. This is
+# smaller than SCAN_BLOCK_SIZE because numpy arrays of up to 8 bytes
+# for each byte of the block are created to find the ends of its rows.
+ROW_SCAN_BLOCK_SIZE = 1024 * 1024
+
+
+def _count_fields(data, read_csv_kwargs):
+    """Returns the number of fields of the longest row in the data (bytes)."""
+    text = data.decode(read_csv_kwargs['encoding'] or 'utf-8', errors='replace')
+    rows = csv.reader(io.StringIO(text, newline=''),
+                      delimiter=read_csv_kwargs['delimiter'],
+                      quoting=read_csv_kwargs['quoting'])
+    return max((len(row) for row in rows), default=0)
+
+
+def _parse_rows(data, read_csv_kwargs):
+    """
+    Parses the rows (bytes) of one chunk with pandas' read_csv,
+    which infers the data types of the columns from these rows only,
+    like it does for each chunk in PandasCSVDataReader.
+    """
+    try:
+        return pd.read_csv(io.BytesIO(data), header=None, **read_csv_kwargs)
+    except EmptyDataError:
+        # e.g., the chunk has only blank lines and skip_blank_lines is True
+        return pd.DataFrame()
+    except ParserError:
+        names = read_csv_kwargs.get('names')
+        if names is None:
+            raise
+        # pandas doesn't allow more names than the fields of the rows
+        # in the chunk (e.g., a footer row with one field or a blank
+        # line in a chunk of its own), so we parse the chunk with the
+        # fields it has and add the missing ones as empty values, e.g.,
+        # '' (or NaN if keep_default_na is True), like pandas does
+        # for the rows that are shorter than the others in a chunk.
+        field_count = _count_fields(data, read_csv_kwargs)
+        if field_count >= len(names):
+            raise
+        if field_count > 0:
+            df = _parse_rows(data, dict(read_csv_kwargs, names=list(range(field_count)), usecols=None))
+        else:
+            # Blank lines, each of which is a row of empty values
+            # unless skip_blank_lines is True
+            df = pd.DataFrame(index=range(0 if read_csv_kwargs['skip_blank_lines']
+                                          else len(data.splitlines())))
+        return df.reindex(columns=read_csv_kwargs.get('usecols') or names,
+                          fill_value=float('nan') if read_csv_kwargs['keep_default_na'] else '')
+
+
+def _parse_byte_ranges(input_file, byte_ranges, read_csv_kwargs):
+    """
+    Parses the rows between each pair of byte offsets (start and end
+    are at the start of a row) of the file in a worker process and
+    returns a dataframe for each pair. Only these ranges of the file
+    are copied from the memory-mapped file, so workers don't read
+    the parts of the file they don't parse.
+    """
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [_parse_rows(mm[start:end], read_csv_kwargs) for start, end in byte_ranges]
+
+
+class PandasParallelCSVDataReader(PandasCSVDataReader):
+    """
+    This class reads the same dataframes as PandasCSVDataReader,
+    but parses big CSV files with more than one CPU core. It is
+    used instead of PandasCSVDataReader if 'parse_workers' in the
+    config is more than 1 (and the file can be split, see
+    can_parse_in_parallel).
+
+    The file is memory-mapped and split into byte ranges of exactly
+    'rows_per_read' rows (blank lines are not counted if they are
+    skipped), so that pandas parses the same rows together as it
+    does for each chunk in PandasCSVDataReader and infers the same
+    data types from them. Newlines inside quoted values are not
+    treated as the end of a row, which we find by counting the quotes
+    before each newline (quotes inside quoted values are doubled in
+    CSV files, so they don't change whether we are inside a quoted
+    value or not). Rows are counted a block of the file at a time
+    with numpy, instead of row by row.
+
+    Ranges of about 'parse_range_size_mb' MB in total are parsed
+    together by pandas' read_csv in one of the 'parse_workers'
+    processes, and the dataframes are read in order (e.g., for
+    checkpoints and chunk cache). The first range is parsed in this
+    process, and the number of its fields is given to pandas for
+    the rest of the ranges, like the C parser counts them from the
+    first row of the file. Otherwise, pandas fails on the ranges
+    that start with a blank line or a row with fewer fields.
+    At most two groups of ranges per worker are parsed ahead of the
+    dataframe being read, which caps the memory used by them.
+    REF: https://docs.python.org/3/library/mmap.html
+
+    Parsing in parallel only works if we read in a single pass
+    (see 'read_in_single_pass'); otherwise, this class reads the
+    same way as PandasCSVDataReader.
+    """
+    KEY_PARSE_WORKERS = 'parse_workers'
+    DEFAULT_PARSE_WORKERS = 1
+
+    KEY_PARSE_RANGE_SIZE_MB = 'parse_range_size_mb'
+    DEFAULT_PARSE_RANGE_SIZE_MB = 64
+
+    # quoting_behavior value (csv.QUOTE_NONE) which tells
+    # pandas to treat quotes like any other character
+    QUOTE_NONE = csv.QUOTE_NONE
+    QUOTE_CHARACTER = b'"'
+    NEWLINE_CHARACTER = b'\n'
+    # Characters (other than the delimiter) of the lines
+    # which pandas skips as blank lines
+    BLANK_LINE_CHARACTERS = b' \t\r\n'
+
+    def __init__(self, input_file_path_and_name, config):
+        super().__init__(input_file_path_and_name, config)
+        self.logger = logging.getLogger(__name__)
+        self.parse_workers = config.get(self.KEY_PARSE_WORKERS,
+                                        self.DEFAULT_PARSE_WORKERS)
+        self.range_size_mb = config.get(self.KEY_PARSE_RANGE_SIZE_MB,
+                                        self.DEFAULT_PARSE_RANGE_SIZE_MB)
+        self.range_size = max(int(self.range_size_mb * 1024 * 1024), 1)
+        self.is_quote_aware = self.quoting != self.QUOTE_NONE
+
+        # Spaces and tabs are part of the fields (instead of a blank
+        # line) if one of them is the delimiter.
+        delimiter = (self.delimiter or '').encode(self.encoding or 'utf-8')
+        self.blank_line_characters = bytes(c for c in self.BLANK_LINE_CHARACTERS
+                                           if bytes([c]) != delimiter)
+        # Lookup table of the bytes to check if they are in blank lines
+        self.is_blank_line_character = np.zeros(256, dtype=bool)
+        self.is_blank_line_character[list(self.blank_line_characters)] = True
+
+    @classmethod
+    def can_parse_in_parallel(cls, input_file_path_and_name, config):
+        """
+        Checks if the config asks for more than one parse worker
+        and the file can be split into byte ranges at newlines,
+        which is not the case for compressed files, encodings in
+        which newline isn't the byte '\\n' (e.g., UTF-16) and files
+        with escape characters (which can escape newlines and quotes).
+        """
+        if config.get(cls.KEY_PARSE_WORKERS, cls.DEFAULT_PARSE_WORKERS) <= 1:
+            return False
+        if is_compressed_file(input_file_path_and_name):
+            return False
+        if config.get(cls.ESCAPE_CHARACTER_CSV, cls.DEFAULT_ESCAPE_CHARACTER_CSV) is not None:
+            return False
+
+        encoding = config.get(cls.KEY_INPUT_FILE_ENCODING) or 'utf-8'
+        try:
+            return '\n"'.encode(codecs.lookup(encoding).name) == b'\n"'
+        except LookupError:
+            return False
+
+    def _get_read_csv_kwargs(self):
+        """Parameters for pandas' read_csv to parse each byte range."""
+        return {'keep_default_na': self.keep_default_na,
+                'skip_blank_lines': self.skip_blank_lines,
+                'encoding': self.encoding,
+                'delimiter': self.delimiter,
+                'quoting': self.quoting,
+                'usecols': self.input_column_indexes}
+
+    def _parse_first_byte_range(self, mm, start, end, read_csv_kwargs):
+        """
+        Parses the first range (with all the columns, to count the
+        fields like pandas does from the first row of the file) and
+        returns its dataframe along with the parameters of read_csv
+        to parse the rest of the ranges with the same number of fields.
+        Data types are not passed on, because pandas infers them
+        from the rows of each chunk in PandasCSVDataReader.
+        """
+        df = _parse_rows(mm[start:end], dict(read_csv_kwargs, usecols=None))
+        if df.empty:
+            return df, read_csv_kwargs
+
+        field_count = df.shape[1]
+        if self.input_column_indexes is not None:
+            df = df[self.input_column_indexes]
+        return df, dict(read_csv_kwargs, names=list(range(field_count)))
+
+    def _find_end_of_row(self, mm, pos, in_quotes=False, max_pos=None):
+        """
+        Returns the offset right after the next newline (from pos) that
+        is not inside a quoted value, or None if we are still inside
+        a quoted value after max_pos. Rows without quotes are not capped
+        by max_pos, however long they are. If there is no newline left,
+        returns the end of the file.
+        """
+        while True:
+            newline_pos = mm.find(self.NEWLINE_CHARACTER, pos)
+            if newline_pos == -1:
+                return len(mm)
+
+            if self.is_quote_aware and (mm[pos:newline_pos].count(self.QUOTE_CHARACTER) % 2):
+                in_quotes = not in_quotes
+            if not in_quotes:
+                return newline_pos + 1
+            if (max_pos is not None) and (newline_pos > max_pos):
+                return None
+            pos = newline_pos + 1
+
+    def _skip_rows(self, mm, pos, row_count):
+        """
+        Returns the offset after skipping 'row_count' rows from pos
+        (like 'skiprows' in pandas' read_csv). Blocks of the file
+        without quotes are skipped by counting their newlines, so
+        we don't look for the rows one at a time.
+        """
+        while (row_count > 0) and (pos < len(mm)):
+            block = mm[pos:pos + SCAN_BLOCK_SIZE]
+            if self.is_quote_aware and (self.QUOTE_CHARACTER in block):
+                # Rows with quotes are skipped one at a time
+                block_end = pos + len(block)
+                while (row_count > 0) and (pos < block_end):
+                    pos = self._find_end_of_row(mm, pos)
+                    row_count -= 1
+                continue
+
+            newline_count = block.count(self.NEWLINE_CHARACTER)
+            if newline_count < row_count:
+                row_count -= newline_count
+                pos += len(block)
+                continue
+
+            # The last row to skip ends in this block
+            block_pos = 0
+            for _ in range(row_count):
+                block_pos = block.index(self.NEWLINE_CHARACTER, block_pos) + 1
+            return pos + block_pos
+        return pos
+
+    def _find_end_of_next_row(self, mm, pos):
+        """
+        Same as _find_end_of_row, but if we are still inside a quoted
+        value after 'parse_range_size_mb' MB, the next newline is
+        used as the end of the row.
+        """
+        end = self._find_end_of_row(mm, pos, max_pos=pos + self.range_size)
+        if end is None:
+            # Quotes are probably not balanced (e.g., 12" TV in an
+            # unquoted value), so we end the row at the next newline.
+            self.logger.warning(f"Could not find the end of a quoted value after "
+                                f"byte offset {pos} of this file, so the next "
+                                f"newline is used as the end of the row: "
+                                f"{self.input_file}")
+            end = self._find_end_of_row(mm, pos, in_quotes=False)
+        return end
+
+    def _is_blank_line(self, row):
+        """Checks if pandas skips the row (bytes) as a blank line."""
+        return not row.strip(self.blank_line_characters)
+
+    def _find_ends_of_rows_in_block(self, block):
+        """
+        Returns the offsets (in the block, which starts at the start
+        of a row) right after the newlines that end a row, i.e. the
+        ones with an even number of quotes before them, along with the
+        ones of the rows that pandas reads (i.e. not skipped as blank
+        lines).
+        """
+        block = np.frombuffer(block, dtype=np.uint8)
+        newline_positions = np.flatnonzero(block == ord(self.NEWLINE_CHARACTER))
+        if self.is_quote_aware:
+            # 1 after an odd number of quotes, and 0 otherwise
+            is_in_quotes = np.bitwise_xor.accumulate((block == ord(self.QUOTE_CHARACTER)).view(np.uint8))
+            newline_positions = newline_positions[is_in_quotes[newline_positions] == 0]
+        row_ends = newline_positions + 1
+        if not self.skip_blank_lines:
+            return row_ends, row_ends
+
+        # Blank lines start with one of the blank line characters,
+        # which most of the rows (or blocks) don't.
+        row_starts = np.concatenate(([0], row_ends[:-1]))
+        if not self.is_blank_line_character[block[row_starts]].any():
+            return row_ends, row_ends
+
+        # Number of characters (before each offset) that
+        # are not in a blank line, to find the blank lines
+        non_blank_counts = np.concatenate(([0], np.cumsum(~self.is_blank_line_character[block])))
+        return row_ends, row_ends[non_blank_counts[row_ends] > non_blank_counts[row_starts]]
+
+    def _find_end_of_rows(self, mm, pos, row_count):
+        """
+        Returns the offset after the next 'row_count' rows from pos
+        that pandas reads as rows, i.e. blank lines are not counted
+        if they are skipped (see 'skip_blank_lines').
+        """
+        while (row_count > 0) and (pos < len(mm)):
+            row_ends, read_row_ends = self._find_ends_of_rows_in_block(mm[pos:pos + ROW_SCAN_BLOCK_SIZE])
+            if len(row_ends) == 0:
+                # The row is longer than the block (or it is the
+                # last row of the file, which has no newline).
+                end = self._find_end_of_next_row(mm, pos)
+                if not (self.skip_blank_lines and self._is_blank_line(mm[pos:end])):
+                    row_count -= 1
+                pos = end
+                continue
+
+            if len(read_row_ends) >= row_count:
+                return pos + int(read_row_ends[row_count - 1])
+            row_count -= len(read_row_ends)
+            pos += int(row_ends[-1])
+        return pos
+
+    def _iter_byte_ranges(self, mm):
+        """
+        Yields (start, end) offsets of the byte ranges to parse,
+        starting from the first data row to read. Each range has
+        'rows_per_read' rows (except the last one).
+        """
+        start = self._skip_rows(mm, 0, self.skip_rows + self.data_rows_to_skip)
+        while start < len(mm):
+            end = self._find_end_of_rows(mm, start, self.rows_per_read)
+            yield start, end
+            start = end
+
+    def _iter_byte_range_groups(self, byte_ranges):
+        """
+        Yields lists of consecutive byte ranges of about
+        'parse_range_size_mb' MB in total, so that each worker
+        process parses more than one small chunk at a time.
+        """
+        byte_range_group = []
+        for start, end in byte_ranges:
+            byte_range_group.append((start, end))
+            if end - byte_range_group[0][0] >= self.range_size:
+                yield byte_range_group
+                byte_range_group = []
+        if byte_range_group:
+            yield byte_range_group
+
+    def _iter_parsed_ranges(self, mm):
+        """
+        Yields the dataframes parsed from the byte ranges in order,
+        while the next ranges are being parsed in the worker processes.
+        """
+        input_file = os.path.abspath(self.input_file)
+        read_csv_kwargs = self._get_read_csv_kwargs()
+        byte_ranges = self._iter_byte_ranges(mm)
+        for start, end in byte_ranges:
+            # Ranges with nothing to parse (e.g., only
+            # blank lines) don't tell us the fields.
+            df, read_csv_kwargs = self._parse_first_byte_range(mm, start, end, read_csv_kwargs)
+            yield df
+            if not df.empty:
+                break
+
+        byte_range_groups = self._iter_byte_range_groups(byte_ranges)
+        if multiprocessing.current_process().daemon:
+            # Processes of multiprocessing.Pool (e.g., transform.py with
+            # -w option) are not allowed to start their own processes.
+            self.logger.warning(f"Parsing in this process (instead of in "
+                                f"{self.parse_workers} processes) because it "
+                                f"is a worker process: {self.input_file}")
+            for byte_range_group in byte_range_groups:
+                yield from _parse_byte_ranges(input_file, byte_range_group, read_csv_kwargs)
+            return
+
+        # REF: https://docs.python.org/3/library/multiprocessing.html#module-multiprocessing.pool
+        with multiprocessing.Pool(processes=self.parse_workers) as pool:
+            pending_results = collections.deque()
+            for byte_range_group in byte_range_groups:
+                pending_results.append(pool.apply_async(_parse_byte_ranges,
+                                                        (input_file, byte_range_group, read_csv_kwargs)))
+                if len(pending_results) >= self.parse_workers * 2:
+                    yield from pending_results.popleft().get()
+
+            while pending_results:
+                yield from pending_results.popleft().get()
+
+    def _iter_chunks_parsed_in_parallel(self):
+        """
+        Yields the dataframes of 'rows_per_read' rows (except
+        the last one) parsed from the byte ranges of the file.
+        """
+        if os.path.getsize(self.input_file) == 0:
+            return
+
+        with open(self.input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for df in self._iter_parsed_ranges(mm):
+                # e.g., blank lines at the end of the file
+                if not df.empty:
+                    yield df
+
+    def _get_chunk_iterator(self):
+        """
+        Same as the parent class' method, but the dataframes are
+        parsed from the byte ranges of the file in parallel.
+        """
+        if self.chunk_iterator is None:
+            self.logger.info(f"Parsing this file with {self.parse_workers} processes "
+                             f"in groups of chunks of about {self.range_size_mb} MB: "
+                             f"{self.input_file}")
+            self.chunk_iterator = self._iter_chunks_parsed_in_parallel()
+        return self.chunk_iterator
@@ -0,0 +1,134 @@
+"""
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import fnmatch
+import logging
+import os
+
+import pandas as pd
+
+from data_readers.compressed_files import list_zip_members
+from data_readers.csv_format_sniffer import resolve_csv_format
+from data_readers.pandas_csv_data_reader import PandasCSVDataReader
+from data_readers.pandas_file_data_reader import read_and_discard_dataframes
+
+
+class ZipMemberNotFoundError(Exception):
+    """
+    Raise this if none of the files in the zip file
+    matches 'input_zip_member_pattern' in the config.
+    """
+
+    def __init__(self, error_msg):
+        super().__init__(error_msg)
+
+
+class PandasZipDataReader:
+    """
+    This class reads the CSV (and TXT) files in a zip file one after
+    another, chunk by chunk, as if they were one file, without
+    extracting them to disk. Each file (member) is decompressed as
+    it is read by its own PandasCSVDataReader (one at a time), so
+    the rest of the parameters (e.g., 'header', 'skiprows' and
+    'input_delimiter') apply to every member, and no dataframe has
+    rows from more than one member.
+
+    Members to read can be selected with a glob pattern of their
+    names (including the folders in the zip file, e.g., 'Sizmek/*.csv')
+    as 'input_zip_member_pattern' in the config (default: all).
+    If 'zip_member_name_column' is provided in the config, name
+    of the member that the rows come from is added to each
+    dataframe as a column with that name.
+    REF: https://docs.python.org/3/library/zipfile.html#zipfile.ZipFile.open
+    """
+    KEY_ZIP_MEMBER_PATTERN = 'input_zip_member_pattern'
+    DEFAULT_ZIP_MEMBER_PATTERN = '*'
+
+    KEY_ZIP_MEMBER_NAME_COLUMN = 'zip_member_name_column'
+    DEFAULT_ZIP_MEMBER_NAME_COLUMN = None
+
+    # Members that can be read by PandasCSVDataReader
+    CSV_FILE_EXTENSIONS = ['.csv', '.txt']
+
+    def __init__(self, input_file_path_and_name, config):
+        self.logger = logging.getLogger(__name__)
+        self.input_file = input_file_path_and_name
+        self.config = config
+        self.member_name_column = config.get(self.KEY_ZIP_MEMBER_NAME_COLUMN,
+                                             self.DEFAULT_ZIP_MEMBER_NAME_COLUMN)
+        self.members = self._select_members(list_zip_members(self.input_file),
+                                            config.get(self.KEY_ZIP_MEMBER_PATTERN,
+                                                       self.DEFAULT_ZIP_MEMBER_PATTERN))
+        self.logger.info(f"Reading these files one after another from "
+                         f"the zip file, {self.input_file}: {self.members}")
+
+        # Index (in self.members) of the member we are reading
+        # and its reader, which is created only when we start
+        # reading the member (i.e. after we finish the previous one).
+        self.member_idx = 0
+        self.member_reader = None
+        # Number of times read_next_dataframe is called
+        self.read_iter_count = 0
+
+    def _select_members(self, all_members, member_pattern):
+        """
+        Returns the CSV/TXT members whose names match the pattern
+        (in the order they are stored in the zip file).
+        """
+        members = [member for member in all_members
+                   if (os.path.splitext(member)[1].lower() in self.CSV_FILE_EXTENSIONS)
+                   and fnmatch.fnmatchcase(member, member_pattern)]
+        if not members:
+            raise ZipMemberNotFoundError(f"None of the CSV/TXT files in the zip file, "
+                                         f"{self.input_file}, matches '{member_pattern}' in "
+                                         f"'{self.KEY_ZIP_MEMBER_PATTERN}'. The zip file "
+                                         f"has these files: {all_members}")
+        return members
+
+    def _get_member_reader(self):
+        """
+        Returns the reader of the member we are reading. Encoding
+        and delimiter set to 'auto' are detected for each member.
+        """
+        if self.member_reader is None:
+            member = self.members[self.member_idx]
+            member_config = resolve_csv_format(self.input_file,
+                                               self.config,
+                                               PandasCSVDataReader.KEY_INPUT_FILE_ENCODING,
+                                               PandasCSVDataReader.KEY_INPUT_CSV_DELIMITER,
+                                               zip_member=member)
+            self.member_reader = PandasCSVDataReader(self.input_file,
+                                                     member_config,
+                                                     zip_member=member)
+        return self.member_reader
+
+    def read_next_dataframe(self):
+        """
+        Reads the next dataframe from the member we are reading
+        and moves on to the next member when there is nothing more
+        to read from it. Returns an empty dataframe only after
+        all the members are read.
+        """
+        self.read_iter_count += 1
+        while self.member_idx < len(self.members):
+            df = self._get_member_reader().read_next_dataframe()
+            if not df.empty:
+                if self.member_name_column is not None:
+                    df[self.member_name_column] = self.members[self.member_idx]
+                return df
+
+            self.member_idx += 1
+            self.member_reader = None
+
+        # Nothing more to read, thus returns an empty data frame
+        return pd.DataFrame()
+
+    def skip_dataframes(self, dataframe_count):
+        """
+        Skips the next 'dataframe_count' dataframes (e.g., the ones
+        already transformed before the program was stopped). Because
+        we don't know how many dataframes each member has without
+        reading it, this reads and discards the dataframes.
+        """
+        read_and_discard_dataframes(self, dataframe_count)
@@ -0,0 +1,226 @@
+"""
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import logging
+import os
+
+try:
+    import polars as pl
+except ImportError:
+    # Polars is only needed if 'dataframe_backend' is 'polars'
+    pl = None
+
+from data_readers.pandas_file_data_reader import PandasFileDataReader
+
+
+class PolarsDataReader(PandasFileDataReader):
+    """
+    This class uses Polars to read Polars dataframe from a CSV,
+    Parquet or Arrow IPC (Feather v2) file (used when
+    'dataframe_backend' in the config is 'polars'). Polars parses
+    the file with all CPU cores and only the columns listed in
+    'input_columns' (if provided) are read.
+
+    Parameters in the config are the same as the ones for
+    PandasCSVDataReader and PandasArrowDataReader (e.g., 'header',
+    'skiprows' and 'skipfooter'), which is why this class inherits
+    from PandasFileDataReader. For Parquet and Arrow IPC files,
+    'header' and 'skiprows' are ignored like in PandasArrowDataReader.
+    REF: https://pola-rs.github.io/polars/user-guide/io/
+    """
+    KEY_INPUT_CSV_DELIMITER = 'input_delimiter'
+    DEFAULT_INPUT_CSV_DELIMITER = ','
+
+    PARQUET_FILE_EXTENSION = '.parquet'
+    ARROW_FILE_EXTENSIONS = ['.arrow', '.feather']
+
+    # Polars data types to use for the data types in
+    # 'column_data_types' (which are pandas' data type names)
+    POLARS_DATA_TYPES = {} if pl is None else {
+        'category': pl.Categorical,
+        'object': pl.Utf8,
+        'string': pl.Utf8,
+        'str': pl.Utf8,
+        'int64': pl.Int64,
+        'Int64': pl.Int64,
+        'int32': pl.Int32,
+        'Int32': pl.Int32,
+        'float64': pl.Float64,
+        'Float64': pl.Float64,
+        'float32': pl.Float32,
+        'Float32': pl.Float32,
+        'bool': pl.Boolean,
+        'boolean': pl.Boolean
+    }
+
+    def __init__(self, input_file_path_and_name, config):
+        if pl is None:
+            raise ImportError(f"polars must be installed to read this "
+                              f"file: {input_file_path_and_name}")
+
+        super().__init__(config)
+        self.logger = logging.getLogger(__name__)
+        self.input_file = input_file_path_and_name
+        self.file_extension = os.path.splitext(self.input_file)[1].lower()
+        self.delimiter = config.get(self.KEY_INPUT_CSV_DELIMITER,
+                                    self.DEFAULT_INPUT_CSV_DELIMITER)
+
+        self.all_headers = self.read_header_row()
+        self.headers = self._select_input_columns(self.all_headers)
+        # Number of times read_next_dataframe is called
+        self.read_iter_count = 0
+
+        # Number of rows read from the file so far
+        self.rows_read = 0
+        # Iterator of Polars dataframes of 'rows_per_read' rows,
+        # which is created when we read the first dataframe.
+        self.chunk_iterator = None
+
+    def _is_csv(self):
+        return not ((self.file_extension == self.PARQUET_FILE_EXTENSION)
+                    or (self.file_extension in self.ARROW_FILE_EXTENSIONS))
+
+    def read_header_row(self):
+        """
+        Reads the column headers from the 'header' row of the CSV file
+        (or the schema of Parquet and Arrow IPC files). If the CSV file
+        has no header row, returns ['0', '1', '2', ...] because column
+        names of Polars dataframes must be strings.
+        """
+        if not self._is_csv():
+            return self._scan_file().collect_schema().names()
+
+        first_row_df = pl.read_csv(self.input_file,
+                                   has_header=False,
+                                   separator=self.delimiter,
+                                   skip_rows=self.header_row_index or 0,
+                                   n_rows=1,
+                                   infer_schema=False)
+        if self.header_row_index is None:
+            return [str(i) for i in range(first_row_df.width)]
+        return self._get_unique_column_names(first_row_df.row(0))
+
+    @staticmethod
+    def _get_unique_column_names(column_names):
+        """
+        Names empty and duplicate column names the same way pandas'
+        read_csv does (e.g., 'Unnamed: 3' and 'Brand.1'), because
+        column names of Polars dataframes must be unique, and so that
+        the functions (e.g., drop_unnamed_columns) work the same way.
+        """
+        unique_names = []
+        for i, name in enumerate(column_names):
+            name = name if name else f"Unnamed: {i}"
+            new_name, dup_count = name, 0
+            while new_name in unique_names:
+                dup_count += 1
+                new_name = f"{name}.{dup_count}"
+            unique_names.append(new_name)
+        return unique_names
+
+    def _scan_file(self):
+        """
+        Returns Polars' LazyFrame of the file, which reads
+        nothing until it is collected.
+        """
+        if self.file_extension == self.PARQUET_FILE_EXTENSION:
+            return pl.scan_parquet(self.input_file)
+        if self.file_extension in self.ARROW_FILE_EXTENSIONS:
+            return pl.scan_ipc(self.input_file)
+        return pl.scan_csv(self.input_file,
+                           has_header=False,
+                           separator=self.delimiter,
+                           skip_rows=self.skip_rows,
+                           new_columns=self.all_headers,
+                           # Like pandas with keep_default_na=False,
+                           # empty cells are read as empty strings.
+                           empty_string_is_null=self.keep_default_na,
+                           truncate_ragged_lines=True)
+
+    def _iter_chunks(self):
+        """
+        Yields dataframes of exactly 'rows_per_read' rows (except the
+        last one), which Polars reads in batches in the background.
+        REF: https://docs.pola.rs/api/python/stable/reference/lazyframe/api/polars.LazyFrame.collect_batches.html
+        """
+        lf = self._scan_file()
+        if self.input_column_indexes is not None:
+            lf = lf.select(self.headers)
+
+        buffer_df = None
+        for batch_df in lf.collect_batches(chunk_size=self.rows_per_read):
+            buffer_df = batch_df if buffer_df is None else pl.concat([buffer_df, batch_df])
+            while buffer_df.height >= self.rows_per_read:
+                yield buffer_df.slice(0, self.rows_per_read)
+                buffer_df = buffer_df.slice(self.rows_per_read)
+
+        if (buffer_df is not None) and (buffer_df.height > 0):
+            yield buffer_df
+
+    def _read_dataframe(self,
+                        row_idx_to_start_reading,
+                        rows_to_read,
+                        verbose=True):
+        if self.chunk_iterator is None:
+            self.chunk_iterator = self._iter_chunks()
+
+        df = next(self.chunk_iterator, None)
+        if df is None:
+            # Nothing more to read, thus returns an empty data frame
+            return pl.DataFrame(schema=self.headers)
+
+        if verbose:
+            self.logger.info(
+                f"Reading data between row range: {self.rows_read+1} "
+                f"=> {self.rows_read+df.height}\n"
+                f"from this file: {self.input_file}")
+        self.rows_read += df.height
+        return df
+
+    def _hold_back_footer_rows(self, df):
+        """Same as the parent class' method, but for Polars dataframes."""
+        if self.footer_buffer_df is not None:
+            if df.is_empty():
+                self.logger.info(
+                    f"Dropped this number of rows of data from the "
+                    f"bottom of the file: {self.skip_footer}"
+                    f"\nThe following rows are dropped:\n"
+                    f"{self.footer_buffer_df}")
+                self.footer_buffer_df = None
+                return df
+
+            df = pl.concat([self.footer_buffer_df, df])
+
+        if df.is_empty():
+            return df
+
+        self.footer_buffer_df = df.slice(df.height - self.skip_footer)
+        return df.slice(0, df.height - self.skip_footer)
+
+    def _get_low_cardinality_text_columns(self, df):
+        """Same as the parent class' method, but for Polars dataframes."""
+        max_unique_values = self.max_unique_value_ratio_for_category * df.height
+        return [col for col, data_type in df.schema.items()
+                if (data_type == pl.Utf8) and (df[col].n_unique() <= max_unique_values)]
+
+    def _apply_data_types(self, df):
+        """
+        Same as the parent class' method, but for Polars dataframes.
+        Data types in 'column_data_types' must be one of the keys in
+        POLARS_DATA_TYPES.
+        """
+        if df.is_empty() or not (self.column_data_types or self.convert_low_cardinality_columns):
+            return df
+
+        data_types = self._get_data_types_to_apply(df)
+        if not data_types:
+            return df
+        return df.with_columns([pl.col(col).cast(self.POLARS_DATA_TYPES[data_type])
+                                for col, data_type in data_types.items()])
+
+    def skip_dataframes(self, dataframe_count):
+        """Same as the parent class' method, but for Polars dataframes."""
+        for _ in range(dataframe_count):
+            if self.read_next_dataframe().is_empty():
+                break
@@ -2,6 +2,7 @@ import csv
 import logging
 
 from data_writers.file_data_writer import FileDataWriter
+from dataframe_backends import is_polars_dataframe, to_pandas
 
 
 class CSVDataWriter(FileDataWriter):
@@ -25,6 +26,17 @@ class CSVDataWriter(FileDataWriter):
         "csv.QUOTE_NONE": csv.QUOTE_NONE
     }
 
+    # Polars' quote_style for each of the quoting values above
+    # REF: https://docs.pola.rs/api/python/stable/reference/api/polars.DataFrame.write_csv.html
+    POLARS_QUOTE_STYLE_DICT = {
+        csv.QUOTE_ALL: 'always',
+        csv.QUOTE_MINIMAL: 'necessary',
+        csv.QUOTE_NONNUMERIC: 'non_numeric',
+        csv.QUOTE_NONE: 'never'
+    }
+    # Polars only writes UTF-8 CSV files
+    POLARS_OUTPUT_ENCODINGS = [None, 'utf-8', 'utf8']
+
     OUTPUT_FILE_EXTENSION = '.csv'
 
     def __init__(self, config):
@@ -48,11 +60,24 @@ class CSVDataWriter(FileDataWriter):
             out_file = output_file_path_and_name
 
         self.logger.info(f"Writing data to: {out_file}")
-        df.to_csv(
+        if self._can_write_polars_dataframe(df) \
+                and (self.output_file_encoding in self.POLARS_OUTPUT_ENCODINGS):
+            return self._write_to_temp_file_and_rename(
+                out_file,
+                lambda f: df.write_csv(
+                    f,
+                    separator=self.output_csv_delimiter,
+                    quote_style=self.POLARS_QUOTE_STYLE_DICT[self.quoting]
+                ))
+
+        df = to_pandas(df)
+        return self._write_to_temp_file_and_rename(
             out_file,
-            sep=self.output_csv_delimiter,
-            line_terminator='',
-            index=self.include_index,
-            encoding=self.output_file_encoding,
-            quoting=self.quoting
-        )
+            lambda f: df.to_csv(
+                f,
+                sep=self.output_csv_delimiter,
+                line_terminator='',
+                index=self.include_index,
+                encoding=self.output_file_encoding,
+                quoting=self.quoting
+            ))
@@ -1,6 +1,7 @@
 import logging
 
 from data_writers.file_data_writer import FileDataWriter
+from dataframe_backends import to_pandas
 
 
 class ExcelDataWriter(FileDataWriter):
@@ -33,14 +34,17 @@ class ExcelDataWriter(FileDataWriter):
             out_file = output_file_path_and_name
 
         self.logger.info(f"Writing data to: {out_file}")
-        df.to_excel(
+        df = to_pandas(df)
+        return self._write_to_temp_file_and_rename(
             out_file,
-            sheet_name=self.sheet_name,
-            index=self.include_index,
-            # For to_excel method, encoding parameter is
-            # only necessary for xlwt writer. Otherwise,
-            # we can leave it as None by default (which
-            # is what we defined in FileDataWriter)
-            # REF: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.to_excel.html
-            encoding=self.output_file_encoding
-        )
+            lambda f: df.to_excel(
+                f,
+                sheet_name=self.sheet_name,
+                index=self.include_index,
+                # For to_excel method, encoding parameter is
+                # only necessary for xlwt writer. Otherwise,
+                # we can leave it as None by default (which
+                # is what we defined in FileDataWriter)
+                # REF: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.to_excel.html
+                encoding=self.output_file_encoding
+            ))
@@ -0,0 +1,76 @@
+"""
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import logging
+
+try:
+    import pyarrow.feather
+except ImportError:
+    # pyarrow is only needed to write Feather files,
+    # so the other writers work without it.
+    pyarrow = None
+
+from data_writers.file_data_writer import FileDataWriter
+from dataframe_backends import to_pandas
+
+
+class FeatherDataWriter(FileDataWriter):
+    """
+    This class is a wrapper to pyarrow's write_feather method.
+    We can use this class to write dataframe to Feather (Arrow IPC)
+    file as output. Feather files can be memory-mapped by the reader,
+    which makes them the fastest to reload in the next transform
+    step, while Parquet files are usually smaller.
+
+    We call pyarrow instead of pandas' to_feather method, because
+    pandas (before version 1.1) doesn't pass 'compression' on to it.
+    """
+
+    # Compression codec to use: 'lz4', 'zstd' or 'uncompressed'.
+    # REF: https://arrow.apache.org/docs/python/generated/pyarrow.feather.write_feather.html
+    KEY_OUTPUT_COMPRESSION = 'output_compression'
+    DEFAULT_OUTPUT_COMPRESSION = 'lz4'
+
+    OUTPUT_FILE_EXTENSION = '.feather'
+
+    def __init__(self, config):
+        if pyarrow is None:
+            raise ImportError("pyarrow must be installed to write Feather files")
+
+        super().__init__(config)
+        self.logger = logging.getLogger(__name__)
+        self.compression = config.get(
+            self.KEY_OUTPUT_COMPRESSION,
+            self.DEFAULT_OUTPUT_COMPRESSION)
+
+    def _get_output_file_extension(self):
+        return self.OUTPUT_FILE_EXTENSION
+
+    def write_data(self, df, output_file_path_and_name=None):
+        if not output_file_path_and_name:
+            out_file = self._get_output_file_path_and_name()
+        else:
+            out_file = output_file_path_and_name
+
+        self.logger.info(f"Writing data to: {out_file}")
+        if self._can_write_polars_dataframe(df):
+            return self._write_to_temp_file_and_rename(
+                out_file,
+                lambda f: df.write_ipc(
+                    f,
+                    compression=self.compression
+                ))
+
+        # Feather format can't store pandas' index, so we either
+        # drop it or turn it into a column, based on the config.
+        df = to_pandas(df).reset_index(drop=not self.include_index)
+
+        df = self._convert_mixed_type_columns_to_str(df)
+        return self._write_to_temp_file_and_rename(
+            out_file,
+            lambda f: pyarrow.feather.write_feather(
+                df,
+                f,
+                compression=self.compression
+            ))
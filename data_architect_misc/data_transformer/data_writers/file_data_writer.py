@@ -2,6 +2,10 @@ from datetime import datetime
 import logging
 import os
 
+import pandas as pd
+
+from dataframe_backends import is_polars_dataframe
+
 
 class FileDataWriter:
     """
@@ -33,6 +37,13 @@ class FileDataWriter:
     KEY_OUTPUT_FILE_ENCODING = 'output_encoding'
     DEFAULT_OUTPUT_FILE_ENCODING = None
 
+    # Output files are first written in this sub-folder of the
+    # output folder and moved to the output folder only when
+    # they are completely written, so that the program crashing
+    # in the middle of writing never leaves a half-written file
+    # (which the next step may pick up as its input) behind.
+    INCOMPLETE_OUTPUT_FOLDER_NAME = '.incomplete'
+
     def __init__(self, config):
         self.logger = logging.getLogger(__name__)
 
@@ -78,6 +89,53 @@ class FileDataWriter:
         """
         pass
 
+    def _can_write_polars_dataframe(self, df):
+        """
+        Checks if the dataframe is a Polars dataframe that the writer
+        can write without converting it to pandas first. Polars
+        dataframes have no index, so they are converted if the
+        index column must be included in the output.
+        """
+        return is_polars_dataframe(df) and not self.include_index
+
+    def _convert_mixed_type_columns_to_str(self, df):
+        """
+        Columns read from CSV and Excel files often end up with
+        mixed types of values (e.g., numbers and empty strings
+        in the same column because 'keep_default_na' is False).
+        Typed file formats like Parquet can't store such columns,
+        so this method converts them to string columns.
+        REF: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.api.types.infer_dtype.html
+        """
+        mixed_type_cols = [col for col in df.select_dtypes(include='object').columns
+                           if pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed')]
+        if mixed_type_cols:
+            self.logger.info(f"These columns have mixed types of values and "
+                             f"will be written as strings: {mixed_type_cols}")
+            df = df.copy()
+            for col in mixed_type_cols:
+                # Missing values stay missing instead of becoming 'nan'
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return df
+
+    def _write_to_temp_file_and_rename(self, out_file, write_func):
+        """
+        Calls write_func with the path of a temporary file (which has
+        the same name and extension as the output file, because
+        some writers decide the file format based on the extension)
+        and then renames the temporary file to the output file.
+        Returns the output file path and name.
+        REF: https://docs.python.org/3/library/os.html#os.replace
+        """
+        tmp_folder = os.path.join(os.path.dirname(os.path.abspath(out_file)),
+                                  self.INCOMPLETE_OUTPUT_FOLDER_NAME)
+        os.makedirs(tmp_folder, exist_ok=True)
+        tmp_file = os.path.join(tmp_folder, os.path.basename(out_file))
+
+        write_func(tmp_file)
+        os.replace(tmp_file, out_file)
+        return out_file
+
     def _get_output_folder(self, config):
         """
         Extracts the output folder path and name from the config JSON.
@@ -91,7 +149,9 @@ class FileDataWriter:
                                    self.DEFAULT_OUTPUT_FOLDER_PATH)
 
         if not os.path.exists(output_folder):
-            os.makedirs(output_folder)
+            # exist_ok because another process transforming
+            # a different input file may create it first
+            os.makedirs(output_folder, exist_ok=True)
             self.logger.info(f"New folder created for output files: "
                              f"{output_folder}")
         return output_folder
@@ -1,7 +1,7 @@
 import logging
 import urllib
 
-from sqlalchemy import create_engine
+from dataframe_backends import to_pandas
 
 
 class DBSchemaNotDefinedError(Exception):
@@ -149,6 +149,10 @@ class MSSQLDataWriter:
         REF 4: https://pandas.pydata.org/pandas-docs/stable/user_guide/io.html#engine-connection-examples
         https://web.archive.org/web/20200325023532/https://pandas.pydata.org/pandas-docs/stable/user_guide/io.html
         """
+        # Imported here (not at the top) because transform_constants.py
+        # imports this module for every run, even if the output is not
+        # written to SQL Server, and SQLAlchemy takes a while to import.
+        from sqlalchemy import create_engine
 
         pyodbc_connection_str = self.PYODBC_BASE_URL.format(urllib.parse.quote_plus(
             "DRIVER={0};SERVER={1};DATABASE={2};PORT={3};UID={4};PWD={5};{6}".format(self.driver,
@@ -175,6 +179,7 @@ class MSSQLDataWriter:
             f"{self.server}; {self.database}; {self.db_schema}; "
             f"{self.output_sql_table_name}")
 
+        df = to_pandas(df)
         df.to_sql(
             name=self.output_sql_table_name,
             con=self._get_sqlalchemy_engine(),
@@ -0,0 +1,72 @@
+"""
+Author: Phyo Thiha
+Last Modified Date: October 18, 2026
+"""
+import logging
+
+from data_writers.file_data_writer import FileDataWriter
+from dataframe_backends import to_pandas
+
+
+class ParquetDataWriter(FileDataWriter):
+    """
+    This class is a wrapper to pandas' to_parquet' method (which
+    requires pyarrow). We can use this class to write dataframe
+    to Parquet file as output. Parquet files keep the data types
+    of the columns and are compressed, so they are much smaller
+    and faster to read than CSV or Excel files when we hand the
+    output of one transform step to the next.
+    """
+
+    # Compression codec to use: 'snappy', 'gzip', 'brotli', 'zstd' or None.
+    # REF: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.to_parquet.html
+    KEY_OUTPUT_COMPRESSION = 'output_compression'
+    DEFAULT_OUTPUT_COMPRESSION = 'snappy'
+
+    # Number of rows per row group. Readers (e.g., PandasArrowDataReader)
+    # can stream the file one row group at a time, so smaller row groups
+    # use less memory to read but make the file a little bigger.
+    KEY_OUTPUT_ROW_GROUP_SIZE = 'output_row_group_size'
+    DEFAULT_OUTPUT_ROW_GROUP_SIZE = 100000
+
+    OUTPUT_FILE_EXTENSION = '.parquet'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.logger = logging.getLogger(__name__)
+        self.compression = config.get(
+            self.KEY_OUTPUT_COMPRESSION,
+            self.DEFAULT_OUTPUT_COMPRESSION)
+        self.row_group_size = config.get(
+            self.KEY_OUTPUT_ROW_GROUP_SIZE,
+            self.DEFAULT_OUTPUT_ROW_GROUP_SIZE)
+
+    def _get_output_file_extension(self):
+        return self.OUTPUT_FILE_EXTENSION
+
+    def write_data(self, df, output_file_path_and_name=None):
+        if not output_file_path_and_name:
+            out_file = self._get_output_file_path_and_name()
+        else:
+            out_file = output_file_path_and_name
+
+        self.logger.info(f"Writing data to: {out_file}")
+        if self._can_write_polars_dataframe(df):
+            return self._write_to_temp_file_and_rename(
+                out_file,
+                lambda f: df.write_parquet(
+                    f,
+                    compression=self.compression or 'uncompressed',
+                    row_group_size=self.row_group_size
+                ))
+
+        df = self._convert_mixed_type_columns_to_str(to_pandas(df))
+        return self._write_to_temp_file_and_rename(
+            out_file,
+            lambda f: df.to_parquet(
+                f,
+                engine='pyarrow',
+                compression=self.compression,
+                index=self.include_index,
+                row_group_size=self.row_group_size
+            ))
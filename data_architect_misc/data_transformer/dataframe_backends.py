@@ -0,0 +1,123 @@
+"""
+Dataframe backends that transform.py can use (selected per config
+with 'dataframe_backend' key): pandas (default) or Polars.
+
+With Polars backend, CSV, Parquet and Arrow (Feather) files are read
+with Polars (see data_readers/polars_data_reader.py), the functions
+that have Polars implementations (see POLARS_FUNCTION_NAMES of
+transform_functions/polars_common_transform_functions.py) run on
+Polars dataframes, which are multi-threaded and columnar, and CSV,
+Parquet and Feather writers write Polars dataframes directly.
+
+Any other reader, transform function (e.g., functions in the
+transform functions class of a country) or writer still works
+because the dataframe is converted to pandas before it is passed
+to them (and back to Polars for the next Polars function). So, the
+configs don't need to change, but it is the fastest when consecutive
+functions in 'functions_to_apply' have Polars implementations.
+
+Polars is imported only when it is used (it takes a while to import
+and most configs don't use it). Until then, no dataframe can be a
+Polars dataframe, which is how is_polars_dataframe tells without
+importing Polars.
+REF: https://pola-rs.github.io/polars/user-guide/
+"""
+import importlib.util
+import sys
+
+import pandas as pd
+
+BACKEND_PANDAS = 'pandas'
+BACKEND_POLARS = 'polars'
+BACKENDS = [BACKEND_PANDAS, BACKEND_POLARS]
+
+
+def check_backend(backend):
+    """Raises error if the backend is unknown or its package is not installed."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Dataframe backend must be one of {BACKENDS}, "
+                         f"but got: {backend}")
+    # find_spec finds the package without importing it
+    # REF: https://docs.python.org/3/library/importlib.html#importlib.util.find_spec
+    if (backend == BACKEND_POLARS) and (importlib.util.find_spec('polars') is None):
+        raise ImportError("Please install polars in Python 3.9 or later (>> pip install -r "
+                          "requirements_polars.txt) to use Polars as dataframe backend.")
+
+
+def is_polars_dataframe(df):
+    pl = sys.modules.get('polars')
+    return (pl is not None) and isinstance(df, pl.DataFrame)
+
+
+def is_dataframe(df):
+    """Checks if it is a dataframe transform functions can return."""
+    return isinstance(df, pd.DataFrame) or is_polars_dataframe(df)
+
+
+def is_empty(df):
+    """
+    Same as pandas' DataFrame.empty (i.e. no rows or no columns)
+    for both pandas and Polars dataframes.
+    """
+    return 0 in df.shape
+
+
+def to_pandas(df):
+    """Returns the dataframe as pandas dataframe."""
+    if is_polars_dataframe(df):
+        return df.to_pandas()
+    return df
+
+
+def to_polars(df):
+    """Returns the dataframe as Polars dataframe."""
+    if is_polars_dataframe(df):
+        return df
+
+    import polars as pl
+    # Polars column names must be strings (pandas uses 0, 1, 2, ...
+    # as column names if the file has no header row) and the index
+    # is dropped because Polars dataframes don't have one.
+    df = df.rename(columns=str).reset_index(drop=True)
+    return pl.from_pandas(df)
+
+
+class _FunctionInBackend:
+    """
+    Transform function (used in the execution plan) that converts
+    the dataframe to the backend the function works with (only if
+    it isn't already) before calling the function.
+    """
+
+    def __init__(self, function, backend):
+        self.function = function
+        self.backend = backend
+
+    def __call__(self, df, *args, **kwargs):
+        if self.backend == BACKEND_POLARS:
+            df = to_polars(df)
+        else:
+            df = to_pandas(df)
+        return self.function(df, *args, **kwargs)
+
+
+def get_polars_function_names(transform_funcs_kls):
+    return getattr(transform_funcs_kls, 'POLARS_FUNCTION_NAMES', frozenset())
+
+
+def set_backends_in_execution_plan(execution_plan, transform_funcs_kls, step_class):
+    """
+    Returns the execution plan in which each step (of step_class, i.e.
+    ExecutionStep) gets a Polars dataframe if the transform functions
+    class has Polars implementation of its function and a pandas
+    dataframe otherwise.
+    """
+    polars_function_names = get_polars_function_names(transform_funcs_kls)
+    return tuple(step_class(step.function_name,
+                            _FunctionInBackend(step.function,
+                                               BACKEND_POLARS
+                                               if step.function_name in polars_function_names
+                                               else BACKEND_PANDAS),
+                            step.args,
+                            step.kwargs)
+                 for step in execution_plan)
@@ -18,6 +18,8 @@ import json
 import os
 
 from constants.transform_constants import *
+from data_readers.pandas_excel_data_reader import PandasExcelDataReader
+from data_readers.pandas_multi_sheet_excel_data_reader import PandasMultiSheetExcelDataReader
 
 CONFIG_TEMPLATE = [
     {
@@ -85,6 +87,12 @@ CONFIG_TEMPLATE = [
             f"the sheet name to read/process. If you leave this key undefined, "
             f"the program will read first sheet, with index "
             f"{PandasExcelDataReader.DEFAULT_SHEET_TO_READ} by default. "
+            f"To read more than one sheet one after another, set this key "
+            f"to null (all sheets), a list of sheet names (e.g., [\"Jan\", \"Feb\"]) "
+            f"or a glob pattern (e.g., \"2019_*\"); the name of the sheet each "
+            f"row comes from is then added as a column named by "
+            f"'{PandasMultiSheetExcelDataReader.KEY_SHEET_NAME_COLUMN}' key "
+            f"(default: '{PandasMultiSheetExcelDataReader.DEFAULT_SHEET_NAME_COLUMN}'). "
             f"You can also leave this key undefined if your input file is not "
             f"a CSV file or if you are okay with the default value below.",
         f"{PandasExcelDataReader.KEY_SHEET_NAME}":
@@ -95,6 +103,8 @@ CONFIG_TEMPLATE = [
             f"the delimiter used in that input file. If you leave this key undefined, "
             f"the program will use the default delimiter value as "
             f"'{PandasCSVDataReader.KEY_INPUT_CSV_DELIMITER}'. "
+            f"If input files in the folder use different delimiters, set this "
+            f"key to 'auto' to detect the delimiter of each file. "
             f"You can also leave this key undefined if your input file is not "
             f"a CSV file or if you are okay with the default value below.",
         f"{PandasCSVDataReader.KEY_INPUT_CSV_DELIMITER}":
@@ -104,7 +114,9 @@ CONFIG_TEMPLATE = [
             f"(Optional) If your input file(s) is/are CSV, you can define "
             f"the encoding used in that input file. If you leave this key undefined, "
             f"the program will use the default encoding value as None, which "
-            f"will be interpreted as 'utf-8' encoding by Pandas."
+            f"will be interpreted as 'utf-8' encoding by Pandas. "
+            f"If input files in the folder use different encodings (e.g., "
+            f"UTF-16), set this key to 'auto' to detect the encoding of each file. "
             f"You can also leave this key undefined if your input file is not "
             f"a CSV file or if you are okay with the default value below.",
         f"{PandasCSVDataReader.KEY_INPUT_FILE_ENCODING}": 'utf-8',
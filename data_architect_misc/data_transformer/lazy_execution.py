@@ -0,0 +1,228 @@
+"""
+Lazy execution of 'functions_to_apply' (turned on with
+'lazy_execution' key in the config).
+
+Many common transform functions make a full pass over the dataframe
+(and often a copy of the column they update) just to rename columns,
+add a column with a fixed value or map the values of a column. A config
+with dozens of such steps therefore makes dozens of passes over every
+chunk. In lazy execution mode, consecutive steps that are column-wise
+expressions (see _get_expressions_of_step) are not run one by one.
+Instead, they are collected into a single expression plan:
+- renaming columns only changes the list of column names, which is
+  assigned to the dataframe once at the end,
+- functions that update values in a column are composed into one
+  function per column, which is applied once per column (and only
+  to the unique values of the column if all of them are strings,
+  which is common for low-cardinality columns like 'Country'), and
+- columns with fixed values are added once at the end.
+The plan is then executed once per chunk. Steps that can't be
+expressed this way (e.g., functions that drop rows or are
+overridden in a custom transform functions class) are executed
+eagerly as before.
+
+Note: Columns updated in lazy mode come out as 'object' (or the
+inferred) data type even if they were 'category' before.
+"""
+import types
+
+import numpy as np
+import pandas as pd
+
+# Only the functions defined in this class can be fused because we
+# know what they do. If a custom transform functions class overrides
+# any of them, that one is executed eagerly.
+FUSIBLE_FUNCTIONS_CLASS_NAME = 'CommonTransformFunctions'
+
+# Kinds of expressions in the plan
+_RENAME_COLUMNS = 'rename_columns'
+_UPDATE_COLUMN_NAMES = 'update_column_names'
+_UPDATE_VALUES = 'update_values'
+_ADD_FIXED_VALUE_COLUMN = 'add_fixed_value_column'
+
+
+class _FixedValue:
+    """Marks a column whose values are all the same value."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _map_value(value, value_mapping):
+    """
+    Same as pandas' map(value_mapping).fillna(original value)
+    (which update_str_values_in_columns does) for a single value.
+    """
+    try:
+        new_value = value_mapping.get(value)
+    except TypeError:
+        # Unhashable values can't be in the mapping
+        return value
+    if (new_value is None) or (isinstance(new_value, float) and np.isnan(new_value)):
+        return value
+    return new_value
+
+
+def _get_expressions_of_step(transform_funcs_kls, step):
+    """
+    Returns the list of expressions equivalent to the step or None if
+    the step can't be fused (including when its arguments are invalid,
+    in which case the function is executed eagerly to raise the error).
+    """
+    if step.kwargs:
+        return None
+
+    function_name, args = step.function_name, step.args
+    if function_name == 'rename_columns' and (len(args) == 1) and isinstance(args[0], dict):
+        return [(_RENAME_COLUMNS, args[0])]
+    if function_name == 'capitalize_column_names' and not args:
+        return [(_UPDATE_COLUMN_NAMES, lambda name: name.upper())]
+    if function_name == 'trim_space_around_column_names' and not args:
+        return [(_UPDATE_COLUMN_NAMES, lambda name: name.strip())]
+    if function_name == 'capitalize_first_letter_of_each_word_in_columns' \
+            and (len(args) == 1) and isinstance(args[0], list):
+        return [(_UPDATE_VALUES, (col_name, transform_funcs_kls._cap_sentence))
+                for col_name in args[0]]
+    if function_name == 'capitalize_all_letters_of_each_word_in_columns' \
+            and (len(args) == 1) and isinstance(args[0], list):
+        return [(_UPDATE_VALUES, (col_name, lambda s: s.upper())) for col_name in args[0]]
+    if function_name == 'update_str_values_in_columns' and (len(args) == 2) \
+            and isinstance(args[0], list) and isinstance(args[1], list) \
+            and (len(args[0]) == len(args[1])):
+        return [(_UPDATE_VALUES, (col_name, lambda v, m=value_mapping: _map_value(v, m)))
+                for col_name, value_mapping in zip(args[0], args[1])]
+    if function_name == 'add_new_column_with_fixed_str_value' and (len(args) == 2) \
+            and isinstance(args[0], str) and isinstance(args[1], str):
+        return [(_ADD_FIXED_VALUE_COLUMN, (args[0], args[1]))]
+    return None
+
+
+def _is_fusible_function(transform_funcs_kls, function_name):
+    """
+    Checks if the function used for the step is the one defined in
+    CommonTransformFunctions (i.e. not overridden by a subclass).
+    """
+    for kls in type(transform_funcs_kls).__mro__:
+        if function_name in vars(kls):
+            return kls.__name__ == FUSIBLE_FUNCTIONS_CLASS_NAME
+    return False
+
+
+def _compose(functions):
+    def composed_function(value):
+        for f in functions:
+            value = f(value)
+        return value
+    return composed_function
+
+
+def _apply_to_values(series, functions):
+    """
+    Applies the functions (one after another) to each value of the
+    series in one pass. If all values are strings, the functions are
+    applied only to the unique values and the results are spread back.
+    """
+    f = _compose(functions)
+    if pd.api.types.infer_dtype(series, skipna=False) == 'string':
+        # REF: https://pandas.pydata.org/docs/reference/api/pandas.factorize.html
+        codes, unique_values = pd.factorize(series)
+        new_unique_values = np.empty(len(unique_values), dtype=object)
+        new_unique_values[:] = [f(v) for v in unique_values]
+        return pd.Series(new_unique_values.take(codes), index=series.index).infer_objects()
+    return series.map(f)
+
+
+class FusedColumnExpressions:
+    """
+    Transform function (used in the execution plan) that executes
+    the expressions of several consecutive steps in a single pass.
+    """
+
+    def __init__(self, function_names, expressions):
+        self.function_names = function_names
+        self.expressions = expressions
+
+    def __call__(self, df):
+        col_names = list(df.columns)
+        # Source of each column: its index in the original dataframe
+        # or _FixedValue, and functions to apply to its values
+        sources = list(range(len(col_names)))
+        value_functions = [[] for _ in col_names]
+
+        for kind, params in self.expressions:
+            if kind == _RENAME_COLUMNS:
+                col_names = [params.get(c, c) for c in col_names]
+            elif kind == _UPDATE_COLUMN_NAMES:
+                col_names = [params(c) for c in col_names]
+            elif kind == _UPDATE_VALUES:
+                col_name, f = params
+                col_indexes = [i for i, c in enumerate(col_names) if c == col_name]
+                if not col_indexes:
+                    # Same error as accessing df[col_name] in eager mode
+                    raise KeyError(col_name)
+                for i in col_indexes:
+                    value_functions[i].append(f)
+            elif kind == _ADD_FIXED_VALUE_COLUMN:
+                col_name, value = params
+                col_indexes = [i for i, c in enumerate(col_names) if c == col_name]
+                if not col_indexes:
+                    col_names.append(col_name)
+                    sources.append(None)
+                    value_functions.append([])
+                    col_indexes = [len(col_names) - 1]
+                for i in col_indexes:
+                    sources[i] = _FixedValue(value)
+                    value_functions[i] = []
+
+        # Columns are labeled by their positions while we set their
+        # values, so that duplicate column names are not a problem and
+        # new columns are added at the end (in the order of col_names).
+        df.columns = pd.RangeIndex(df.shape[1])
+        for i, source in enumerate(sources):
+            if isinstance(source, _FixedValue):
+                values = _compose(value_functions[i])(source.value)
+            elif value_functions[i]:
+                values = _apply_to_values(df.iloc[:, source], value_functions[i])
+            else:
+                continue
+            df[i] = values
+
+        df.columns = col_names
+        return df
+
+
+def fuse_execution_plan(execution_plan, transform_funcs_kls, step_class):
+    """
+    Returns the execution plan in which each run of two or more
+    consecutive steps that can be fused is replaced by one step
+    (of step_class, i.e. ExecutionStep) that runs FusedColumnExpressions.
+    """
+    fused_plan = []
+    run_of_steps = []
+
+    def add_run_of_steps_to_plan():
+        if len(run_of_steps) > 1:
+            function_names = [s.function_name for s, _ in run_of_steps]
+            fused_plan.append(step_class(
+                f"fused({', '.join(function_names)})",
+                FusedColumnExpressions(function_names,
+                                       [e for _, exprs in run_of_steps for e in exprs]),
+                (),
+                types.MappingProxyType({})))
+        else:
+            fused_plan.extend([s for s, _ in run_of_steps])
+        run_of_steps.clear()
+
+    for step in execution_plan:
+        expressions = None
+        if _is_fusible_function(transform_funcs_kls, step.function_name):
+            expressions = _get_expressions_of_step(transform_funcs_kls, step)
+
+        if expressions is None:
+            add_run_of_steps_to_plan()
+            fused_plan.append(step)
+        else:
+            run_of_steps.append((step, expressions))
+    add_run_of_steps_to_plan()
+
+    return tuple(fused_plan)
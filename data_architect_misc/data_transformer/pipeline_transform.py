@@ -0,0 +1,343 @@
+"""
+Read 'DESC' in the code below to see what this script is for.
+"""
+
+import argparse
+import collections
+import datetime
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import traceback
+
+import pandas as pd
+
+from constants.transform_constants import KEY_WRITE_OUTPUT
+from dataframe_backends import to_pandas
+import transform
+import transform_errors
+import transform_utils
+
+DESC = """This program runs the steps of a multi-step transform (e.g.,
+transform the raw NonTV, TV and ByIndustry files of a country and then
+combine them) defined in a pipeline file (JSON). The steps form a DAG
+(directed acyclic graph): each step runs as soon as the steps it depends
+on have finished, so independent steps run at the same time if more than
+one worker is used.
+\nA step can read the output of other steps directly (listed in 'inputs').
+The transformed dataframes of those steps are concatenated (in the order
+listed) and passed to the step's 'functions_to_apply' in memory, instead
+of writing timestamped output files and re-globbing them in the next config.
+Such a step's config doesn't need 'input_folder_path' and
+'input_file_name_or_pattern'.
+\nUsage example:
+    >> python pipeline_transform.py -p ./configs/NA_United_States/pipeline.json -w 3
+where pipeline.json looks like:
+    {"steps": [
+        {"name": "nontv",
+         "config": "./configs/NA_United_States/step1_transform_raw_nontv_investment_data.json",
+         "input_file": "./input/NA_United_States/NonTV_20200801.xlsx",
+         "write_output": false},
+        {"name": "tv",
+         "config": "./configs/NA_United_States/step2_transform_raw_tv_investment_data.json",
+         "write_output": false},
+        {"name": "combine",
+         "config": "./configs/NA_United_States/combine.json",
+         "inputs": ["nontv", "tv"]},
+        {"name": "upload",
+         "config": "./configs/NA_United_States/upload.json",
+         "depends_on": ["combine"]}
+    ]}
+'input_file' (optional) is the same as transform.py's '-i' flag,
+'write_output' (optional) overrides the one in the step's config and
+'depends_on' lists the steps that must finish before the step even
+though it doesn't read their output in memory (e.g., it reads their
+output files itself)."""
+
+P_FLAG_HELP_TEXT = """[Required] Pipeline file (JSON) that defines the steps to run.
+E.g., python pipeline_transform.py -p ./configs/NA_United_States/pipeline.json"""
+
+W_FLAG_HELP_TEXT = """[Optional] Number of worker processes to run independent
+steps in parallel (default: 1). Dataframes passed between steps are copied
+from one process to another, so use '-if' flag if they are too big for that.
+E.g., python pipeline_transform.py -p ./configs/NA_United_States/pipeline.json -w 3"""
+
+IF_FLAG_HELP_TEXT = """[Optional] Folder to pass the output of the steps to the
+steps that read it as Parquet files (named after the step) instead of in memory.
+Parquet keeps the data types of the columns and is much faster to write and
+read than CSV or Excel.
+E.g., python pipeline_transform.py -p ./configs/NA_United_States/pipeline.json
+-if ./output/NA_United_States/intermediate"""
+
+L_FLAG_HELP_TEXT = """[Optional] List the steps in the order they will run,
+along with the steps each depends on, and exit without running them.
+E.g., python pipeline_transform.py -p ./configs/NA_United_States/pipeline.json -l"""
+
+KEY_PIPELINE_STEPS = 'steps'
+KEY_STEP_NAME = 'name'
+KEY_STEP_CONFIG_FILE = 'config'
+KEY_STEP_INPUT_FILE = 'input_file'
+KEY_STEP_INPUTS = 'inputs'
+KEY_STEP_DEPENDS_ON = 'depends_on'
+KEY_STEP_WRITE_OUTPUT = 'write_output'
+
+INTERMEDIATE_DATA_FILE_EXTENSION = '.parquet'
+
+PipelineStep = collections.namedtuple('PipelineStep', ['name',
+                                                       'config_file',
+                                                       'input_file',
+                                                       'inputs',
+                                                       'depends_on',
+                                                       'write_output'])
+
+logger = logging.getLogger(__name__)  # ('pipeline_transform.py')
+
+
+def load_pipeline_steps(pipeline_file):
+    """
+    Returns the list of steps (PipelineStep) in the pipeline file
+    after checking that every step they refer to is defined.
+    """
+    steps = [PipelineStep(s[KEY_STEP_NAME],
+                          s[KEY_STEP_CONFIG_FILE],
+                          s.get(KEY_STEP_INPUT_FILE),
+                          s.get(KEY_STEP_INPUTS, []),
+                          s.get(KEY_STEP_DEPENDS_ON, []),
+                          s.get(KEY_STEP_WRITE_OUTPUT))
+             for s in transform_utils.load_config(pipeline_file)[KEY_PIPELINE_STEPS]]
+
+    step_names = [s.name for s in steps]
+    duplicate_names = set([n for n in step_names if step_names.count(n) > 1])
+    if duplicate_names:
+        raise transform_errors.PipelineDefinitionError(
+            f"Step names must be unique in the pipeline file: {sorted(duplicate_names)}")
+
+    for step in steps:
+        unknown_names = [n for n in step.inputs + step.depends_on if n not in step_names]
+        if unknown_names:
+            raise transform_errors.PipelineDefinitionError(
+                f"Step '{step.name}' depends on step(s) not defined "
+                f"in the pipeline file: {unknown_names}")
+        if not os.path.exists(step.config_file):
+            raise transform_errors.FileNotFound(step.config_file)
+    return steps
+
+
+def get_step_dependencies(steps):
+    """Returns {step name => set of names of the steps that must finish before it}."""
+    return {s.name: set(s.inputs + s.depends_on) for s in steps}
+
+
+def sort_steps_by_dependencies(steps, dependencies):
+    """
+    Returns the step names in the order they can run one after
+    another (keeping the order in the pipeline file where possible).
+    REF: https://en.wikipedia.org/wiki/Topological_sorting#Kahn's_algorithm
+    """
+    sorted_step_names = []
+    remaining = [s.name for s in steps]
+    while remaining:
+        ready = [n for n in remaining if dependencies[n].issubset(sorted_step_names)]
+        if not ready:
+            raise transform_errors.PipelineDefinitionError(
+                f"These steps depend on each other in a cycle: {remaining}")
+        sorted_step_names.append(ready[0])
+        remaining.remove(ready[0])
+    return sorted_step_names
+
+
+def _get_steps_read_by_others(steps):
+    return set([n for s in steps for n in s.inputs])
+
+
+def _load_step_inputs(step, step_outputs):
+    """
+    Returns the outputs of the steps the step reads, concatenated in
+    the order listed in its 'inputs'. Each output is either a dataframe
+    (passed in memory) or the Parquet file it was written to.
+    """
+    dfs = [pd.read_parquet(step_outputs[n]) if isinstance(step_outputs[n], str)
+           else to_pandas(step_outputs[n])
+           for n in step.inputs]
+    return pd.concat(dfs, ignore_index=True, sort=False)
+
+
+def _transform_step_inputs(input_df, config):
+    """
+    Applies the functions in the config to the dataframe from the
+    steps before and writes the result (if instructed in the config).
+    """
+    df = transform_utils.apply_execution_plan(input_df.copy(),
+                                              transform.compile_execution_plan(config))
+    if transform_utils.get_write_data_decision(config):
+        data_writer_kls = transform_utils.instantiate_data_writer_class(config)
+        data_writer_kls.set_output_file_name_suffix(f"rows_0_{df.shape[0]}")
+        data_writer_kls.write_data(df)
+    return df
+
+
+def run_pipeline_step(step, step_outputs, keep_output, intermediate_data_folder=None):
+    """
+    Runs each config in the step's config file on the outputs of the
+    steps it reads (if any) or on its input files. Errors are caught
+    and returned so that the steps that don't depend on it can go on.
+
+    If keep_output is True, the transformed dataframes of the step are
+    returned in the result (or written to a Parquet file in
+    intermediate_data_folder, whose path is returned instead) for the
+    steps that read them.
+    """
+    start_dt = datetime.datetime.now()
+    output_dfs = []
+    try:
+        input_df = _load_step_inputs(step, step_outputs) if step.inputs else None
+        for config in transform_utils.load_config(step.config_file):
+            if step.input_file:
+                config = transform_utils.insert_input_file_keys_values_to_config_json(
+                    step.input_file, config)
+            if step.write_output is not None:
+                config[KEY_WRITE_OUTPUT] = step.write_output
+
+            transform_utils.validate_configurations(config, input_file_keys_required=input_df is None)
+            if input_df is not None:
+                output_dfs.append(_transform_step_inputs(input_df, config))
+                continue
+
+            config = transform_utils.insert_inferred_input_columns_to_config_json(config)
+            execution_plan = transform.compile_execution_plan(config)
+            for input_file in transform_utils.get_input_files(config):
+                transform.transform_input_file(input_file, config,
+                                               execution_plan=execution_plan,
+                                               output_dataframes=output_dfs if keep_output else None)
+
+        output = None
+        if keep_output:
+            output = pd.concat([to_pandas(df) for df in output_dfs], ignore_index=True, sort=False) \
+                if output_dfs else pd.DataFrame()
+            if intermediate_data_folder:
+                os.makedirs(intermediate_data_folder, exist_ok=True)
+                output_file = os.path.join(intermediate_data_folder,
+                                           f"{step.name}{INTERMEDIATE_DATA_FILE_EXTENSION}")
+                output.to_parquet(output_file, index=False)
+                output = output_file
+        error_msg = None
+    except Exception:
+        output = None
+        error_msg = traceback.format_exc()
+        logger.error(f"Failed to run this step: {step.name}\n{error_msg}")
+
+    return {'step_name': step.name,
+            'output': output,
+            'secs': (datetime.datetime.now() - start_dt).total_seconds(),
+            'error': error_msg}
+
+
+def run_pipeline_steps(steps, dependencies, workers, intermediate_data_folder=None):
+    """
+    Runs each step as soon as all the steps it depends on have finished
+    successfully. Steps that depend on a failed step are not run.
+    Returns the results of the steps in the order they finished.
+    """
+    steps_by_name = {s.name: s for s in steps}
+    steps_read_by_others = _get_steps_read_by_others(steps)
+    results = []
+    finished_queue = queue.Queue()
+    pending = sort_steps_by_dependencies(steps, dependencies)
+    step_outputs = {}
+    succeeded, failed = set(), set()
+    running_count = 0
+
+    pool = multiprocessing.Pool(processes=workers,
+                                initializer=transform.set_logging_config) \
+        if workers > 1 else None
+    try:
+        while pending or running_count:
+            for n in list(pending):
+                if dependencies[n] & failed:
+                    pending.remove(n)
+                    failed.add(n)
+                    results.append({'step_name': n, 'output': None, 'secs': 0,
+                                    'error': 'Skipped because a step it depends on failed.'})
+                elif dependencies[n].issubset(succeeded):
+                    pending.remove(n)
+                    running_count += 1
+                    step = steps_by_name[n]
+                    # Only the outputs the step reads are sent to it
+                    step_args = (step, {i: step_outputs[i] for i in step.inputs},
+                                 n in steps_read_by_others, intermediate_data_folder)
+                    if pool:
+                        pool.apply_async(run_pipeline_step, step_args,
+                                         callback=finished_queue.put,
+                                         error_callback=lambda e, n=n: finished_queue.put(
+                                             {'step_name': n, 'output': None,
+                                              'secs': 0, 'error': repr(e)}))
+                    else:
+                        finished_queue.put(run_pipeline_step(*step_args))
+
+            if running_count:
+                result = finished_queue.get()
+                running_count -= 1
+                step_outputs[result['step_name']] = result.pop('output')
+                results.append(result)
+                (failed if result['error'] else succeeded).add(result['step_name'])
+
+            # Free the outputs that no step waiting to run reads anymore
+            for n in list(step_outputs):
+                if not any(n in steps_by_name[p].inputs for p in pending):
+                    del step_outputs[n]
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    return results
+
+
+def log_pipeline_summary(results):
+    """Logs how each step went and returns the number of steps that failed."""
+    failed_results = [r for r in results if r['error'] is not None]
+    summary = '\n'.join([f"{'FAILED' if r['error'] else 'OK'}: {r['step_name']} "
+                         f"({r['secs']:.1f} secs)"
+                         + (f"\n    {r['error'].strip().splitlines()[-1]}" if r['error'] else '')
+                         for r in results])
+    logger.info(f"Ran {len(results) - len(failed_results)} out of "
+                f"{len(results)} step(s) successfully:\n{summary}")
+    return len(failed_results)
+
+
+if __name__ == '__main__':
+    transform.set_logging_config()
+
+    parser = argparse.ArgumentParser(
+        description=DESC,
+        formatter_class=argparse.RawTextHelpFormatter,
+        usage=argparse.SUPPRESS)
+    parser.add_argument('-p', required=True, type=str,
+                        help=P_FLAG_HELP_TEXT)
+    parser.add_argument('-w', '--workers', required=False, type=int,
+                        default=1, help=W_FLAG_HELP_TEXT)
+    parser.add_argument('-if', '--intermediate_data_folder', required=False, type=str,
+                        help=IF_FLAG_HELP_TEXT)
+    parser.add_argument('-l', '--list', required=False, action='store_true',
+                        help=L_FLAG_HELP_TEXT)
+    args = parser.parse_args()
+
+    pipeline_steps = load_pipeline_steps(args.p)
+    step_dependencies = get_step_dependencies(pipeline_steps)
+
+    if args.list:
+        logger.info('Steps will run in this order:\n' + '\n'.join(
+            [f"{i+1}. {n}" + (f" (depends on: {', '.join(sorted(step_dependencies[n]))})"
+                              if step_dependencies[n] else '')
+             for i, n in enumerate(sort_steps_by_dependencies(pipeline_steps,
+                                                              step_dependencies))]))
+        sys.exit()
+
+    pipeline_results = run_pipeline_steps(pipeline_steps, step_dependencies,
+                                          args.workers, args.intermediate_data_folder)
+    failed_step_count = log_pipeline_summary(pipeline_results)
+    if failed_step_count:
+        sys.exit(f"{failed_step_count} step(s) failed. "
+                 f"See the pipeline summary above for details.")
@@ -0,0 +1,214 @@
+"""
+Manifest that remembers which input files were transformed
+successfully (and with which config and transform code), so
+that transform.py can skip the input files that haven't changed
+since the last run and transform only the new or changed ones.
+
+Each input file is fingerprinted by its size, modified time and
+content hash. The config and the modules it uses (transform
+functions and data writer modules, along with the modules of
+their parent classes) are fingerprinted by their hashes. If any
+of these changes, the input file is transformed again. To avoid
+hashing big input files on every run, we reuse the content hash
+recorded in the manifest if the size and the modified time of
+the file are the same as before.
+"""
+from datetime import datetime
+import hashlib
+import inspect
+import json
+import logging
+import os
+
+from constants.transform_constants import DEFAULT_COMMON_TRANSFORM_FUNCTIONS_FILE, \
+    KEY_DATA_WRITER_MODULE_FILE, DEFAULT_DATA_WRITER_MODULE_FILE, KEY_CURRENT_INPUT_FILE
+import transform_utils
+
+# Bytes to read at a time when hashing files
+HASH_BLOCK_SIZE = 1024 * 1024
+
+STATUS_NEW = 'NEW'
+STATUS_CHANGED = 'CHANGED'
+STATUS_UNCHANGED = 'UNCHANGED'
+
+
+def get_file_hash(file_path_and_name):
+    """Returns SHA-256 hash of the file's content."""
+    h = hashlib.sha256()
+    with open(file_path_and_name, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def get_config_hash(config):
+    """
+    Returns SHA-256 hash of the config (ignoring the keys that
+    transform.py sets while transforming each input file).
+    """
+    config_to_hash = {k: v for k, v in config.items()
+                      if k != KEY_CURRENT_INPUT_FILE}
+    return hashlib.sha256(json.dumps(config_to_hash, sort_keys=True,
+                                     default=str).encode('utf-8')).hexdigest()
+
+
+def _get_module_files_of_class_hierarchy(module_file):
+    """
+    Returns the files of the modules in which the primary class of
+    the module file and its parent classes (i.e. the classes in its
+    method resolution order) are defined. For example, a custom
+    transform functions class inherits most of its functions from
+    common_transform_functions.py, so changes there matter, too.
+    REF: https://docs.python.org/3/library/inspect.html#inspect.getmro
+    """
+    kls = transform_utils.instantiate_class_in_module_file(module_file)
+    module_files = []
+    for parent_kls in inspect.getmro(kls):
+        try:
+            source_file = inspect.getsourcefile(parent_kls)
+        except TypeError:
+            # Built-in classes (e.g., object) have no source file
+            continue
+        if source_file is not None:
+            module_files.append(os.path.abspath(source_file))
+    return module_files
+
+
+def get_transform_modules_hash(config):
+    """
+    Returns SHA-256 hash of the transform functions module(s)
+    and data writer module used by the config (and the modules
+    of their parent classes), so that changes in the code also
+    cause the input files to be transformed again.
+    """
+    module_files = set()
+    for module_file in [DEFAULT_COMMON_TRANSFORM_FUNCTIONS_FILE,
+                        transform_utils.get_transform_functions_module_file(config),
+                        config.get(KEY_DATA_WRITER_MODULE_FILE,
+                                   DEFAULT_DATA_WRITER_MODULE_FILE)]:
+        if os.path.isfile(module_file):
+            module_files.add(os.path.abspath(module_file))
+            module_files.update(_get_module_files_of_class_hierarchy(module_file))
+
+    h = hashlib.sha256()
+    for module_file in sorted(module_files):
+        if os.path.isfile(module_file):
+            h.update(get_file_hash(module_file).encode('utf-8'))
+    return h.hexdigest()
+
+
+class RunManifest:
+    """
+    Reads and writes the manifest (JSON file) of a config file.
+    A config file can have more than one config (transform
+    procedure), so input files are recorded per config index.
+    """
+    MANIFEST_FILE_NAME_SUFFIX = '_manifest.json'
+
+    def __init__(self, manifest_folder, config_file):
+        self.logger = logging.getLogger(__name__)
+        self.manifest_file = os.path.join(manifest_folder,
+                                          self._get_manifest_file_name(config_file))
+        self.entries = self._load()
+
+    def _get_manifest_file_name(self, config_file):
+        """
+        Returns '<folder of config file>_<config file name>_manifest.json'
+        because config files in different folders often have the same
+        name (e.g., 'configs/<country>/config.json').
+        """
+        config_file = os.path.abspath(config_file)
+        folder_name = os.path.basename(os.path.dirname(config_file))
+        config_file_name = os.path.splitext(os.path.basename(config_file))[0]
+        return f"{folder_name}_{config_file_name}{self.MANIFEST_FILE_NAME_SUFFIX}"
+
+    def _load(self):
+        if not os.path.isfile(self.manifest_file):
+            return {}
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self):
+        """
+        Writes the manifest to a temporary file first and then
+        replaces the old one, so that the manifest isn't corrupted
+        if the program is stopped in the middle of writing.
+        """
+        manifest_folder = os.path.dirname(self.manifest_file)
+        if not os.path.exists(manifest_folder):
+            os.makedirs(manifest_folder, exist_ok=True)
+
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.manifest_file)
+
+    def _get_entries_of_config(self, config_idx):
+        return self.entries.setdefault(str(config_idx), {})
+
+    def _get_fingerprint(self, input_file, config, previous_entry=None):
+        """
+        Returns the fingerprint of the input file for the config.
+        The content hash in the previous entry is reused if the
+        size and modified time of the file are unchanged.
+        """
+        stat = os.stat(input_file)
+        if (previous_entry
+                and (previous_entry['size'] == stat.st_size)
+                and (previous_entry['mtime'] == stat.st_mtime)):
+            content_hash = previous_entry['content_hash']
+        else:
+            content_hash = get_file_hash(input_file)
+
+        return {'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'content_hash': content_hash,
+                'config_hash': get_config_hash(config),
+                'transform_modules_hash': get_transform_modules_hash(config)}
+
+    def get_status(self, config_idx, input_file, config):
+        """Returns whether the input file is NEW, CHANGED or UNCHANGED for the config."""
+        previous_entry = self._get_entries_of_config(config_idx).get(input_file)
+        if previous_entry is None:
+            return STATUS_NEW
+
+        fingerprint = self._get_fingerprint(input_file, config, previous_entry)
+        if all(previous_entry.get(k) == v for k, v in fingerprint.items()
+               if k != 'mtime'):
+            return STATUS_UNCHANGED
+        return STATUS_CHANGED
+
+    def get_input_files_to_transform(self, config_idx, input_files, config):
+        """
+        Returns the input files that are new or changed
+        since they were last transformed with the config.
+        """
+        input_files_to_transform = []
+        for input_file in input_files:
+            status = self.get_status(config_idx, input_file, config)
+            if status == STATUS_UNCHANGED:
+                self.logger.info(f"Skipping this input file because it is unchanged "
+                                 f"since the last run: {input_file}")
+            else:
+                input_files_to_transform.append(input_file)
+        return input_files_to_transform
+
+    def record_transformed_file(self, config_idx, input_file, config, rows_written):
+        """Records the input file as successfully transformed with the config."""
+        entries = self._get_entries_of_config(config_idx)
+        entry = self._get_fingerprint(input_file, config, entries.get(input_file))
+        entry['rows_written'] = rows_written
+        entry['transformed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        entries[input_file] = entry
+
+    def log_status(self, config_idx, input_files, config):
+        """Logs the status of each input file and when it was last transformed."""
+        entries = self._get_entries_of_config(config_idx)
+        lines = []
+        for input_file in input_files:
+            entry = entries.get(input_file, {})
+            lines.append(f"{self.get_status(config_idx, input_file, config)}: {input_file}"
+                         + (f" (last transformed at {entry['transformed_at']}, "
+                            f"{entry['rows_written']} rows written)" if entry else ''))
+        self.logger.info(f"Status of input files of config #{config_idx} "
+                         f"in manifest file: {self.manifest_file}\n" + '\n'.join(lines))
@@ -0,0 +1,348 @@
+"""
+Machine-readable record (telemetry) of what each run of transform.py
+did, so that schedulers and monitoring tools can track throughput
+of the config files over time and alert on slowdowns and failures.
+
+If telemetry is turned on in transform.py (with '-tm' flag), the
+following are recorded for each chunk of each input file: rows in
+and out, time spent waiting for the reader (to read the chunk), in
+each function of 'functions_to_apply' and waiting for the writer
+(to write the chunk), and the latency of the chunk (sum of them).
+They are summed up per input file along with bytes read and written,
+and per config file (run). At the end of the run, the records are
+written in one of these formats:
+1. JSON Lines: one JSON object (record) per line, appended to the
+   same file run after run, so that the history can be loaded into
+   any tool (e.g., pandas' read_json with lines=True).
+   REF: https://jsonlines.org/
+2. Prometheus text format: a '.prom' file per config file, replaced
+   by every run, for node_exporter's textfile collector to pick up.
+   REF: https://prometheus.io/docs/instrumenting/exposition_formats/
+   REF: https://github.com/prometheus/node_exporter#textfile-collector
+"""
+from datetime import datetime
+import json
+import logging
+import os
+import time
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_PROMETHEUS = 'prometheus'
+FORMATS = [FORMAT_JSONL, FORMAT_PROMETHEUS]
+
+RECORD_TYPE_CHUNK = 'chunk'
+RECORD_TYPE_FILE = 'file'
+RECORD_TYPE_RUN = 'run'
+
+STATUS_OK = 'OK'
+STATUS_FAILED = 'FAILED'
+
+# Metrics of input files in Prometheus format: (name, help text, key of file record)
+PROMETHEUS_FILE_METRICS = [
+    ('transform_file_success', "1 if the input file was transformed successfully, 0 otherwise.", None),
+    ('transform_file_rows_read', "Rows read from the input file.", 'rows_in'),
+    ('transform_file_rows_written', "Rows written for the input file.", 'rows_out'),
+    ('transform_file_bytes_read', "Size of the input file in bytes.", 'input_bytes'),
+    ('transform_file_bytes_written', "Size of the output files written in bytes.", 'output_bytes'),
+    ('transform_file_chunks', "Chunks of the input file transformed.", 'chunks'),
+    ('transform_file_duration_seconds', "Time taken to transform the input file.", 'wall_secs'),
+    ('transform_file_reader_wait_seconds', "Time spent waiting for the reader.", 'read_wait_secs'),
+    ('transform_file_writer_wait_seconds', "Time spent waiting for the writer.", 'write_wait_secs'),
+    ('transform_file_max_chunk_latency_seconds', "Latency of the slowest chunk.",
+     'max_chunk_latency_secs'),
+    ('transform_file_rows_per_second', "Rows read per second.", 'rows_per_sec'),
+]
+
+# Metrics of the run in Prometheus format: (name, help text, key of run record)
+PROMETHEUS_RUN_METRICS = [
+    ('transform_run_success', "1 if every input file was transformed successfully, 0 otherwise.", None),
+    ('transform_run_last_timestamp_seconds', "Unix time when the run finished.", 'finished_at_unix'),
+    ('transform_run_duration_seconds', "Time taken by the run.", 'wall_secs'),
+    ('transform_run_files', "Input files transformed (or failed to).", 'files'),
+    ('transform_run_failed_files', "Input files that failed to transform.", 'failed_files'),
+    ('transform_run_rows_read', "Rows read from the input files.", 'rows_in'),
+    ('transform_run_rows_written', "Rows written for the input files.", 'rows_out'),
+    ('transform_run_bytes_read', "Size of the input files in bytes.", 'input_bytes'),
+    ('transform_run_bytes_written', "Size of the output files written in bytes.", 'output_bytes'),
+]
+
+
+def _round(secs):
+    return round(secs, 6)
+
+
+def _get_file_size(file_path_and_name):
+    """Returns size of the file or None if it is not a file (e.g., a SQL table)."""
+    if file_path_and_name and os.path.isfile(file_path_and_name):
+        return os.path.getsize(file_path_and_name)
+    return None
+
+
+class FileTelemetry:
+    """
+    Measures the transform of an input file chunk by chunk. Time
+    between the end of a chunk (or the start of the file) and the
+    start of the next chunk is the time spent waiting for the reader.
+    """
+
+    def __init__(self, input_file):
+        self.input_file = input_file
+        self.input_bytes = _get_file_size(input_file)
+        self.start_time = time.perf_counter()
+        self.last_chunk_end_time = self.start_time
+        self.chunk_records = []
+        self.output_files = []
+        # Time spent waiting for the background writer to
+        # finish writing after the last chunk was submitted
+        self.final_write_wait_secs = 0
+        self.current_chunk = None
+
+    def start_chunk(self, chunk_index, rows_in):
+        now = time.perf_counter()
+        self.current_chunk = {
+            'record_type': RECORD_TYPE_CHUNK,
+            'input_file': self.input_file,
+            'chunk_index': chunk_index,
+            'rows_in': rows_in,
+            'rows_out': None,
+            'read_wait_secs': _round(now - self.last_chunk_end_time),
+            'transform_secs': 0,
+            'write_wait_secs': 0,
+            'latency_secs': None,
+            'step_secs': [],
+        }
+
+    def record_step(self, function_name, secs):
+        self.current_chunk['step_secs'].append({'function_name': function_name,
+                                                'secs': _round(secs)})
+        self.current_chunk['transform_secs'] = _round(self.current_chunk['transform_secs'] + secs)
+
+    def end_chunk(self, rows_out, write_wait_secs):
+        now = time.perf_counter()
+        chunk = self.current_chunk
+        chunk['rows_out'] = rows_out
+        chunk['write_wait_secs'] = _round(write_wait_secs)
+        # From when we started waiting for the chunk to be read
+        # until it is written (or handed to the background writer)
+        chunk['latency_secs'] = _round(now - self.last_chunk_end_time)
+        self.chunk_records.append(chunk)
+        self.current_chunk = None
+        self.last_chunk_end_time = now
+
+    def add_output_file(self, output_file):
+        """Called (possibly from the writer thread) for each output file written."""
+        if output_file:
+            self.output_files.append(output_file)
+
+    def add_final_write_wait(self, secs):
+        self.final_write_wait_secs += secs
+
+    def get_records(self, rows_written, status=STATUS_OK, error=None):
+        """
+        Returns the records of the chunks (finished ones only) and the
+        record of the input file, which sums up those of the chunks.
+        """
+        wall_secs = time.perf_counter() - self.start_time
+        rows_in = sum(c['rows_in'] for c in self.chunk_records)
+        step_secs = {}
+        for c in self.chunk_records:
+            for s in c['step_secs']:
+                step_secs[s['function_name']] = _round(step_secs.get(s['function_name'], 0)
+                                                       + s['secs'])
+        output_sizes = [_get_file_size(f) for f in self.output_files]
+        latencies = [c['latency_secs'] for c in self.chunk_records]
+
+        file_record = {
+            'record_type': RECORD_TYPE_FILE,
+            'input_file': self.input_file,
+            'status': status,
+            'error': error,
+            'chunks': len(self.chunk_records),
+            'rows_in': rows_in,
+            'rows_out': sum(c['rows_out'] for c in self.chunk_records),
+            'rows_written': rows_written,
+            'input_bytes': self.input_bytes,
+            'output_files': len(self.output_files),
+            'output_bytes': sum(s for s in output_sizes if s is not None),
+            'wall_secs': _round(wall_secs),
+            'read_wait_secs': _round(sum(c['read_wait_secs'] for c in self.chunk_records)),
+            'transform_secs': _round(sum(c['transform_secs'] for c in self.chunk_records)),
+            'write_wait_secs': _round(sum(c['write_wait_secs'] for c in self.chunk_records)
+                                      + self.final_write_wait_secs),
+            'max_chunk_latency_secs': max(latencies) if latencies else None,
+            'mean_chunk_latency_secs': _round(sum(latencies) / len(latencies)) if latencies else None,
+            'rows_per_sec': round(rows_in / wall_secs, 1) if wall_secs else None,
+            'mb_per_sec': (round(self.input_bytes / (1024 * 1024) / wall_secs, 3)
+                           if (wall_secs and self.input_bytes is not None) else None),
+            'step_secs': step_secs,
+        }
+        return self.chunk_records + [file_record]
+
+
+class RunTelemetry:
+    """
+    Collects the records of the input files transformed with
+    the configs in a config file and writes them, along with the
+    record of the run, in JSON Lines or Prometheus text format.
+    """
+    JSONL_FILE_NAME = 'transform_telemetry.jsonl'
+    PROMETHEUS_FILE_EXTENSION = '.prom'
+
+    def __init__(self, config_file=None):
+        self.logger = logging.getLogger(__name__)
+        self.config_file = config_file
+        self.config_index = None
+        self.started_at = datetime.now()
+        self.start_time = time.perf_counter()
+        # Tells the records of this run apart from the other runs'
+        # in the same JSON Lines file
+        self.run_id = f"{self.started_at.strftime('%Y%m%d_%H%M%S_%f')}_{os.getpid()}"
+        self.records = []
+
+    def set_config_index(self, config_index):
+        """Sets the index of the config in the config file the next records are of."""
+        self.config_index = config_index
+
+    def start_file(self, input_file):
+        return FileTelemetry(input_file)
+
+    def add_records(self, records):
+        """
+        Adds the records of input files (from FileTelemetry here
+        or from RunTelemetry in other (worker) processes).
+        """
+        for r in records:
+            r.update({'run_id': self.run_id,
+                      'config_file': self.config_file,
+                      'config_index': self.config_index})
+        self.records.extend(records)
+
+    def get_file_records(self):
+        return [r for r in self.records if r['record_type'] == RECORD_TYPE_FILE]
+
+    def get_run_record(self, status=None):
+        """
+        Returns the record of the run, which sums up those of the input
+        files. If status is not given, the run is OK if no file failed.
+        """
+        file_records = self.get_file_records()
+        failed_files = [r for r in file_records if r['status'] != STATUS_OK]
+        finished_at = datetime.now()
+        return {
+            'record_type': RECORD_TYPE_RUN,
+            'run_id': self.run_id,
+            'config_file': self.config_file,
+            'status': status or (STATUS_FAILED if failed_files else STATUS_OK),
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': finished_at.isoformat(timespec='seconds'),
+            'finished_at_unix': round(finished_at.timestamp(), 3),
+            'wall_secs': _round(time.perf_counter() - self.start_time),
+            'files': len(file_records),
+            'failed_files': len(failed_files),
+            'rows_in': sum(r['rows_in'] for r in file_records),
+            'rows_out': sum(r['rows_out'] for r in file_records),
+            'input_bytes': sum(r['input_bytes'] or 0 for r in file_records),
+            'output_bytes': sum(r['output_bytes'] for r in file_records),
+        }
+
+    def _write_jsonl(self, output_folder, run_record):
+        """Appends the records to the JSON Lines file in the output folder."""
+        jsonl_file = os.path.join(output_folder, self.JSONL_FILE_NAME)
+        lines = [json.dumps(r, default=str) for r in self.records + [run_record]]
+        # Written in one call so that the lines from other processes
+        # (e.g., config files run by batch_transform.py in parallel)
+        # appending to the same file don't get mixed up with ours
+        with open(jsonl_file, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return jsonl_file
+
+    @staticmethod
+    def _format_prometheus_labels(labels):
+        # REF: https://prometheus.io/docs/instrumenting/exposition_formats/#comments-help-text-and-type-information
+        escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                   for k, v in labels.items()]
+        return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+    def _get_prometheus_lines(self, run_record):
+        """Returns the lines of the records in Prometheus text format."""
+        run_labels = {'config_file': self.config_file}
+        file_records = self.get_file_records()
+
+        lines = []
+        for name, help_text, key in PROMETHEUS_RUN_METRICS:
+            value = (int(run_record['status'] == STATUS_OK) if key is None
+                     else run_record[key])
+            lines.extend([f"# HELP {name} {help_text}",
+                          f"# TYPE {name} gauge",
+                          f"{name}{self._format_prometheus_labels(run_labels)} {value}"])
+
+        for name, help_text, key in PROMETHEUS_FILE_METRICS:
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge"])
+            for r in file_records:
+                value = int(r['status'] == STATUS_OK) if key is None else r[key]
+                if value is None:
+                    continue
+                labels = dict(run_labels, config_index=r['config_index'],
+                              input_file=r['input_file'])
+                lines.append(f"{name}{self._format_prometheus_labels(labels)} {value}")
+
+        # Time spent in each function of 'functions_to_apply' (per config)
+        name = 'transform_step_duration_seconds'
+        lines.extend([f"# HELP {name} Time spent in the function of 'functions_to_apply'.",
+                      f"# TYPE {name} gauge"])
+        step_secs = {}
+        for r in file_records:
+            for function_name, secs in r['step_secs'].items():
+                key = (r['config_index'], function_name)
+                step_secs[key] = step_secs.get(key, 0) + secs
+        for (config_index, function_name), secs in step_secs.items():
+            labels = dict(run_labels, config_index=config_index, function_name=function_name)
+            lines.append(f"{name}{self._format_prometheus_labels(labels)} {_round(secs)}")
+        return lines
+
+    def _get_prometheus_file_name(self):
+        """
+        Returns '<folder of config file>_<config file name>.prom' because
+        config files in different folders often have the same name
+        (e.g., 'config.json').
+        """
+        config_file = os.path.abspath(self.config_file or 'transform')
+        folder_name = os.path.basename(os.path.dirname(config_file))
+        config_file_name = os.path.splitext(os.path.basename(config_file))[0]
+        return f"{folder_name}_{config_file_name}{self.PROMETHEUS_FILE_EXTENSION}"
+
+    def _write_prometheus(self, output_folder, run_record):
+        """
+        Writes the metrics to a temporary file first and then replaces
+        the old one, so that the textfile collector never reads a
+        half-written file.
+        """
+        prom_file = os.path.join(output_folder, self._get_prometheus_file_name())
+        tmp_file = f"{prom_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self._get_prometheus_lines(run_record)) + '\n')
+        os.replace(tmp_file, prom_file)
+        return prom_file
+
+    def write_report(self, output_folder, output_format=FORMAT_JSONL, status=None):
+        """
+        Writes the records (and the record of the run) in the output
+        format to the output folder. Returns the path of the file written.
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Telemetry format must be one of {FORMATS}, "
+                             f"but got: {output_format}")
+        if not os.path.exists(output_folder):
+            os.makedirs(output_folder, exist_ok=True)
+
+        run_record = self.get_run_record(status)
+        if output_format == FORMAT_PROMETHEUS:
+            output_file = self._write_prometheus(output_folder, run_record)
+        else:
+            output_file = self._write_jsonl(output_folder, run_record)
+
+        self.logger.info(f"Telemetry of the run ({run_record['status']}: "
+                         f"{run_record['rows_in']} rows read, "
+                         f"{run_record['rows_out']} rows written in "
+                         f"{run_record['wall_secs']:.1f} secs) is written to: {output_file}")
+        return output_file
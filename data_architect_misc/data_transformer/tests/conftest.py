@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+DATA_TRANSFORMER_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules of data_transformer import each other by their paths
+# relative to this folder (e.g., 'data_readers.file_data_reader'),
+# the same way they do when we run transform.py from there.
+sys.path.insert(0, DATA_TRANSFORMER_FOLDER)
+
+
+@pytest.fixture(autouse=True)
+def run_from_data_transformer_folder(monkeypatch):
+    """Paths in configs (e.g., './transform_functions/...') are relative to this folder."""
+    monkeypatch.chdir(DATA_TRANSFORMER_FOLDER)
+
+
+def read_all_dataframes(reader):
+    """Returns all the (non-empty) dataframes that the data reader reads."""
+    dfs = []
+    while True:
+        df = reader.read_next_dataframe()
+        if df.empty:
+            return dfs
+        dfs.append(df)
@@ -0,0 +1,25 @@
+import pytest
+
+from chunk_pipeline import BackgroundWriter, read_dataframes_in_background
+
+
+def test_reader_thread_error_that_is_not_exception_is_raised_in_main_thread():
+    def read_next_dataframe():
+        raise SystemExit(1)
+
+    with pytest.raises(SystemExit):
+        list(read_dataframes_in_background(read_next_dataframe, queue_size=2))
+
+
+def test_writer_thread_error_that_is_not_exception_is_raised_in_main_thread():
+    def write_data():
+        raise SystemExit(1)
+
+    writer = BackgroundWriter(queue_size=1)
+    writer.submit(write_data)
+    with pytest.raises(SystemExit):
+        # The queue is full unless the writer thread
+        # stops when the first write fails.
+        writer.submit(write_data)
+        writer.submit(write_data)
+        writer.close()
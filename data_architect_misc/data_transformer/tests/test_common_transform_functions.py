@@ -0,0 +1,17 @@
+import pandas as pd
+
+from transform_functions.common_transform_functions import CommonTransformFunctions
+
+
+def test_regex_mappings_changed_after_use_are_compiled_again():
+    transform_funcs = CommonTransformFunctions()
+    df = pd.DataFrame({'CATEGORY': [''], 'PRODUCT': ['Toothpaste']})
+    mappings = {'^Tooth': 'Oral Care'}
+    df = transform_funcs.update_col1_values_based_on_values_in_col2_using_regex_mapping(
+        df, 'CATEGORY', 'PRODUCT', mappings)
+    assert df['CATEGORY'].tolist() == ['Oral Care']
+
+    mappings['^Tooth'] = 'Toothpaste'
+    df = transform_funcs.update_col1_values_based_on_values_in_col2_using_regex_mapping(
+        df, 'CATEGORY', 'PRODUCT', mappings)
+    assert df['CATEGORY'].tolist() == ['Toothpaste']
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from data_readers import csv_format_sniffer
+
+
+@pytest.fixture
+def sniffed_formats_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_format_sniffer, '_SNIFFED_FORMATS', {})
+    csv_format_sniffer.set_sniffed_formats_folder(str(tmp_path / 'manifests'))
+    yield tmp_path / 'manifests'
+    csv_format_sniffer.set_sniffed_formats_folder(None)
+
+
+def _fail_to_sniff(*args, **kwargs):
+    raise AssertionError('The file should not be sniffed again')
+
+
+def test_sniffed_format_is_reused_in_later_runs(tmp_path, sniffed_formats_folder, monkeypatch):
+    input_file = tmp_path / 'input.csv'
+    input_file.write_text('CODE;SPEND\nA1;1.5\n', encoding='utf-8')
+    encoding, delimiter = csv_format_sniffer.sniff_csv_format(str(input_file))
+    assert delimiter == ';'
+    assert (sniffed_formats_folder / csv_format_sniffer.SNIFFED_FORMATS_FILE_NAME).is_file()
+
+    # Later run (or worker process) with an empty in-process cache
+    monkeypatch.setattr(csv_format_sniffer, '_SNIFFED_FORMATS', {})
+    monkeypatch.setattr(csv_format_sniffer, 'detect_encoding', _fail_to_sniff)
+    assert csv_format_sniffer.sniff_csv_format(str(input_file)) == (encoding, delimiter)
+
+
+def test_changed_file_is_sniffed_again(tmp_path, sniffed_formats_folder, monkeypatch):
+    input_file = tmp_path / 'input.csv'
+    input_file.write_text('CODE;SPEND\nA1;1.5\n', encoding='utf-8')
+    csv_format_sniffer.sniff_csv_format(str(input_file))
+
+    input_file.write_text('CODE|SPEND|DATE\nA1|1.5|2020-05-06\n', encoding='utf-8')
+    os.utime(str(input_file), ns=(0, 0))
+    monkeypatch.setattr(csv_format_sniffer, '_SNIFFED_FORMATS', {})
+    assert csv_format_sniffer.sniff_csv_format(str(input_file))[1] == '|'
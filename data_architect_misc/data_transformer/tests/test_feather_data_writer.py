@@ -0,0 +1,18 @@
+import pandas as pd
+import pyarrow.feather
+
+from data_writers.feather_data_writer import FeatherDataWriter
+
+
+def test_feather_file_is_written_without_pandas_to_feather(tmp_path, monkeypatch):
+    # pandas before version 1.1 doesn't pass 'compression' on to pyarrow
+    def to_feather_without_kwargs(df, path):
+        raise TypeError("to_feather() got an unexpected keyword argument 'compression'")
+    monkeypatch.setattr(pd.DataFrame, 'to_feather', to_feather_without_kwargs)
+
+    output_file = str(tmp_path / 'spend.feather')
+    df = pd.DataFrame({'CODE': ['A1', 'B2'], 'SPEND': [1.5, 2.0]})
+    FeatherDataWriter({'output_folder_path': str(tmp_path),
+                       'output_compression': 'zstd'}).write_data(df, output_file)
+
+    assert pyarrow.feather.read_table(output_file).to_pandas().equals(df)
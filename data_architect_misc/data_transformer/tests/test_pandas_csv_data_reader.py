@@ -0,0 +1,67 @@
+import bz2
+import gzip
+
+import pandas as pd
+import pytest
+
+from conftest import read_all_dataframes
+from data_readers import pandas_csv_data_reader
+from data_readers.pandas_csv_data_reader import (CSVChunkParsingError,
+                                                 PandasCSVDataReader)
+
+
+def test_read_in_single_pass_raises_error_with_row_on_blank_line_at_start_of_chunk(tmp_path):
+    input_file = tmp_path / 'blank_line.csv'
+    input_file.write_text('a,b\n1,2\n3,4\n\n5,6\n7,8\n')
+    reader = PandasCSVDataReader(str(input_file), {'header': 0,
+                                                   'skiprows': 1,
+                                                   'rows_per_read': 2})
+
+    assert reader.read_next_dataframe().values.tolist() == [[1, 2], [3, 4]]
+    with pytest.raises(CSVChunkParsingError, match=r"row 4 of this file: .*blank_line\.csv"):
+        reader.read_next_dataframe()
+
+
+def test_read_in_single_pass_reads_all_rows_after_blank_line_if_skipping_blank_lines(tmp_path):
+    input_file = tmp_path / 'blank_line.csv'
+    input_file.write_text('a,b\n1,2\n3,4\n\n5,6\n7,8\n')
+    reader = PandasCSVDataReader(str(input_file), {'header': 0,
+                                                   'skiprows': 1,
+                                                   'rows_per_read': 2,
+                                                   'skip_blank_lines': True})
+
+    dfs = read_all_dataframes(reader)
+    assert [df.values.tolist() for df in dfs] == [[[1, 2], [3, 4]], [[5, 6], [7, 8]]]
+    assert dfs[0].columns.tolist() == ['a', 'b']
+
+
+def _compress_with_zstd(data):
+    zstandard = pytest.importorskip('zstandard')
+    return zstandard.ZstdCompressor().compress(data)
+
+
+@pytest.mark.parametrize('read_in_single_pass', [True, False])
+@pytest.mark.parametrize('file_extension, compress', [('.gz', gzip.compress),
+                                                      ('.bz2', bz2.compress),
+                                                      ('.zst', _compress_with_zstd)])
+def test_compressed_file_is_decompressed_from_stream_instead_of_by_pandas(
+        tmp_path, monkeypatch, read_in_single_pass, file_extension, compress):
+    input_file = tmp_path / f'spend.csv{file_extension}'
+    input_file.write_bytes(compress(b'a,b\n1,2\n3,4\n5,6\n'))
+
+    # Older pandas can't infer some compressions (e.g., zstd) from the
+    # file extension, so the reader must never give pandas the path.
+    read_csv = pd.read_csv
+
+    def _read_csv_from_stream_only(filepath_or_buffer, *args, **kwargs):
+        assert not isinstance(filepath_or_buffer, str)
+        return read_csv(filepath_or_buffer, *args, **kwargs)
+
+    monkeypatch.setattr(pandas_csv_data_reader.pd, 'read_csv', _read_csv_from_stream_only)
+    reader = PandasCSVDataReader(str(input_file), {'header': 0,
+                                                   'skiprows': 1,
+                                                   'rows_per_read': 2,
+                                                   'read_in_single_pass': read_in_single_pass})
+
+    assert reader.headers == ['a', 'b']
+    assert [df.values.tolist() for df in read_all_dataframes(reader)] == [[[1, 2], [3, 4]], [[5, 6]]]
@@ -0,0 +1,22 @@
+import pytest
+
+from conftest import read_all_dataframes
+from data_readers.pandas_csv_data_reader import PandasCSVDataReader
+
+
+@pytest.mark.parametrize('read_in_single_pass', [True, False])
+def test_skipfooter_same_as_rows_per_read_drops_only_footer_rows(tmp_path, read_in_single_pass):
+    input_file = tmp_path / 'footer.csv'
+    data_rows = [f'{i},{i * 10}' for i in range(9)]
+    footer_rows = ['Total,360', 'Source: Nielsen', 'Copyright 2020']
+    input_file.write_text('\n'.join(['a,b'] + data_rows + footer_rows) + '\n')
+    reader = PandasCSVDataReader(str(input_file), {'header': 0,
+                                                   'skiprows': 1,
+                                                   'rows_per_read': 3,
+                                                   'skipfooter': 3,
+                                                   'read_in_single_pass': read_in_single_pass})
+
+    dfs = read_all_dataframes(reader)
+    assert [df.shape[0] for df in dfs] == [3, 3, 3]
+    assert [list(row) for df in dfs for row in df.astype(int).values] == \
+           [[i, i * 10] for i in range(9)]
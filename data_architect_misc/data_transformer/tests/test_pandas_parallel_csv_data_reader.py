@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import read_all_dataframes
+from data_readers.pandas_csv_data_reader import PandasCSVDataReader
+from data_readers.pandas_parallel_csv_data_reader import PandasParallelCSVDataReader
+
+
+def _read_in_serial_and_in_parallel(input_file, config, range_size_mb=1 / (1024 * 1024)):
+    serial_dfs = read_all_dataframes(PandasCSVDataReader(str(input_file), config))
+    # With the default range size of 1 byte, every
+    # chunk is parsed by a worker on its own.
+    parallel_config = dict(config, parse_workers=2, parse_range_size_mb=range_size_mb)
+    assert PandasParallelCSVDataReader.can_parse_in_parallel(str(input_file), parallel_config)
+    parallel_dfs = read_all_dataframes(PandasParallelCSVDataReader(str(input_file), parallel_config))
+    return serial_dfs, parallel_dfs
+
+
+def _get_values_and_their_types(df):
+    return [[(value, type(value)) for value in row] for row in df.values.tolist()]
+
+
+@pytest.mark.parametrize('range_size_mb', [1 / (1024 * 1024), 64])
+def test_parallel_reader_reads_same_data_types_as_serial_reader(tmp_path, range_size_mb):
+    input_file = tmp_path / 'spend.csv'
+    # Only the first chunk of 3 rows has text in CODE and decimals in SPEND
+    input_file.write_text('CODE,SPEND\nA1,1.5\n2,2\n3,3\n4,4\n5,5\n6,6\n')
+    serial_dfs, parallel_dfs = _read_in_serial_and_in_parallel(
+        input_file, {'header': 0, 'skiprows': 1, 'rows_per_read': 3}, range_size_mb)
+
+    assert [df.dtypes.to_dict() for df in parallel_dfs] == [df.dtypes.to_dict() for df in serial_dfs]
+    assert [_get_values_and_their_types(df) for df in parallel_dfs] == \
+           [_get_values_and_their_types(df) for df in serial_dfs]
+    assert parallel_dfs[1].values.tolist() == [[4, 4], [5, 5], [6, 6]]
+
+
+@pytest.mark.parametrize('skip_blank_lines', [True, False])
+def test_parallel_reader_parses_ranges_starting_with_blank_or_short_row(tmp_path, skip_blank_lines):
+    input_file = tmp_path / 'spend.csv'
+    input_file.write_text('CODE,SPEND,YEAR\n'
+                          'A1,1.5,2019\n\nB2,2,2019\n'
+                          'C3,3\nD4,4.5,2020\nE5,5,2020\n')
+    serial_dfs, parallel_dfs = _read_in_serial_and_in_parallel(
+        input_file, {'header': 0, 'skiprows': 1, 'rows_per_read': 4,
+                     'skip_blank_lines': skip_blank_lines,
+                     'input_columns': ['CODE', 'YEAR']})
+
+    assert [df.columns.tolist() for df in parallel_dfs] == [df.columns.tolist() for df in serial_dfs]
+    assert [_get_values_and_their_types(df) for df in parallel_dfs] == \
+           [_get_values_and_their_types(df) for df in serial_dfs]
+
+
+def test_parallel_reader_does_not_cap_rows_without_quotes(tmp_path, caplog):
+    input_file = tmp_path / 'spend.csv'
+    # Every row is longer than twice the range size (1 byte)
+    input_file.write_text('CODE,SPEND\n' + ''.join(f'A{i},{i}\n' for i in range(10, 20)))
+    serial_dfs, parallel_dfs = _read_in_serial_and_in_parallel(
+        input_file, {'header': 0, 'skiprows': 1, 'rows_per_read': 4})
+
+    assert [df.values.tolist() for df in parallel_dfs] == [df.values.tolist() for df in serial_dfs]
+    assert 'Could not find the end of a quoted value' not in caplog.text
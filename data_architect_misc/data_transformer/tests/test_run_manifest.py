@@ -0,0 +1,33 @@
+import os
+
+import run_manifest
+from run_manifest import RunManifest, get_transform_modules_hash
+
+
+def test_manifest_file_names_differ_for_config_files_of_same_name_in_different_folders(tmp_path):
+    china_manifest = RunManifest(str(tmp_path), os.path.join('configs', 'china', 'config.json'))
+    russia_manifest = RunManifest(str(tmp_path), os.path.join('configs', 'russia', 'config.json'))
+
+    assert os.path.basename(china_manifest.manifest_file) == 'china_config_manifest.json'
+    assert china_manifest.manifest_file != russia_manifest.manifest_file
+
+
+def test_transform_modules_hash_covers_modules_of_parent_classes(monkeypatch):
+    hashed_files = []
+
+    def _record_hashed_file(file_path_and_name):
+        hashed_files.append(os.path.relpath(file_path_and_name))
+        return file_path_and_name
+
+    monkeypatch.setattr(run_manifest, 'get_file_hash', _record_hashed_file)
+    get_transform_modules_hash({
+        'custom_transform_functions_file': './transform_functions/demo_transform_functions.py',
+        'data_writer_module_file': './data_writers/csv_data_writer.py'
+    })
+
+    for module_file in ['transform_functions/demo_transform_functions.py',
+                        'transform_functions/common_comp_harm_transform_functions.py',
+                        'transform_functions/common_transform_functions.py',
+                        'data_writers/csv_data_writer.py',
+                        'data_writers/file_data_writer.py']:
+        assert os.path.join(*module_file.split('/')) in hashed_files
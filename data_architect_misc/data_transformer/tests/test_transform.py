@@ -0,0 +1,12 @@
+import transform
+
+
+def _get_checkpoint_folder(*flags):
+    args = transform.get_argument_parser().parse_args(['-c', 'config.json', *flags])
+    return transform.get_checkpoint_folder(args)
+
+
+def test_checkpoints_are_saved_only_if_resume_or_checkpoint_folder_is_given(tmp_path):
+    assert _get_checkpoint_folder() is None
+    assert _get_checkpoint_folder('-r') == transform.DEFAULT_CHECKPOINT_FOLDER
+    assert _get_checkpoint_folder('-cp', str(tmp_path)) == str(tmp_path)
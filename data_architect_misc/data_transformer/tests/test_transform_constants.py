@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+from constants import transform_constants
+from data_readers.pandas_excel_data_reader import PandasExcelDataReader
+from data_readers.pandas_multi_sheet_excel_data_reader import PandasMultiSheetExcelDataReader
+from data_writers.feather_data_writer import FeatherDataWriter
+from data_writers.parquet_data_writer import ParquetDataWriter
+
+
+def test_keys_repeated_in_constants_are_same_as_keys_of_their_classes():
+    assert transform_constants.KEY_SHEET_NAME == PandasExcelDataReader.KEY_SHEET_NAME
+    assert transform_constants.KEY_SHEET_NAME_COLUMN == PandasMultiSheetExcelDataReader.KEY_SHEET_NAME_COLUMN
+    assert transform_constants.KEY_OUTPUT_COMPRESSION == ParquetDataWriter.KEY_OUTPUT_COMPRESSION
+    assert transform_constants.KEY_OUTPUT_COMPRESSION == FeatherDataWriter.KEY_OUTPUT_COMPRESSION
+    assert transform_constants.KEY_OUTPUT_ROW_GROUP_SIZE == ParquetDataWriter.KEY_OUTPUT_ROW_GROUP_SIZE
+
+
+def test_transform_does_not_import_modules_that_need_optional_packages():
+    modules = ['data_readers.pandas_excel_data_reader',
+               'data_readers.pandas_multi_sheet_excel_data_reader',
+               'data_readers.pandas_arrow_data_reader',
+               'data_readers.polars_data_reader',
+               'data_writers.parquet_data_writer',
+               'data_writers.feather_data_writer',
+               'polars', 'pyxlsb', 'xlrd', 'zstandard']
+    imported_modules = subprocess.run(
+        [sys.executable, '-c',
+         f"import sys; import transform; "
+         f"print(','.join(m for m in {modules!r} if m in sys.modules))"],
+        check=True, capture_output=True, text=True).stdout.strip()
+    assert imported_modules == ''
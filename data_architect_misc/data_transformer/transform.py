@@ -9,12 +9,23 @@ import argparse
 import datetime
 import dateutil.relativedelta
 import logging
+import multiprocessing
 import os
 import sys
+import time
+import traceback
 
 from constants.transform_constants import KEY_CURRENT_INPUT_FILE
+from data_readers import csv_format_sniffer
 from data_readers.file_data_reader import FileDataReader
+from chunk_cache import ChunkCache
+import chunk_pipeline
+from dataframe_backends import is_empty
+from run_manifest import RunManifest
+import run_telemetry
 import transform_errors
+from transform_checkpoint import TransformCheckpoint
+from transform_profiler import TransformProfiler
 import transform_utils
 
 DESC = """This program is intended to take a JSON configuration file 
@@ -52,7 +63,7 @@ E.g., python transform.py -c .\configs\china\config.json
 -o ./output/switzerland/Monthly_Spend_20200229.xlsx"""
 
 IE_FLAG_HELP_TEXT = """[Optional] Encoding (e.g., utf-16) to use in reading the 
-input file.
+input file ('auto' detects the encoding of each CSV input file).
 E.g., python transform.py -i ./input/switzerland/Monthly_Spend_20200229.xlsx 
 -c .\configs\china\config.json 
 -ie utf-16"""
@@ -63,16 +74,416 @@ E.g., python transform.py -i ./input/switzerland/Monthly_Spend_20200229.xlsx
 -c .\configs\china\config.json 
 -oe utf-16"""
 
-if __name__ == '__main__':
-    # 0. Set logging config
+W_FLAG_HELP_TEXT = """[Optional] Number of worker processes to transform 
+the input files (matched by 'input_file_name_or_pattern') in parallel. 
+Default is 1 (i.e. input files are processed one after another). When this 
+is more than 1, a file that fails does NOT stop the other files and the 
+input file's name is added to the output file names to keep them apart.
+Only use this if the input files can be transformed independently of 
+each other.
+E.g., python transform.py -c .\configs\china\config.json -w 4"""
+
+P_FLAG_HELP_TEXT = """[Optional] Turn on profiling of the functions in 
+'functions_to_apply'. Wall time, CPU time, increase in peak memory usage 
+and input/output row and column counts of every function invocation 
+are recorded per chunk and per file. At the end of the run, a summary 
+table (slowest function first) is printed and the report is written 
+as JSON and CSV files to the folder given after this flag 
+(default: ./output/profiles).
+E.g., python transform.py -c .\configs\china\config.json -p ./output/profiles"""
+
+F_FLAG_HELP_TEXT = """[Optional] Transform all the input files even if they 
+are unchanged since the last successful run. By default, input files whose 
+size, modified time, content, config and transform functions/writer modules 
+are all the same as recorded in the manifest file of the config file (see 
+'-m' flag) are skipped.
+E.g., python transform.py -c .\configs\china\config.json -f"""
+
+M_FLAG_HELP_TEXT = """[Optional] Folder to keep the manifest files, which record 
+the input files that were transformed successfully, and the encodings and 
+delimiters detected from the input files (default: ./output/manifests).
+E.g., python transform.py -c .\configs\china\config.json -m ./output/manifests"""
+
+SM_FLAG_HELP_TEXT = """[Optional] Show whether each input file of the config file 
+is NEW, CHANGED or UNCHANGED since the last run (according to the manifest file) 
+and exit without transforming anything.
+E.g., python transform.py -c .\configs\china\config.json -sm"""
+
+CC_FLAG_HELP_TEXT = """[Optional] Cache the data of each chunk after each 
+function in 'functions_to_apply' in the folder given after this flag 
+(default: ./output/chunk_cache). When the same input file is transformed 
+again, each chunk resumes from the result of the longest list of leading 
+functions that are unchanged (and if every chunk is cached, the input file 
+is not read at all). This is useful when we change only the last few 
+functions in the config and re-run it many times. The maximum size of the 
+cache can be set with 'chunk_cache_max_size_mb' in the config (default: 1024). 
+Do NOT use this if any of the functions has side effects that the functions 
+after it depend on.
+E.g., python transform.py -c .\configs\china\config.json -cc ./output/chunk_cache"""
+
+R_FLAG_HELP_TEXT = """[Optional] Resume transforming the input files from where 
+the previous run stopped (e.g., because it ran out of memory). If this flag or 
+'-cp' flag is given, a checkpoint is saved in the checkpoint folder (see '-cp' 
+flag) after each chunk of an input file is transformed and its output is 
+completely written. With this flag, the chunks already done according to the 
+checkpoint are skipped (as long as the input file and config are unchanged) 
+and the output files written for them are kept. So, use this flag (or '-cp') 
+from the first run of the big files that you may have to resume.
+E.g., python transform.py -c .\configs\china\config.json -r"""
+
+CP_FLAG_HELP_TEXT = """[Optional] Folder to keep the checkpoints of the input files 
+being transformed (default: ./output/checkpoints, if '-r' flag is given). 
+Checkpoints are saved only if this flag or '-r' flag is given.
+E.g., python transform.py -c .\configs\china\config.json -r -cp ./output/checkpoints"""
+
+TM_FLAG_HELP_TEXT = """[Optional] Record the telemetry of the run (rows in/out, 
+bytes read/written, time spent waiting for the reader and the writer, in each 
+function of 'functions_to_apply' and latency of each chunk, per chunk, per input 
+file and per run) and write it in the folder given after this flag 
+(default: ./output/telemetry) in the format given by '-tmf' flag, so that 
+schedulers and monitoring tools can track the throughput of the runs.
+E.g., python transform.py -c .\configs\china\config.json -tm ./output/telemetry"""
+
+TMF_FLAG_HELP_TEXT = """[Optional] Format of the telemetry (see '-tm' flag): 
+'jsonl' (default) appends the records of the run to transform_telemetry.jsonl 
+and 'prometheus' replaces <config folder>_<config file name>.prom with the 
+metrics of the run (for node_exporter's textfile collector).
+E.g., python transform.py -c .\configs\china\config.json -tm -tmf prometheus"""
+
+DEFAULT_PROFILE_REPORT_FOLDER = os.path.join(os.getcwd(), 'output', 'profiles')
+DEFAULT_MANIFEST_FOLDER = os.path.join(os.getcwd(), 'output', 'manifests')
+DEFAULT_CHUNK_CACHE_FOLDER = os.path.join(os.getcwd(), 'output', 'chunk_cache')
+DEFAULT_CHECKPOINT_FOLDER = os.path.join(os.getcwd(), 'output', 'checkpoints')
+DEFAULT_TELEMETRY_FOLDER = os.path.join(os.getcwd(), 'output', 'telemetry')
+
+logger = logging.getLogger(__name__)  # ('transform.py')
+
+
+def set_logging_config():
     # REF 1: https://stackoverflow.com/a/15729700/1330974
     # REF 2a: https://web.archive.org/save/https://www.loggly.com/ultimate-guide/python-logging-basics/
     # REF 2b: http://archive.ph/0Uf6u
     logging.basicConfig(stream=sys.stdout, level=logging.INFO,
                         format="\n%(levelname)s: %(message)s")
-    logger = logging.getLogger(__name__)  # ('transform.py')
 
-    # 1. Process arguments passed into the program
+
+def compile_execution_plan(config, chunk_cache=None):
+    """
+    Instantiates the transform functions class for the config
+    and compiles 'functions_to_apply' into an execution plan.
+
+    If chunk_cache is provided, steps are not fused in lazy
+    execution mode because the result of every step is cached.
+    """
+    # To optimize the application of custom function to Pandas' dataframe, read:
+    # REF: https://archive.st/7w9d (also available at: http://archive.ph/qXKXC)
+    transform_funcs_kls = transform_utils.instantiate_transform_functions_class(config)
+    if chunk_cache and transform_utils.get_lazy_execution_decision(config):
+        logger.warning("Lazy execution is turned off because the chunk cache "
+                       "needs the result of every function in 'functions_to_apply'.")
+    return transform_utils.compile_execution_plan(config, transform_funcs_kls,
+                                                  allow_lazy_execution=chunk_cache is None)
+
+
+def _read_dataframes(reader):
+    """Yields dataframes from the reader until there is nothing more to read."""
+    cur_df = reader.read_next_dataframe()
+    while not is_empty(cur_df):
+        yield cur_df
+        cur_df = reader.read_next_dataframe()
+
+
+def _resume_dataframes_from_cache(chunk_cache, input_file_key, step_prefix_keys,
+                                  read_dataframes, start_chunk_idx=0):
+    """
+    Yields (number of steps already applied, dataframe) for each chunk
+    of the input file (starting from start_chunk_idx), resuming from
+    the longest prefix of steps cached.
+
+    read_dataframes is a function that returns the generator of
+    dataframes read from the input file (starting from the chunk
+    index given to it), which is called only if some of the chunks
+    are not cached at all. The dataframes read from the file are
+    cached (with no steps applied) along the way.
+    """
+    if chunk_cache.is_every_chunk_cached(input_file_key, step_prefix_keys):
+        logger.info("Every chunk of the input file is found in the cache.")
+        for chunk_idx in range(start_chunk_idx, chunk_cache.get_chunk_count(input_file_key)):
+            step_count, df = chunk_cache.load_longest_cached_prefix(
+                input_file_key, chunk_idx, step_prefix_keys)
+            if df is None:
+                # Another process deleted it from the cache after we checked,
+                # so we read the file from this chunk on.
+                start_chunk_idx = chunk_idx
+                break
+            yield step_count, df
+        else:
+            return
+
+    chunk_count = start_chunk_idx
+    for chunk_idx, df in enumerate(read_dataframes(start_chunk_idx), start=start_chunk_idx):
+        chunk_count = chunk_idx + 1
+        step_count, cached_df = chunk_cache.load_longest_cached_prefix(
+            input_file_key, chunk_idx, step_prefix_keys)
+        if cached_df is None:
+            chunk_cache.store(input_file_key, chunk_idx, step_prefix_keys[0], df)
+            yield 0, df
+        else:
+            yield step_count, cached_df
+
+    chunk_cache.set_chunk_count(input_file_key, chunk_count)
+
+
+def _write_dataframe(data_writer_kls, df, output_file_name_suffix, checkpoint=None,
+                     file_telemetry=None):
+    """
+    Writes the dataframe and, if checkpoint is provided, records
+    the chunk as done only after its output is completely written.
+    If file_telemetry is provided, the output file is recorded in it.
+    """
+    data_writer_kls.set_output_file_name_suffix(output_file_name_suffix)
+    # File data writers return the output file written
+    output_file = data_writer_kls.write_data(df)
+    if file_telemetry:
+        file_telemetry.add_output_file(output_file)
+    if checkpoint:
+        checkpoint.commit_chunk(df.shape[0], output_file)
+
+
+def transform_input_file(input_file, config,
+                         add_input_file_name_to_output=False,
+                         profiler=None,
+                         execution_plan=None,
+                         chunk_cache=None,
+                         checkpoint_folder=None,
+                         resume=False,
+                         output_dataframes=None,
+                         telemetry=None):
+    """
+    Reads the input file chunk by chunk, applies the functions
+    defined in the config to each chunk and writes the
+    results (if instructed in the config). Every call builds
+    its own reader and writer (and transform functions class,
+    unless execution_plan is provided) so that input files can
+    be transformed in separate processes.
+
+    If profiler (TransformProfiler) is provided, every function
+    invocation is recorded in it.
+
+    execution_plan is the one compiled by transform_utils'
+    compile_execution_plan for the config, which can be
+    reused across input files. If not provided, it is
+    compiled here.
+
+    If chunk_cache (ChunkCache) is provided, dataframes are cached
+    after each step and each chunk resumes from the longest prefix
+    of steps cached in the previous runs.
+
+    If checkpoint_folder is provided, a checkpoint of the input file
+    is saved after each chunk is transformed and written. If resume
+    is True, we skip the chunks already done according to the
+    checkpoint saved in the previous (unfinished) run.
+
+    If output_dataframes (list) is provided, the transformed dataframe
+    of each chunk is appended to it (e.g., so that pipeline_transform.py
+    can pass them to the next step without reading the output files).
+
+    If telemetry (RunTelemetry) is provided, rows in/out, time spent
+    waiting for the reader and the writer and in each function are
+    recorded in it for each chunk and for the input file (even if
+    the transform fails).
+
+    Returns the number of rows written for the input file.
+    """
+    write_data = transform_utils.get_write_data_decision(config)
+    data_writer_kls = transform_utils.instantiate_data_writer_class(config)
+
+    # To be convenient in some situations, we will add the currently
+    # processed/transformed file name (full path and name info)
+    config[KEY_CURRENT_INPUT_FILE] = input_file
+
+    if execution_plan is None:
+        execution_plan = compile_execution_plan(config, chunk_cache)
+
+    # When more than one input file is transformed at the same time,
+    # output file names must tell which input file they came from.
+    output_file_name_suffix_prefix = ''
+    if add_input_file_name_to_output:
+        output_file_name_suffix_prefix = f"{os.path.splitext(os.path.basename(input_file))[0]}_"
+
+    checkpoint = None
+    start_chunk_idx = 0
+    if checkpoint_folder:
+        checkpoint = TransformCheckpoint(checkpoint_folder, input_file, config)
+        if resume:
+            start_chunk_idx = checkpoint.load()
+
+    chunk_queue_size = transform_utils.get_chunk_queue_size(config)
+
+    def read_dataframes(chunk_idx_to_start_reading):
+        # The input file is opened only when we need to read it
+        # (i.e. not every chunk of it is in the chunk cache).
+        reader = FileDataReader(input_file, config).get_data_reader()
+        reader.skip_dataframes(chunk_idx_to_start_reading)
+        if chunk_queue_size > 0:
+            # Overlap reading, transforming and writing of chunks
+            return chunk_pipeline.read_dataframes_in_background(
+                reader.read_next_dataframe, chunk_queue_size)
+        return _read_dataframes(reader)
+
+    if chunk_cache:
+        input_file_key = chunk_cache.get_input_file_key(input_file, config)
+        step_prefix_keys = chunk_cache.get_step_prefix_keys(config)
+        dataframes = _resume_dataframes_from_cache(chunk_cache, input_file_key,
+                                                   step_prefix_keys, read_dataframes,
+                                                   start_chunk_idx)
+    else:
+        dataframes = ((0, df) for df in read_dataframes(start_chunk_idx))
+
+    background_writer = None
+    if chunk_queue_size > 0:
+        background_writer = chunk_pipeline.BackgroundWriter(chunk_queue_size)
+
+    file_telemetry = telemetry.start_file(input_file) if telemetry else None
+    row_count = checkpoint.get_rows_written() if checkpoint else 0
+    try:
+        for chunk_idx, (applied_step_count, cur_df) in enumerate(dataframes,
+                                                                 start=start_chunk_idx):
+            if file_telemetry:
+                file_telemetry.start_chunk(chunk_idx, cur_df.shape[0])
+            if applied_step_count:
+                logger.info(f"Resuming from the cached result of the first "
+                            f"{applied_step_count} function(s) for this chunk.")
+            for func_idx, step in enumerate(execution_plan):
+                if func_idx < applied_step_count:
+                    continue
+
+                logger.info(f"Invoking function: {step.function_name}")
+                step_start_time = time.perf_counter()
+                if profiler:
+                    cur_df = profiler.run_function(input_file, chunk_idx, func_idx,
+                                                   step.function_name, step.function,
+                                                   cur_df, step.args, step.kwargs)
+                else:
+                    cur_df = step.function(cur_df, *step.args, **step.kwargs)
+                if file_telemetry:
+                    file_telemetry.record_step(step.function_name,
+                                               time.perf_counter() - step_start_time)
+
+                if chunk_cache:
+                    chunk_cache.store(input_file_key, chunk_idx,
+                                      step_prefix_keys[func_idx + 1], cur_df)
+
+            if output_dataframes is not None:
+                output_dataframes.append(cur_df)
+
+            write_start_time = time.perf_counter()
+            if write_data:
+                output_file_name_suffix = (f"{output_file_name_suffix_prefix}rows_"
+                                           f"{row_count}_{row_count+cur_df.shape[0]}")
+                row_count = row_count+cur_df.shape[0]
+                if background_writer:
+                    background_writer.submit(_write_dataframe, data_writer_kls,
+                                             cur_df, output_file_name_suffix, checkpoint,
+                                             file_telemetry)
+                else:
+                    _write_dataframe(data_writer_kls, cur_df,
+                                     output_file_name_suffix, checkpoint, file_telemetry)
+            elif checkpoint:
+                checkpoint.commit_chunk(0)
+            if file_telemetry:
+                file_telemetry.end_chunk(cur_df.shape[0], time.perf_counter() - write_start_time)
+
+        if background_writer:
+            write_start_time = time.perf_counter()
+            background_writer.close()
+            if file_telemetry:
+                file_telemetry.add_final_write_wait(time.perf_counter() - write_start_time)
+    except BaseException:
+        if background_writer:
+            background_writer.abort()
+        if file_telemetry:
+            telemetry.add_records(file_telemetry.get_records(row_count, run_telemetry.STATUS_FAILED,
+                                                             traceback.format_exc()))
+        raise
+
+    if file_telemetry:
+        telemetry.add_records(file_telemetry.get_records(row_count))
+
+    if checkpoint:
+        checkpoint.delete()
+
+    return row_count
+
+
+def _get_chunk_cache(chunk_cache_folder, config):
+    """Returns ChunkCache for the config or None if the cache isn't used."""
+    if chunk_cache_folder is None:
+        return None
+    return ChunkCache(chunk_cache_folder,
+                      transform_utils.get_chunk_cache_max_size_mb(config))
+
+
+def _transform_input_file_in_worker(input_file_config_and_options):
+    """
+    Runs in a worker process. Errors are caught here and returned
+    (instead of raised) so that one bad input file does not stop
+    the other files from being transformed.
+
+    Returns a dictionary with the input file, rows written, seconds
+    taken, error message (None if no error) and, if profiling and
+    telemetry are turned on, the profiler's invocation records and
+    the telemetry records.
+    """
+    (input_file, config, profile, record_telemetry, chunk_cache_folder,
+     checkpoint_folder, resume, manifest_folder) = input_file_config_and_options
+    csv_format_sniffer.set_sniffed_formats_folder(manifest_folder)
+    profiler = TransformProfiler() if profile else None
+    telemetry = run_telemetry.RunTelemetry() if record_telemetry else None
+    start_dt = datetime.datetime.now()
+    try:
+        row_count = transform_input_file(input_file, config,
+                                         add_input_file_name_to_output=True,
+                                         profiler=profiler,
+                                         chunk_cache=_get_chunk_cache(chunk_cache_folder,
+                                                                      config),
+                                         checkpoint_folder=checkpoint_folder,
+                                         resume=resume,
+                                         telemetry=telemetry)
+        error_msg = None
+    except Exception:
+        row_count = 0
+        error_msg = traceback.format_exc()
+        logger.error(f"Failed to transform this file: {input_file}\n{error_msg}")
+
+    return {'input_file': input_file,
+            'rows_written': row_count,
+            'secs': (datetime.datetime.now() - start_dt).total_seconds(),
+            'error': error_msg,
+            'profiled_invocations': profiler.invocations if profiler else [],
+            'telemetry_records': telemetry.records if telemetry else []}
+
+
+def log_run_summary(results):
+    """
+    Logs how each input file transformed in worker processes went
+    and returns the number of files that failed.
+    """
+    failed_files = [r for r in results if r['error'] is not None]
+    summary = '\n'.join([f"{'FAILED' if r['error'] else 'OK'}: {r['input_file']} "
+                         f"({r['rows_written']} rows written in {r['secs']:.1f} secs)"
+                         for r in results])
+    logger.info(f"Transformed {len(results) - len(failed_files)} out of "
+                f"{len(results)} input file(s):\n{summary}")
+    return len(failed_files)
+
+
+def get_argument_parser():
+    """
+    Returns the parser of the commandline arguments of this script
+    (which is also used to parse the arguments of each config file
+    run by batch_transform.py).
+    """
     parser = argparse.ArgumentParser(
         description=DESC,
         formatter_class=argparse.RawTextHelpFormatter,
@@ -87,15 +498,93 @@ if __name__ == '__main__':
                         help=IE_FLAG_HELP_TEXT)
     parser.add_argument('-oe', required=False, type=str,
                         help=OE_FLAG_HELP_TEXT)
-    args = parser.parse_args()
+    parser.add_argument('-w', '--workers', required=False, type=int,
+                        default=1, help=W_FLAG_HELP_TEXT)
+    parser.add_argument('-p', '--profile', required=False, type=str,
+                        nargs='?', const=DEFAULT_PROFILE_REPORT_FOLDER,
+                        help=P_FLAG_HELP_TEXT)
+    parser.add_argument('-f', '--force', required=False, action='store_true',
+                        help=F_FLAG_HELP_TEXT)
+    parser.add_argument('-m', '--manifest_folder', required=False, type=str,
+                        default=DEFAULT_MANIFEST_FOLDER, help=M_FLAG_HELP_TEXT)
+    parser.add_argument('-sm', '--show_manifest', required=False, action='store_true',
+                        help=SM_FLAG_HELP_TEXT)
+    parser.add_argument('-cc', '--chunk_cache', required=False, type=str,
+                        nargs='?', const=DEFAULT_CHUNK_CACHE_FOLDER,
+                        help=CC_FLAG_HELP_TEXT)
+    parser.add_argument('-r', '--resume', required=False, action='store_true',
+                        help=R_FLAG_HELP_TEXT)
+    parser.add_argument('-cp', '--checkpoint_folder', required=False, type=str,
+                        help=CP_FLAG_HELP_TEXT)
+    parser.add_argument('-tm', '--telemetry', required=False, type=str,
+                        nargs='?', const=DEFAULT_TELEMETRY_FOLDER,
+                        help=TM_FLAG_HELP_TEXT)
+    parser.add_argument('-tmf', '--telemetry_format', required=False, type=str,
+                        choices=run_telemetry.FORMATS, default=run_telemetry.FORMAT_JSONL,
+                        help=TMF_FLAG_HELP_TEXT)
+    return parser
+
+
+def get_checkpoint_folder(args):
+    """
+    Returns the folder to keep the checkpoints in, or None if neither
+    '-r' nor '-cp' flag is given, so that the runs we won't resume
+    don't write a checkpoint file after every chunk.
+    """
+    if args.checkpoint_folder:
+        return args.checkpoint_folder
+    return DEFAULT_CHECKPOINT_FOLDER if args.resume else None
+
+
+def transform_config_file(config_file, args, profiler=None):
+    """
+    Runs each transform procedure (config) in the config file
+    on its input files, using the options in args (parsed by the
+    parser from get_argument_parser). If profiler is provided,
+    every function invocation is recorded in it.
+
+    If telemetry is turned on in args, the telemetry of the run is
+    written at the end (even if the run fails).
+
+    Returns the number of input files that failed to transform
+    in worker processes (in a single process, errors are raised).
+    """
+    telemetry = None
+    if args.telemetry and not args.show_manifest:
+        telemetry = run_telemetry.RunTelemetry(config_file)
+
+    try:
+        failed_file_count = _transform_configs_in_config_file(config_file, args,
+                                                              profiler, telemetry)
+    except BaseException:
+        if telemetry:
+            telemetry.write_report(args.telemetry, args.telemetry_format,
+                                   run_telemetry.STATUS_FAILED)
+        raise
+
+    if telemetry:
+        telemetry.write_report(args.telemetry, args.telemetry_format)
+    return failed_file_count
+
 
-    # 2. Make sure JSON configuration file exists
-    if not os.path.exists(args.c):
+def _transform_configs_in_config_file(config_file, args, profiler, telemetry):
+    """
+    Does the work of transform_config_file. If telemetry
+    (RunTelemetry) is provided, every input file is recorded in it.
+    """
+    if not os.path.exists(config_file):
         raise transform_errors.ConfigFileError()
 
-    # 3. Iterate through each transform procedure in config file
     start_dt = datetime.datetime.now()
-    for config in transform_utils.load_config(args.c):
+    failed_file_count = 0
+    manifest = RunManifest(args.manifest_folder, config_file)
+    checkpoint_folder = get_checkpoint_folder(args)
+    # Encodings and delimiters detected from the input files
+    # are saved along with the manifests for later runs.
+    csv_format_sniffer.set_sniffed_formats_folder(args.manifest_folder)
+    for config_idx, config in enumerate(transform_utils.load_config(config_file)):
+        if telemetry:
+            telemetry.set_config_index(config_idx)
         if args.i:
             # This allows user to provide input file name and path as commandline parameter
             config = transform_utils.insert_input_file_keys_values_to_config_json(args.i, config)
@@ -110,45 +599,84 @@ if __name__ == '__main__':
             config = transform_utils.insert_output_file_encoding_key_value_to_config_json(args.oe, config)
 
         transform_utils.validate_configurations(config)
+        config = transform_utils.insert_inferred_input_columns_to_config_json(config)
 
-        for input_file in transform_utils.get_input_files(config):
-            reader = FileDataReader(input_file, config).get_data_reader()
-            write_data = transform_utils.get_write_data_decision(config)
-            data_writer_kls = transform_utils.instantiate_data_writer_class(config)
+        input_files = transform_utils.get_input_files(config)
+        if args.show_manifest:
+            manifest.log_status(config_idx, input_files, config)
+            continue
+        if not args.force:
+            input_files = manifest.get_input_files_to_transform(config_idx, input_files, config)
+            if not input_files:
+                logger.info(f"All input files of config #{config_idx} are unchanged since "
+                            f"the last run. Use '-f' flag to transform them again.")
+                continue
 
-            # To be convenient in some situations, we will add the currently
-            # processed/transformed file name (full path and name info)
-            config[KEY_CURRENT_INPUT_FILE] = input_file
+        if args.workers > 1:
+            # Each worker process builds its own reader, transform
+            # functions class and writer for the input file it gets.
+            # REF: https://docs.python.org/3/library/multiprocessing.html#module-multiprocessing.pool
+            with multiprocessing.Pool(processes=min(args.workers, len(input_files)),
+                                      initializer=set_logging_config) as pool:
+                results = pool.map(_transform_input_file_in_worker,
+                                   [(f, config, bool(profiler), bool(telemetry), args.chunk_cache,
+                                     checkpoint_folder, args.resume, args.manifest_folder)
+                                    for f in input_files],
+                                   chunksize=1)
+            failed_file_count += log_run_summary(results)
+            for r in results:
+                if r['error'] is None:
+                    manifest.record_transformed_file(config_idx, r['input_file'],
+                                                     config, r['rows_written'])
+            manifest.save()
+            if profiler:
+                for r in results:
+                    profiler.add_invocations(r['profiled_invocations'])
+            if telemetry:
+                for r in results:
+                    telemetry.add_records(r['telemetry_records'])
+        else:
+            # Compile once and reuse the plan for all input files
+            chunk_cache = _get_chunk_cache(args.chunk_cache, config)
+            execution_plan = compile_execution_plan(config, chunk_cache)
+            for input_file in input_files:
+                row_count = transform_input_file(input_file, config, profiler=profiler,
+                                                 execution_plan=execution_plan,
+                                                 chunk_cache=chunk_cache,
+                                                 checkpoint_folder=checkpoint_folder,
+                                                 resume=args.resume,
+                                                 telemetry=telemetry)
+                # Saved after each file so that the files transformed
+                # so far are skipped even if a later file fails.
+                manifest.record_transformed_file(config_idx, input_file,
+                                                 config, row_count)
+                manifest.save()
 
-            # To optimize the application of custom function to Pandas' dataframe, read:
-            # REF: https://archive.st/7w9d (also available at: http://archive.ph/qXKXC)
-            transform_funcs_kls = transform_utils.instantiate_transform_functions_class(config)
+        td = dateutil.relativedelta.relativedelta (datetime.datetime.now(), start_dt)
+        logger.info(f"Transform script finished and from start to completion it took "
+                    f"{td.hours} hrs, {td.minutes} mins, and {td.seconds} secs.")
 
-            row_count = 0
-            cur_df = reader.read_next_dataframe()
+    return failed_file_count
 
-            while not cur_df.empty:
-                for func_and_params in transform_utils.get_functions_to_apply(config):
-                    # logger.info(f"Invoking function:{json.dumps(func_and_params, sort_keys=True, indent=4)}")
-                    logger.info(f"Invoking function: {func_and_params['function_name']}")
-                    func_name = transform_utils.get_function_name(func_and_params)
-                    func_args = transform_utils.get_function_args(func_and_params)
-                    func_kwargs = transform_utils.get_function_kwargs(func_and_params)
 
-                    cur_df = getattr(transform_funcs_kls,
-                                     func_name)(cur_df, *func_args, **func_kwargs)
+if __name__ == '__main__':
+    # 0. Set logging config
+    set_logging_config()
+
+    # 1. Process arguments passed into the program
+    args = get_argument_parser().parse_args()
 
-                if write_data:
-                    data_writer_kls.set_output_file_name_suffix(
-                        f"rows_{row_count}_{row_count+cur_df.shape[0]}")
-                    row_count = row_count+cur_df.shape[0]
-                    data_writer_kls.write_data(cur_df)
+    # 2. Iterate through each transform procedure in config file
+    profiler = TransformProfiler() if args.profile else None
+    failed_file_count = transform_config_file(args.c, args, profiler)
 
-                cur_df = reader.read_next_dataframe()
+    if profiler:
+        profiler.log_report()
+        profiler.write_report(args.profile)
 
-        td = dateutil.relativedelta.relativedelta (datetime.datetime.now(), start_dt)
-        logger.info(f"Transform script finished and from start to completion it took "
-                    f"{td.hours} hrs, {td.minutes} mins, and {td.seconds} secs.")
+    if failed_file_count:
+        sys.exit(f"{failed_file_count} input file(s) failed to transform. "
+                 f"See the run summary above for details.")
 
     # TODO : use pydoc to generate documentation?
     # >> python -m pydoc -w transform
@@ -0,0 +1,109 @@
+"""
+Checkpoint of an input file that is being transformed, so that
+if transform.py is stopped in the middle of a big file (e.g.,
+ran out of memory or the database connection timed out), it can
+be restarted (with '--resume' flag) from the first chunk whose
+output was not written yet instead of from the top of the file.
+
+After each chunk is transformed and written, the number of chunks
+done (i.e. the reader's position in the file), the number of rows
+written so far and the output files written are saved in the
+checkpoint file. The checkpoint is only used if the input file and
+the config are the same as when it was saved, and it is deleted
+once the whole input file is transformed.
+"""
+import hashlib
+import json
+import logging
+import os
+
+from run_manifest import get_config_hash
+
+
+class TransformCheckpoint:
+    """
+    Reads and writes the checkpoint (JSON file)
+    of an input file transformed with a config.
+    """
+
+    def __init__(self, checkpoint_folder, input_file, config):
+        self.logger = logging.getLogger(__name__)
+        self.input_file = input_file
+        self.config_hash = get_config_hash(config)
+        checkpoint_file_name = hashlib.sha256(
+            f"{input_file}|{self.config_hash}".encode('utf-8')).hexdigest()
+        self.checkpoint_file = os.path.join(checkpoint_folder,
+                                            f"{checkpoint_file_name}.json")
+        self.state = self._get_initial_state()
+
+    def _get_input_file_fingerprint(self):
+        stat = os.stat(self.input_file)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def _get_initial_state(self):
+        return {'input_file': self.input_file,
+                'input_file_fingerprint': self._get_input_file_fingerprint(),
+                'config_hash': self.config_hash,
+                'committed_chunk_count': 0,
+                'rows_written': 0,
+                'output_files': []}
+
+    def load(self):
+        """
+        Loads the checkpoint saved in the previous run, if the input
+        file and config haven't changed since then. Returns the number
+        of chunks already transformed and written (0 if there is no
+        usable checkpoint).
+        """
+        if not os.path.isfile(self.checkpoint_file):
+            return 0
+
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        if ((state['input_file_fingerprint'] != self._get_input_file_fingerprint())
+                or (state['config_hash'] != self.config_hash)):
+            self.logger.warning(f"The input file or config has changed since the "
+                                f"checkpoint was saved, so we will transform this "
+                                f"file from the beginning: {self.input_file}")
+            return 0
+
+        self.state = state
+        self.logger.info(f"Resuming from chunk #{state['committed_chunk_count']} "
+                         f"(after {state['rows_written']} rows written) of this "
+                         f"file: {self.input_file}")
+        return state['committed_chunk_count']
+
+    def get_rows_written(self):
+        return self.state['rows_written']
+
+    def _save(self):
+        """
+        Writes the checkpoint to a temporary file first and then
+        replaces the old one, so that the checkpoint file is never
+        half-written even if the program is stopped while saving.
+        """
+        checkpoint_folder = os.path.dirname(self.checkpoint_file)
+        if not os.path.exists(checkpoint_folder):
+            os.makedirs(checkpoint_folder, exist_ok=True)
+
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def commit_chunk(self, rows_written, output_file=None):
+        """
+        Records that one more chunk is transformed and its output
+        (if any) is completely written.
+        """
+        self.state['committed_chunk_count'] += 1
+        self.state['rows_written'] += rows_written
+        if output_file:
+            self.state['output_files'].append(output_file)
+        self._save()
+
+    def delete(self):
+        """Deletes the checkpoint once the whole input file is transformed."""
+        if os.path.isfile(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
@@ -175,6 +175,40 @@ class InputFileNameAndDataDateRangeMismatchError(TransformError):
                          f"correct date ranges in the data.")
 
 
+class TransformFunctionNotFoundError(TransformError):
+    """
+    Raised when the function named in the config file is
+    not defined in the transform functions class.
+    """
+
+    def __init__(self, function_name, transform_functions_class_name):
+        super().__init__(f"This function in 'functions_to_apply' "
+                         f"is not defined in {transform_functions_class_name}: "
+                         f"{function_name}")
+
+
+class ConfigDependencyCycleError(TransformError):
+    """
+    Raised when the config files in a batch depend on each
+    other's output files in a cycle, so none of them can run first.
+    """
+
+    def __init__(self, config_files):
+        super().__init__(f"These config files depend on each other's "
+                         f"output files in a cycle: {config_files}")
+
+
+class PipelineDefinitionError(TransformError):
+    """
+    Raised when the steps in a pipeline file can't be run, e.g.,
+    a step reads the output of a step that isn't defined or the
+    steps read each other's output in a cycle.
+    """
+
+    def __init__(self, error_msg):
+        super().__init__(error_msg)
+
+
 class ListEmptyError(TransformError):
     """Raised when the provided list is empty."""
 
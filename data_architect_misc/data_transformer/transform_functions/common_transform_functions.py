@@ -18,6 +18,7 @@ import numpy as np
 
 import transform_errors
 from constants import comp_harm_constants
+from dataframe_backends import is_dataframe
 from constants.transform_constants import KEY_CURRENT_INPUT_FILE, KEY_HEADER
 
 
@@ -26,11 +27,12 @@ def return_value_type_check(f):
         """
         Helper function which asserts that all functions implemented
         within TransformFunctions and its subclasses return pandas
-        dataframe. If not, raise exception.
+        (or Polars, see dataframe_backends.py) dataframe. If not,
+        raise exception.
         """
         r = f(*args, **kwargs)
 
-        if not isinstance(r, pd.DataFrame):
+        if not is_dataframe(r):
             raise Exception(f"Functions defined within TransformFunctions "
                             f"and/or its subclasses must return pandas' dataframe, "
                             f"but this function, '{f.__name__}', is returning: {r!r}")
@@ -76,6 +78,46 @@ class TransformFunctions:
         """
         return re.sub("(^|\s)(\S)", lambda m: m.group(1) + m.group(2).upper(), s)
 
+    def _convert_categorical_columns_to_object(self, df, list_of_col_names):
+        """
+        Readers can load low-cardinality columns as 'category' data type
+        to save memory (see 'column_data_types' and
+        'convert_low_cardinality_columns_to_category' in the config).
+        Pandas raises error if we write a value that is not one of
+        the existing categories into such a column, so functions
+        that update values in existing columns must call this first
+        to convert the categorical columns back to object type.
+        """
+        for col_name in list_of_col_names:
+            if isinstance(df[col_name].dtype, pd.CategoricalDtype):
+                df[col_name] = df[col_name].astype(object)
+        return df
+
+    def _get_compiled_regex_mappings(self, dictionary_of_regex_mappings):
+        """
+        Returns a copy of the dictionary whose keys (regular expressions)
+        are compiled. Compiled mappings are cached in this instance by
+        the (ordered) key-value pairs of the dictionary, so that big
+        mappings (e.g., ~470 category mappings) are compiled only once
+        per run instead of once per chunk, and a dictionary that was
+        changed after it was cached is compiled again.
+
+        Pandas' replace and str.contains methods accept compiled
+        regular expressions as well as strings.
+        REF: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.replace.html
+        """
+        key = tuple(dictionary_of_regex_mappings.items())
+        try:
+            hash(key)
+        except TypeError:
+            # Values (e.g., lists) that cannot be part of the cache key
+            return {re.compile(pattern): value for pattern, value in key}
+
+        cache = self.__dict__.setdefault('_compiled_regex_mappings_cache', {})
+        if key not in cache:
+            cache[key] = {re.compile(pattern): value for pattern, value in key}
+        return cache[key]
+
     def _get_list_of_files_in_a_directory(self, dir_name, file_ext=None):
         if file_ext is not None:
             return [os.path.join(dir_name, f) for f in os.listdir(dir_name)
@@ -853,6 +895,7 @@ class CommonTransformFunctions(TransformFunctions):
                 f"is NOT the same as the length of the list of dictionaries "
                 f"of update values: {len(list_of_dictionary_of_value_mappings)}")
 
+        df = self._convert_categorical_columns_to_object(df, list_of_col_names)
         for i, col in enumerate(list_of_col_names):
             df[col] = df[col].map(list_of_dictionary_of_value_mappings[i]).fillna(df[col])
 
@@ -889,6 +932,7 @@ class CommonTransformFunctions(TransformFunctions):
                 f"is NOT the same as the length of the list of dictionaries "
                 f"of update values: {len(list_of_dictionary_of_value_mappings)}")
 
+        df = self._convert_categorical_columns_to_object(df, list_of_col_names)
         for i, col in enumerate(list_of_col_names):
             # first, convert the data type of the column to string
             df[col] = df[col].apply(str)
@@ -938,6 +982,7 @@ class CommonTransformFunctions(TransformFunctions):
             raise transform_errors.InputDataTypeError(
                 "Col1-Col2 value pairs must be of dictionary type")
 
+        df = self._convert_categorical_columns_to_object(df, [base_column_name, target_column_name])
         df[target_column_name] = df[base_column_name].map(dictionary_of_value_pairs).fillna(df[target_column_name])
 
         return df
@@ -987,7 +1032,9 @@ class CommonTransformFunctions(TransformFunctions):
                 "the regular expressions in column 2, and values the desired final string "
                 "values for the column 1.")
 
-        for pattern, new_str_value in dictionary_of_regex_mappings.items():
+        df = self._convert_categorical_columns_to_object(df, [col1_name])
+        for pattern, new_str_value in self._get_compiled_regex_mappings(
+                dictionary_of_regex_mappings).items():
             mask = df[col2_name].str.contains(pattern)
             df.loc[mask, col1_name] = new_str_value
 
@@ -1038,6 +1085,7 @@ class CommonTransformFunctions(TransformFunctions):
                                                       "be of list type with individual "
                                                       "names being string values.")
 
+        df = self._convert_categorical_columns_to_object(df, [col2_name])
         df.loc[df[col1_name].isin(list_of_values_in_col1), col2_name] = final_val_in_col2
 
         return df
@@ -1136,6 +1184,7 @@ class CommonTransformFunctions(TransformFunctions):
         Returns:
             The dataframe whose NaN values are replaced with empty string.
         """
+        df = self._convert_categorical_columns_to_object(df, list_of_col_names)
         df[list_of_col_names] = df[list_of_col_names].fillna('')
 
         return df
@@ -1164,6 +1213,7 @@ class CommonTransformFunctions(TransformFunctions):
                                                       "be of list type with individual "
                                                       "column names being string values.")
 
+        df = self._convert_categorical_columns_to_object(df, list_of_col_names)
         for col_name in list_of_col_names:
             df[col_name] = df[col_name].replace('', np.NaN).ffill()
 
@@ -1198,6 +1248,7 @@ class CommonTransformFunctions(TransformFunctions):
             raise transform_errors.InputDataTypeError("Column names and values "
                                                       "must be of string type")
 
+        df = self._convert_categorical_columns_to_object(df, [col2_name])
         df.loc[df[col2_name] == col2_value, col2_name] = df[col1_name]
 
         return df
@@ -1437,7 +1488,9 @@ class CommonTransformFunctions(TransformFunctions):
                 "the regular expressions and values the desired final string values for the "
                 "new column.")
 
-        df[new_col_name] = df[existing_col_name].replace(regex=dictionary_of_mappings)
+        df = self._convert_categorical_columns_to_object(df, [existing_col_name])
+        df[new_col_name] = df[existing_col_name].replace(
+            regex=self._get_compiled_regex_mappings(dictionary_of_mappings))
         if leave_empty_if_no_match:
             # In comp harm project, we know that comp_harm_constants.CATEGORIES minus {'', NOT_AVAILABLE}
             # are okay values. So when we do df.loc[...] below, we will ignore rows that
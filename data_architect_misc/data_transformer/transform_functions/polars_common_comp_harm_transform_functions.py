@@ -0,0 +1,85 @@
+"""This Class is CommonCompHarmTransformFunctions whose common
+transform functions (and the functions that only call them) work
+on Polars dataframes. transform.py uses it instead of
+CommonCompHarmTransformFunctions if 'dataframe_backend' in the
+config is 'polars' (see dataframe_backends.py).
+"""
+
+import logging
+
+try:
+    import polars as pl
+except ImportError:
+    # Polars is only needed if 'dataframe_backend' is 'polars'
+    pl = None
+
+from constants import comp_harm_constants
+from dataframe_backends import is_polars_dataframe
+from transform_functions.common_comp_harm_transform_functions import CommonCompHarmTransformFunctions
+from transform_functions.polars_common_transform_functions import PolarsCommonTransformFunctions
+
+
+class PolarsCommonCompHarmTransformFunctions(PolarsCommonTransformFunctions,
+                                             CommonCompHarmTransformFunctions):
+    """
+    Functions of CommonCompHarmTransformFunctions, which use the
+    Polars implementations of the common transform functions in
+    PolarsCommonTransformFunctions (because it comes first in MRO).
+    """
+    POLARS_FUNCTION_NAMES = PolarsCommonTransformFunctions.POLARS_FUNCTION_NAMES | frozenset([
+        # These only call the functions that have Polars implementations
+        'add_HARMONIZED_YEAR_column_by_renaming_existing_column',
+        'add_HARMONIZED_MONTH_column_by_renaming_existing_column',
+        'add_HARMONIZED_REGION_column',
+        'add_HARMONIZED_COUNTRY_column_using_fixed_str_value',
+        'add_HARMONIZED_MEDIA_TYPE_column_using_fixed_str_value',
+        'add_HARMONIZED_CURRENCY_column',
+        'add_RAW_CATEGORY_column_by_renaming_existing_column',
+        'add_RAW_CATEGORY_column_with_empty_values',
+        'add_RAW_SUBCATEGORY_column_by_renaming_existing_column',
+        'add_RAW_SUBCATEGORY_column_with_empty_values',
+        'add_RAW_BRAND_column_by_renaming_existing_column',
+        'add_RAW_BRAND_column_with_empty_values',
+        'add_RAW_SUBBRAND_column_by_renaming_existing_column',
+        'add_RAW_SUBBRAND_column_with_empty_values',
+        'add_RAW_PRODUCT_NAME_column_by_renaming_existing_column',
+        'add_RAW_PRODUCT_NAME_column_with_empty_values',
+        'add_empty_HARMONIZED_columns_for_automated_mapping',
+        'filter_and_rearrange_columns_for_final_output',
+        'multiply_HARMONIZED_GROSS_SPEND_by_thousand',
+        'trim_HARMONIZED_GROSS_SPEND_column_to_two_decimals',
+        # These have Polars implementations below
+        'add_HARMONIZED_GROSS_SPEND_column',
+        'replace_empty_string_values_with_NOT_AVAILABLE'
+    ])
+
+    def __init__(self, config=None):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+
+    def replace_empty_string_values_with_NOT_AVAILABLE(
+            self,
+            df,
+            column_name):
+        if not is_polars_dataframe(df):
+            return super().replace_empty_string_values_with_NOT_AVAILABLE(df, column_name)
+
+        if column_name not in df.columns:
+            return df.with_columns(pl.lit(comp_harm_constants.NOT_AVAILABLE).alias(column_name))
+
+        df = self._convert_categorical_columns_to_str(df, [column_name])
+        return df.with_columns(pl.col(column_name).replace('', comp_harm_constants.NOT_AVAILABLE))
+
+    def add_HARMONIZED_GROSS_SPEND_column(
+            self,
+            df,
+            existing_gross_spend_col_name):
+        if not is_polars_dataframe(df):
+            return super().add_HARMONIZED_GROSS_SPEND_column(df, existing_gross_spend_col_name)
+
+        df = df.with_columns(pl.col(existing_gross_spend_col_name)
+                             .alias(comp_harm_constants.GROSS_SPEND_COLUMN))
+        return self.update_decimal_places_in_columns(
+            df,
+            [comp_harm_constants.GROSS_SPEND_COLUMN],
+            2)
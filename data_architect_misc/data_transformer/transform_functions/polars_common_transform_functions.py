@@ -0,0 +1,272 @@
+"""This Class has Polars implementations of the core functions in
+CommonTransformFunctions. transform.py uses it instead of
+CommonTransformFunctions if 'dataframe_backend' in the config
+is 'polars' (see dataframe_backends.py).
+
+Each function here works on Polars dataframes and passes pandas
+dataframes on to the original function in CommonTransformFunctions,
+so that the functions that aren't implemented with Polars (and the
+functions that call these functions with pandas dataframes) still
+work as before.
+"""
+
+import logging
+
+try:
+    import polars as pl
+except ImportError:
+    # Polars is only needed if 'dataframe_backend' is 'polars'
+    pl = None
+
+import transform_errors
+from dataframe_backends import is_polars_dataframe
+from transform_functions.common_transform_functions import CommonTransformFunctions
+
+
+class PolarsCommonTransformFunctions(CommonTransformFunctions):
+    """
+    Polars implementations of the common transform functions.
+    REF: https://pola-rs.github.io/polars/user-guide/expressions/
+    """
+    # Functions in 'functions_to_apply' that are given Polars dataframes
+    # (the others are given pandas dataframes). Subclasses must add the
+    # functions they implement with Polars (or inherit from other
+    # classes and know that they only call these functions) to this.
+    POLARS_FUNCTION_NAMES = frozenset([
+        'drop_columns_by_name',
+        'drop_columns_by_name_if_they_exist_in_dataframe',
+        'drop_unnamed_columns',
+        'drop_empty_rows',
+        'drop_rows_with_matching_string_values',
+        'rename_columns',
+        'capitalize_column_names',
+        'trim_space_around_column_names',
+        'capitalize_all_letters_of_each_word_in_columns',
+        'update_str_values_in_columns',
+        'update_order_of_columns_in_dataframe',
+        'update_decimal_places_in_columns',
+        'add_new_column_with_fixed_str_value',
+        'add_new_columns_with_empty_str_value_if_not_exist',
+        'add_new_column_by_copying_values_from_another_column',
+        'multiply_values_in_column_by_a_thousand'
+    ])
+
+    def __init__(self, config=None):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+
+    def _convert_categorical_columns_to_str(self, df, list_of_col_names):
+        """
+        Same as _convert_categorical_columns_to_object, but for Polars
+        dataframes, whose categorical columns can't take new values.
+        """
+        return df.with_columns([pl.col(col_name).cast(pl.Utf8) for col_name in list_of_col_names
+                                if df.schema[col_name] == pl.Categorical])
+
+    def drop_columns_by_name(self, df, list_of_col_names):
+        if not is_polars_dataframe(df):
+            return super().drop_columns_by_name(df, list_of_col_names)
+        return df.drop(list_of_col_names)
+
+    def drop_columns_by_name_if_they_exist_in_dataframe(self, df, list_of_col_names):
+        if not is_polars_dataframe(df):
+            return super().drop_columns_by_name_if_they_exist_in_dataframe(df, list_of_col_names)
+        return df.drop([col_name for col_name in list_of_col_names if col_name in df.columns])
+
+    def drop_unnamed_columns(self, df):
+        if not is_polars_dataframe(df):
+            return super().drop_unnamed_columns(df)
+        return df.select([col_name for col_name in df.columns if 'Unnamed' not in col_name])
+
+    def drop_empty_rows(self, df, list_of_col_names, reset_index=True):
+        """
+        Same as pandas' version, which keeps the rows whose values
+        are 'truthy' (i.e. not empty strings, 0 or False). Null values
+        are kept, too, like NaN values in pandas. Polars dataframes
+        have no index to reset.
+        """
+        if not is_polars_dataframe(df):
+            return super().drop_empty_rows(df, list_of_col_names, reset_index)
+
+        if not isinstance(list_of_col_names, list):
+            raise transform_errors.InputDataTypeError("List of column names must "
+                                                      "be of list type with individual "
+                                                      "names being string values.")
+        for col_name in list_of_col_names:
+            data_type = df.schema[col_name]
+            if data_type == pl.Boolean:
+                is_not_empty = pl.col(col_name)
+            elif data_type.is_numeric():
+                is_not_empty = pl.col(col_name) != 0
+            else:
+                is_not_empty = pl.col(col_name).cast(pl.Utf8) != ''
+            df = df.filter(is_not_empty.fill_null(True))
+        return df
+
+    def drop_rows_with_matching_string_values(self,
+                                              df,
+                                              list_of_col_names,
+                                              list_of_list_of_string_values):
+        if not is_polars_dataframe(df):
+            return super().drop_rows_with_matching_string_values(
+                df, list_of_col_names, list_of_list_of_string_values)
+
+        if not (isinstance(list_of_col_names, list)
+                and isinstance(list_of_list_of_string_values, list)):
+            raise transform_errors.InputDataTypeError(
+                f"List of column names and list of set "
+                f"of string values must both be of list type.")
+
+        if len(list_of_col_names) != len(list_of_list_of_string_values):
+            raise transform_errors.InputDataLengthError(
+                f"The length of the list of column names: {len(list_of_col_names)} "
+                f"is NOT the same as the length of the set of string values: "
+                f"{len(list_of_list_of_string_values)}.")
+
+        for col_name, string_values in zip(list_of_col_names, list_of_list_of_string_values):
+            for cell_str in string_values:
+                df = df.filter(~pl.col(col_name).cast(pl.Utf8).str.contains(cell_str)
+                               .fill_null(False))
+        return df
+
+    def rename_columns(self, df, old_to_new_cols_dict):
+        if not is_polars_dataframe(df):
+            return super().rename_columns(df, old_to_new_cols_dict)
+        # Like pandas, columns that don't exist are ignored
+        return df.rename({old: new for old, new in old_to_new_cols_dict.items()
+                          if old in df.columns})
+
+    def capitalize_column_names(self, df):
+        if not is_polars_dataframe(df):
+            return super().capitalize_column_names(df)
+        df.columns = [x.upper() for x in df.columns]
+        return df
+
+    def trim_space_around_column_names(self, df):
+        if not is_polars_dataframe(df):
+            return super().trim_space_around_column_names(df)
+        df.columns = [x.strip() for x in df.columns]
+        return df
+
+    def capitalize_all_letters_of_each_word_in_columns(self, df, list_of_col_names):
+        if not is_polars_dataframe(df):
+            return super().capitalize_all_letters_of_each_word_in_columns(df, list_of_col_names)
+
+        if not isinstance(list_of_col_names, list):
+            raise transform_errors.InputDataTypeError("List of column names must "
+                                                      "be of list type with individual "
+                                                      "names being string values.")
+        df = self._convert_categorical_columns_to_str(df, list_of_col_names)
+        return df.with_columns([pl.col(col_name).str.to_uppercase()
+                                for col_name in list_of_col_names])
+
+    def update_str_values_in_columns(self,
+                                     df,
+                                     list_of_col_names,
+                                     list_of_dictionary_of_value_mappings):
+        if not is_polars_dataframe(df):
+            return super().update_str_values_in_columns(df, list_of_col_names,
+                                                        list_of_dictionary_of_value_mappings)
+
+        if not (isinstance(list_of_col_names, list) and
+                isinstance(list_of_dictionary_of_value_mappings, list)):
+            raise transform_errors.InputDataTypeError("List of column names and list of "
+                                                      "dictionary of value mappings must "
+                                                      "be of type 'list'.")
+
+        if len(list_of_col_names) != len(list_of_dictionary_of_value_mappings):
+            raise transform_errors.InputDataLengthError(
+                f"The length of column list: {len(list_of_col_names)} "
+                f"is NOT the same as the length of the list of dictionaries "
+                f"of update values: {len(list_of_dictionary_of_value_mappings)}")
+
+        df = self._convert_categorical_columns_to_str(df, list_of_col_names)
+        # Like pandas' version, values mapped to null keep their original values
+        return df.with_columns([pl.col(col_name).replace({old: new for old, new in mappings.items()
+                                                          if new is not None})
+                                for col_name, mappings in zip(list_of_col_names,
+                                                              list_of_dictionary_of_value_mappings)])
+
+    def update_order_of_columns_in_dataframe(self, df, list_reordered_col_headers):
+        if not is_polars_dataframe(df):
+            return super().update_order_of_columns_in_dataframe(df, list_reordered_col_headers)
+
+        if not isinstance(list_reordered_col_headers, list):
+            raise transform_errors.InputDataTypeError("list_reordered_col_headers must "
+                                                      "be of list type with individual "
+                                                      "names being string values.")
+        return df.select(list_reordered_col_headers)
+
+    def update_decimal_places_in_columns(self,
+                                         df,
+                                         list_of_col_names,
+                                         number_of_decimal_places_to_round):
+        if not is_polars_dataframe(df):
+            return super().update_decimal_places_in_columns(df, list_of_col_names,
+                                                            number_of_decimal_places_to_round)
+
+        if not isinstance(list_of_col_names, list):
+            raise transform_errors.InputDataTypeError("list_of_col_names must "
+                                                      "be of list type with individual "
+                                                      "column names being string values.")
+
+        if not isinstance(number_of_decimal_places_to_round, int):
+            raise transform_errors.InputDataTypeError("Value for number of decimal places "
+                                                      "must be of integer type.")
+
+        return df.with_columns([pl.col(col_name).cast(pl.Float64)
+                               .round(number_of_decimal_places_to_round)
+                                for col_name in list_of_col_names])
+
+    def add_new_column_with_fixed_str_value(self, df, new_col_name, fixed_str_value):
+        if not is_polars_dataframe(df):
+            return super().add_new_column_with_fixed_str_value(df, new_col_name, fixed_str_value)
+
+        if not (isinstance(new_col_name, str) and isinstance(fixed_str_value, str)):
+            raise transform_errors.InputDataTypeError("Column names and fixed_str_value "
+                                                      "must be of string type")
+        return df.with_columns(pl.lit(fixed_str_value, dtype=pl.Utf8).alias(new_col_name))
+
+    def add_new_columns_with_empty_str_value_if_not_exist(self, df, list_new_col_names):
+        if not is_polars_dataframe(df):
+            return super().add_new_columns_with_empty_str_value_if_not_exist(df, list_new_col_names)
+
+        if not (isinstance(list_new_col_names, list)):
+            raise transform_errors.InputDataTypeError("The columns names "
+                                                      "must be provided as a list.")
+        return df.with_columns([pl.lit('', dtype=pl.Utf8).alias(col_name)
+                                for col_name in dict.fromkeys(list_new_col_names)
+                                if col_name not in df.columns])
+
+    def add_new_column_by_copying_values_from_another_column(self,
+                                                             df,
+                                                             list_of_existing_col_names,
+                                                             list_of_new_col_names):
+        if not is_polars_dataframe(df):
+            return super().add_new_column_by_copying_values_from_another_column(
+                df, list_of_existing_col_names, list_of_new_col_names)
+
+        if not (isinstance(list_of_existing_col_names, list)
+                and isinstance(list_of_new_col_names, list)):
+            raise transform_errors.InputDataTypeError(
+                f"List of existing and new column names must be "
+                f"of list type.")
+
+        if len(list_of_existing_col_names) != len(list_of_new_col_names):
+            raise transform_errors.InputDataLengthError(
+                f"The length of existing column list: "
+                f"{len(list_of_existing_col_names)} "
+                f"is NOT the same as the length of new column "
+                f"name list: {len(list_of_new_col_names)}")
+
+        # One at a time (like pandas' version) because a new
+        # column can be copied from the one added before it.
+        for existing_col_name, new_col_name in zip(list_of_existing_col_names,
+                                                   list_of_new_col_names):
+            df = df.with_columns(pl.col(existing_col_name).alias(new_col_name))
+        return df
+
+    def multiply_values_in_column_by_a_thousand(self, df, column_name):
+        if not is_polars_dataframe(df):
+            return super().multiply_values_in_column_by_a_thousand(df, column_name)
+        return df.with_columns(pl.col(column_name) * 1000)
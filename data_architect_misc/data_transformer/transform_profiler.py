@@ -0,0 +1,188 @@
+"""
+Profiler to find out which of the functions in 'functions_to_apply'
+of the config files are slow (or use a lot of memory).
+
+If profiling is turned on in transform.py (with '-p' flag), each
+invocation of a transform function on a chunk is recorded with its
+wall time, CPU time, increase in peak memory (RSS) usage of the
+process and the number of rows and columns of the dataframe before
+and after the function is applied. At the end of the run, the
+records are summarized by function name (slowest first) and written
+as a table in the console and as JSON and CSV files.
+"""
+import csv
+from datetime import datetime
+import json
+import logging
+import os
+import sys
+import time
+
+try:
+    # 'resource' module is not available on Windows,
+    # in which case peak RSS is not recorded.
+    import resource
+except ImportError:
+    resource = None
+
+# time.thread_time (Python 3.7+) excludes the CPU time
+# spent by the background reader and writer threads.
+_cpu_time = getattr(time, 'thread_time', time.process_time)
+
+INVOCATION_FIELDS = ['input_file', 'chunk_index', 'function_index',
+                     'function_name', 'wall_time_secs', 'cpu_time_secs',
+                     'peak_rss_increase_mb', 'input_rows', 'input_columns',
+                     'output_rows', 'output_columns']
+
+SUMMARY_FIELDS = ['function_name', 'calls', 'wall_time_secs',
+                  'cpu_time_secs', 'max_peak_rss_increase_mb',
+                  'input_rows', 'output_rows']
+
+
+def _get_peak_rss_in_mb():
+    """
+    Returns the peak resident set size (RSS) of this process
+    so far in MB. ru_maxrss is in KB on Linux, but in bytes on Mac.
+    REF: https://docs.python.org/3/library/resource.html#resource.getrusage
+    """
+    if resource is None:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak_rss / (1024 * 1024)
+    return peak_rss / 1024
+
+
+class TransformProfiler:
+    """
+    Records the cost of each transform function invocation
+    and reports them summarized by function name.
+    """
+    REPORT_FILE_NAME_PREFIX = 'transform_profile'
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.invocations = []
+
+    def run_function(self, input_file, chunk_index, function_index,
+                     function_name, func, df, func_args, func_kwargs):
+        """
+        Invokes func(df, *func_args, **func_kwargs), records
+        how much it cost and returns the resulting dataframe.
+        """
+        input_rows, input_columns = df.shape
+        peak_rss_before = _get_peak_rss_in_mb()
+        cpu_start = _cpu_time()
+        wall_start = time.perf_counter()
+
+        result_df = func(df, *func_args, **func_kwargs)
+
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = _cpu_time() - cpu_start
+        peak_rss_after = _get_peak_rss_in_mb()
+
+        self.invocations.append({
+            'input_file': input_file,
+            'chunk_index': chunk_index,
+            'function_index': function_index,
+            'function_name': function_name,
+            'wall_time_secs': round(wall_time, 6),
+            'cpu_time_secs': round(cpu_time, 6),
+            'peak_rss_increase_mb': (None if peak_rss_before is None
+                                     else round(peak_rss_after - peak_rss_before, 3)),
+            'input_rows': input_rows,
+            'input_columns': input_columns,
+            'output_rows': result_df.shape[0],
+            'output_columns': result_df.shape[1],
+        })
+
+        return result_df
+
+    def add_invocations(self, invocations):
+        """Adds records from profilers used in other (worker) processes."""
+        self.invocations.extend(invocations)
+
+    def _summarize(self, invocations):
+        """
+        Sums up the invocation records by function name
+        and returns them sorted by wall time (slowest first).
+        """
+        summary = {}
+        for inv in invocations:
+            s = summary.setdefault(inv['function_name'], {
+                'function_name': inv['function_name'],
+                'calls': 0,
+                'wall_time_secs': 0,
+                'cpu_time_secs': 0,
+                'max_peak_rss_increase_mb': None,
+                'input_rows': 0,
+                'output_rows': 0,
+            })
+            s['calls'] += 1
+            s['wall_time_secs'] += inv['wall_time_secs']
+            s['cpu_time_secs'] += inv['cpu_time_secs']
+            s['input_rows'] += inv['input_rows']
+            s['output_rows'] += inv['output_rows']
+            if inv['peak_rss_increase_mb'] is not None:
+                s['max_peak_rss_increase_mb'] = max(s['max_peak_rss_increase_mb'] or 0,
+                                                    inv['peak_rss_increase_mb'])
+
+        for s in summary.values():
+            s['wall_time_secs'] = round(s['wall_time_secs'], 6)
+            s['cpu_time_secs'] = round(s['cpu_time_secs'], 6)
+
+        return sorted(summary.values(),
+                      key=lambda s: s['wall_time_secs'],
+                      reverse=True)
+
+    def get_summary_by_function(self):
+        return self._summarize(self.invocations)
+
+    def get_summary_by_input_file(self):
+        """Returns {input_file => summary by function name for that file}."""
+        input_files = sorted(set(inv['input_file'] for inv in self.invocations))
+        return {f: self._summarize([inv for inv in self.invocations
+                                    if inv['input_file'] == f])
+                for f in input_files}
+
+    def _format_summary_table(self, summary):
+        rows = [SUMMARY_FIELDS] + [['' if s[k] is None else str(s[k])
+                                    for k in SUMMARY_FIELDS]
+                                   for s in summary]
+        col_widths = [max(len(r[i]) for r in rows)
+                      for i in range(len(SUMMARY_FIELDS))]
+        return '\n'.join(['  '.join(v.ljust(col_widths[i]) for i, v in enumerate(r))
+                          for r in rows])
+
+    def log_report(self):
+        self.logger.info(f"Time spent in transform functions (slowest first):\n"
+                         f"{self._format_summary_table(self.get_summary_by_function())}")
+
+    def write_report(self, output_folder):
+        """
+        Writes the summaries and the invocation records to a JSON
+        file and the invocation records to a CSV file in the output
+        folder. Returns the paths of the files written.
+        """
+        if not os.path.exists(output_folder):
+            os.makedirs(output_folder, exist_ok=True)
+
+        file_name = f"{self.REPORT_FILE_NAME_PREFIX}_" \
+                    f"{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        json_file = os.path.join(output_folder, f"{file_name}.json")
+        csv_file = os.path.join(output_folder, f"{file_name}.csv")
+
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump({'summary_by_function': self.get_summary_by_function(),
+                       'summary_by_input_file': self.get_summary_by_input_file(),
+                       'invocations': self.invocations},
+                      f, indent=2)
+
+        with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=INVOCATION_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.invocations)
+
+        self.logger.info(f"Profiling report is written to: {json_file} and {csv_file}")
+        return json_file, csv_file
@@ -1,8 +1,12 @@
+import collections
 import importlib
 import json
 import pathlib
+import types
 
 from constants.transform_constants import *
+import dataframe_backends
+import lazy_execution
 import transform_errors
 
 
@@ -67,9 +71,62 @@ def insert_output_file_encoding_key_value_to_config_json(output_encoding, config
     return config
 
 
-def _assert_required_keys(config):
+def _get_str_values_in_function_params(params):
+    """
+    Returns all the string values (including dictionary keys)
+    found in the function arguments, however deeply nested
+    they are in lists and dictionaries.
+    """
+    if isinstance(params, str):
+        return [params]
+    elif isinstance(params, dict):
+        return _get_str_values_in_function_params(list(params.keys())) \
+               + _get_str_values_in_function_params(list(params.values()))
+    elif isinstance(params, list):
+        return [s for p in params for s in _get_str_values_in_function_params(p)]
+    return []
+
+
+def get_str_values_in_functions_to_apply(config):
+    """
+    Returns the set of all the string values in the arguments
+    (and keyword arguments) of the functions in 'functions_to_apply'.
+    """
+    str_values = set()
+    for func_and_params in config[KEY_FUNCTIONS_TO_APPLY]:
+        str_values.update(_get_str_values_in_function_params(
+            func_and_params.get(KEY_FUNC_ARGS, [])))
+        str_values.update(_get_str_values_in_function_params(
+            func_and_params.get(KEY_FUNC_KWARGS, {})))
+    return str_values
+
+
+def insert_inferred_input_columns_to_config_json(config):
+    """
+    If user set 'infer_input_columns' to True (and did not provide
+    'input_columns'), inserts every string value in the arguments of
+    'functions_to_apply' as 'input_columns' in config JSON. Data
+    readers then read only the columns whose names are among these
+    values (e.g., the columns given to
+    'filter_and_rearrange_columns_for_final_output'), so the other
+    columns of wide input files are never parsed.
+    """
+    if ((not config.get(PandasFileDataReader.KEY_INFER_INPUT_COLUMNS,
+                        PandasFileDataReader.DEFAULT_INFER_INPUT_COLUMNS))
+            or (PandasFileDataReader.KEY_INPUT_COLUMNS in config)):
+        return config
+
+    config[PandasFileDataReader.KEY_INPUT_COLUMNS] = sorted(
+        get_str_values_in_functions_to_apply(config))
+    return config
+
+
+def _assert_required_keys(config, input_file_keys_required=True):
     """Checks if all required keys exist in the config loaded."""
     for k in REQUIRED_KEYS:
+        if (not input_file_keys_required) \
+                and (k in [KEY_INPUT_FOLDER_PATH, KEY_INPUT_FILE_NAME_OR_PATTERN]):
+            continue
         if k not in config:
             raise transform_errors.RequiredKeyNotFoundInConfigFile(k)
 
@@ -86,9 +143,13 @@ def _assert_expected_data_types(config):
             raise transform_errors.ConfigFileInputDataTypeError(k, types)
 
 
-def validate_configurations(config):
-    """Calls other helper functions to check on the validity of config JSON"""
-    _assert_required_keys(config)
+def validate_configurations(config, input_file_keys_required=True):
+    """
+    Calls other helper functions to check on the validity of config JSON.
+    input_file_keys_required is False if the input data doesn't come
+    from the input files (e.g., from the previous step of a pipeline).
+    """
+    _assert_required_keys(config, input_file_keys_required)
     _assert_expected_data_types(config)
 
 
@@ -116,6 +177,45 @@ def get_write_data_decision(config):
                       DEFAULT_WRITE_OUTPUT)
 
 
+def get_chunk_queue_size(config):
+    """
+    Get the number of dataframes that can be read (and written)
+    ahead in background threads while transform functions are
+    applied. 0 means no background threads are used.
+    """
+    return config.get(KEY_CHUNK_QUEUE_SIZE,
+                      DEFAULT_CHUNK_QUEUE_SIZE)
+
+
+def get_lazy_execution_decision(config):
+    """
+    Get boolean value that tells the program whether to fuse
+    consecutive column-wise steps of 'functions_to_apply'.
+    """
+    return config.get(KEY_LAZY_EXECUTION,
+                      DEFAULT_LAZY_EXECUTION)
+
+
+def get_dataframe_backend(config):
+    """
+    Get the dataframe library ('pandas' or 'polars')
+    to read, transform and write the data with.
+    """
+    backend = config.get(KEY_DATAFRAME_BACKEND,
+                         DEFAULT_DATAFRAME_BACKEND)
+    dataframe_backends.check_backend(backend)
+    return backend
+
+
+def get_chunk_cache_max_size_mb(config):
+    """
+    Get the maximum size (in MB) of the folder where dataframes
+    are cached after each step of 'functions_to_apply'.
+    """
+    return config.get(KEY_CHUNK_CACHE_MAX_SIZE_MB,
+                      DEFAULT_CHUNK_CACHE_MAX_SIZE_MB)
+
+
 def _get_classes_defined_in_module(python_module):
     # REF: https://stackoverflow.com/a/61471777/1330974
     return [v for k, v in vars(python_module).items() if isinstance(v, type)]
@@ -173,6 +273,13 @@ def _get_module_name_in_absolute_term(module_file_path_and_name):
     return rel_path_and_file_name_without_file_ext.replace(os.sep, '.')
 
 
+# Registry of the classes found by instantiate_class_in_module_file
+# (keyed by the absolute path of the module file). Batch and pipeline
+# runs use the same transform functions (and data writer) modules for
+# many configs, so each module is imported and searched only once.
+_CLASSES_IN_MODULE_FILES = {}
+
+
 def instantiate_class_in_module_file(module_file_path_and_name):
     """
     This method will return the class with the matching
@@ -181,6 +288,10 @@ def instantiate_class_in_module_file(module_file_path_and_name):
     import the module and return ExcelDataWriter class
     in that module file.
     """
+    abs_module_file_path_and_name = os.path.abspath(module_file_path_and_name)
+    if abs_module_file_path_and_name in _CLASSES_IN_MODULE_FILES:
+        return _CLASSES_IN_MODULE_FILES[abs_module_file_path_and_name]
+
     if os.path.isfile(module_file_path_and_name):
         # Suppose the module file is:
         # C://Users/lachee/data_transformer/reader_writers/data_writers/excel_writer.py
@@ -195,7 +306,9 @@ def instantiate_class_in_module_file(module_file_path_and_name):
         module = importlib.import_module(
             _get_module_name_in_absolute_term(module_file_path_and_name))
 
-        return _get_primary_class_from_module(module)
+        kls = _get_primary_class_from_module(module)
+        _CLASSES_IN_MODULE_FILES[abs_module_file_path_and_name] = kls
+        return kls
     else:
         raise transform_errors.FileNotFound(module_file_path_and_name)
 
@@ -207,11 +320,26 @@ def instantiate_data_writer_class(config):
     return instantiate_class_in_module_file(data_writer_module_file)(config)
 
 
-def instantiate_transform_functions_class(config):
+def get_transform_functions_module_file(config):
+    """
+    Returns the transform functions module file that the config
+    uses, which is the Polars version of it if the config uses
+    Polars as dataframe backend.
+    """
     transform_funcs_module_file = config.get(
         KEY_CUSTOM_TRANSFORM_FUNCTIONS_FILE,
         DEFAULT_COMMON_TRANSFORM_FUNCTIONS_FILE)
-    return instantiate_class_in_module_file(transform_funcs_module_file)(config)
+    if get_dataframe_backend(config) == dataframe_backends.BACKEND_POLARS:
+        # Configs can use Polars without changing their transform functions file
+        folder, file_name = os.path.split(transform_funcs_module_file)
+        if file_name in POLARS_TRANSFORM_FUNCTIONS_FILES:
+            transform_funcs_module_file = os.path.join(
+                folder, POLARS_TRANSFORM_FUNCTIONS_FILES[file_name])
+    return transform_funcs_module_file
+
+
+def instantiate_transform_functions_class(config):
+    return instantiate_class_in_module_file(get_transform_functions_module_file(config))(config)
 
 
 def _is_any_key_in_dict(dictionary, list_of_keys):
@@ -338,3 +466,85 @@ def get_function_kwargs(dict_of_func_and_params):
          or an empty dictionary if "function_kwargs" key does not exist in the dictionary.
     """
     return dict_of_func_and_params.get(KEY_FUNC_KWARGS, dict())
+
+
+# One step of the execution plan compiled from 'functions_to_apply'.
+# 'function' is the transform function already bound to the
+# transform functions class instance.
+ExecutionStep = collections.namedtuple('ExecutionStep',
+                                       ['function_name', 'function', 'args', 'kwargs'])
+
+
+def compile_execution_plan(config, transform_funcs_kls, allow_lazy_execution=True):
+    """
+    Validates 'functions_to_apply' in the config and compiles them
+    into an execution plan (tuple of ExecutionStep), in which each
+    step holds the transform function bound to the transform_funcs_kls
+    instance and its args and kwargs. Only the plan and the args and
+    kwargs of each step are read-only; the lists and dictionaries in
+    them are the ones in the config (not copied), so transform
+    functions must not change them.
+
+    The plan is meant to be compiled once per config and reused
+    for every chunk of every input file, so that we don't look up
+    and validate the functions and their parameters again and again.
+    Because the same transform functions class instance is used
+    throughout, lookup dictionaries built in its __init__ and
+    regular expressions compiled by its functions are reused, too.
+
+    Args:
+        config: JSON config which has 'functions_to_apply'.
+        transform_funcs_kls: Instance of transform functions class
+        (see instantiate_transform_functions_class).
+        allow_lazy_execution: If False, steps are not fused even if
+        'lazy_execution' is turned on in the config (e.g., because the
+        result of every step must be cached).
+
+    Returns:
+        Tuple of ExecutionStep(function_name, function, args, kwargs).
+
+    Raises:
+        TransformFunctionNotFoundError: If any of the functions is not
+        defined in the transform functions class.
+    """
+    execution_plan = []
+    for func_and_params in get_functions_to_apply(config):
+        func_name = get_function_name(func_and_params)
+        func_args = get_function_args(func_and_params)
+        func_kwargs = get_function_kwargs(func_and_params)
+
+        func = getattr(transform_funcs_kls, func_name, None)
+        if not callable(func):
+            raise transform_errors.TransformFunctionNotFoundError(
+                func_name, type(transform_funcs_kls).__name__)
+
+        if not isinstance(func_args, list):
+            raise transform_errors.ConfigFileInputDataTypeError(KEY_FUNC_ARGS, [list])
+
+        if not isinstance(func_kwargs, dict):
+            raise transform_errors.ConfigFileInputDataTypeError(KEY_FUNC_KWARGS, [dict])
+
+        execution_plan.append(ExecutionStep(func_name,
+                                            func,
+                                            tuple(func_args),
+                                            types.MappingProxyType(func_kwargs)))
+
+    if get_dataframe_backend(config) == dataframe_backends.BACKEND_POLARS:
+        return dataframe_backends.set_backends_in_execution_plan(execution_plan,
+                                                                 transform_funcs_kls,
+                                                                 ExecutionStep)
+    if allow_lazy_execution and get_lazy_execution_decision(config):
+        return lazy_execution.fuse_execution_plan(execution_plan, transform_funcs_kls,
+                                                  ExecutionStep)
+    return tuple(execution_plan)
+
+
+def apply_execution_plan(df, execution_plan):
+    """
+    Applies the steps of the execution plan (compiled by
+    compile_execution_plan) to the dataframe one after
+    another and returns the resulting dataframe.
+    """
+    for step in execution_plan:
+        df = step.function(df, *step.args, **step.kwargs)
+    return df